@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,10 +13,124 @@ class Settings(BaseSettings):
     MONGO_URI: str
     MONGO_DB: str
     MONGO_DB_TEST: str
+    MONGO_READ_MAX_STALENESS_SECONDS: int = 90
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_MAX_TIME_MS_READS: int = 2000
+    MONGO_MAX_TIME_MS_ANALYTICS: int = 15000
 
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_BACKEND: Literal["jose", "pyjwt", "joserfc"] = "jose"
+    JWT_KEYS: dict[str, str] = {}
+    JWT_ACTIVE_KID: Optional[str] = None
+    ADMIN_USER_IDS: list[str] = []
+
+    BULKHEAD_AUTH: int = 20
+    BULKHEAD_READS: int = 50
+    BULKHEAD_WRITES: int = 30
+    BULKHEAD_ANALYTICS: int = 5
+    BULKHEAD_MAX_WAIT_MS: float = 100
+
+    CIRCUIT_BREAKER_WINDOW: int = 20
+    CIRCUIT_BREAKER_MIN_CALLS: int = 10
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 10
+
+    REQUEST_DEADLINES_ENABLED: bool = True
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 60
+    REQUEST_TIMEOUT_AUTH: float = 10
+    REQUEST_TIMEOUT_READS: float = 10
+    REQUEST_TIMEOUT_WRITES: float = 30
+    REQUEST_TIMEOUT_ANALYTICS: float = 30
+
+    WRITE_COALESCER_ENABLED: bool = False
+    WRITE_COALESCER_MAX_BATCH: int = 500
+    WRITE_COALESCER_MAX_DELAY_MS: float = 2.0
+    WRITE_COALESCER_MAX_QUEUE: int = 10000
+
+    PRODUCT_LOADER_ENABLED: bool = True
+    PRODUCT_LOADER_MAX_BATCH: int = 100
+    PRODUCT_LOOKUP_MAX_IDS: int = 100
+
+    SOFT_DELETE_RETENTION_DAYS: int = 30
+    PRODUCT_ARCHIVE_AFTER_DAYS: Optional[int] = None
+    PRODUCT_ARCHIVE_BATCH_SIZE: int = 500
+    PRODUCT_ARCHIVE_BATCH_PAUSE_MS: int = 100
+    PRODUCT_ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    MIGRATIONS_RUN_ON_STARTUP: bool = True
+    MIGRATION_BATCH_SIZE: int = 1000
+    MIGRATION_TARGET_LATENCY_MS: float = 200
+    MIGRATION_MAX_REPLICATION_LAG_SECONDS: float = 10
+    MIGRATION_MIN_PAUSE_MS: float = 10
+    MIGRATION_MAX_PAUSE_MS: float = 5000
+    MIGRATION_LOCK_SECONDS: float = 60
+
+    PRODUCT_COMPACT_STORAGE: bool = False
+    PRODUCT_LAYOUT_MIGRATING: bool = False
+    PRODUCT_LAYOUT_MIGRATION_BATCH_SIZE: int = 1000
+    PRODUCT_LAYOUT_MIGRATION_PAUSE_MS: int = 100
+
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_LEASE_SECONDS: float = 60.0
+
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    IMPORT_MAX_LINE_LENGTH: int = 65536
+
+    EXPORT_DIR: str = "exports"
+    EXPORT_BATCH_SIZE: int = 50000
+
+    STATS_BATCH_SIZE: int = 50000
+    STATS_CACHE_TTL_SECONDS: int = 60
+
+    SLOW_QUERY_THRESHOLD_MS: Optional[float] = None
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 10
+    SLOW_QUERY_MAX_ENTRIES: int = 500
+
+    READINESS_INTERVAL_SECONDS: float = 5
+    READINESS_TIMEOUT_SECONDS: float = 2
+    READINESS_STALE_AFTER_SECONDS: float = 15
+
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: float = 100
+    LOOP_MONITOR_THRESHOLD_MS: float = 100
+
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "fastapi-products-api"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0
+    TRACING_TAIL_LATENCY_MS: Optional[float] = None
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_MAX_SESSIONS: int = 200
+
+    JOBS_ENABLED: bool = True
+    JOBS_CONCURRENCY: int = 2
+    JOBS_LEASE_SECONDS: int = 30
+    JOBS_HEARTBEAT_SECONDS: int = 10
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 3
+
+    PRODUCT_EVENTS_ENABLED: bool = False
+    PRODUCT_EVENTS_SINK: str = "file:product-events.ndjson"
+    PRODUCT_EVENTS_BATCH_SIZE: int = 100
+    PRODUCT_EVENTS_MAX_WAIT_MS: int = 1000
+    PRODUCT_EVENTS_LEASE_SECONDS: float = 30
+
+    WARMUP_ENABLED: bool = False
+    WARMUP_TIMEOUT_SECONDS: float = 15
+    WARMUP_HOT_USERS: int = 50
+    WARMUP_USER_IDS: list[str] = []
+    WARMUP_PRODUCTS_PER_USER: int = 100
+    WARMUP_CONCURRENCY: int = 4
+    WARMUP_TOUCH_INDEXES: bool = False
+    WARMUP_HOT_SET_SAVE_SECONDS: float = 300
 
     PROJECT_NAME: str = "FastAPI MongoDB Demo"
     DESCRIPTION: str = (
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import RequestDeadlineExceeded
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+BODYLESS_METHODS = {"GET", "HEAD", "DELETE", "OPTIONS"}
+
+
+class RequestDeadline:
+    """
+    Plazo de una petición y recursos a liberar si se cancela.
+
+    El plazo cancela la tarea del handler si la respuesta no ha empezado
+    antes de expires_at. Los cursores registrados con track_cursor se
+    cierran (killCursors) tras la cancelación.
+
+    Attributes:
+        expires_at: Instante límite (time.monotonic), o None sin plazo
+        explicit: Si el plazo viene de la cabecera X-Request-Timeout
+        reason: "deadline" o "disconnect" cuando la petición se cancela
+    """
+
+    def __init__(self, task: asyncio.Task, timeout: Optional[float], explicit: bool):
+        self.task = task
+        self.explicit = explicit
+        self.expires_at: Optional[float] = None
+        self.reason: Optional[str] = None
+        self.response_started = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._cursors: list = []
+        if timeout is not None:
+            self.set_timeout(timeout)
+
+    def set_timeout(self, timeout: float) -> None:
+        """Programa (o reprograma) la cancelación dentro de timeout segundos."""
+        if self._timer:
+            self._timer.cancel()
+        self.expires_at = time.monotonic() + timeout
+        self._timer = asyncio.get_running_loop().call_later(
+            timeout, self.cancel, "deadline"
+        )
+
+    def apply_route_default(self, timeout: float) -> None:
+        """Aplica el plazo de la ruta salvo que el cliente haya fijado uno."""
+        if not self.explicit:
+            self.set_timeout(timeout)
+
+    def remaining_ms(self) -> Optional[int]:
+        if self.expires_at is None:
+            return None
+        return int((self.expires_at - time.monotonic()) * 1000)
+
+    def cancel(self, reason: str) -> None:
+        if self.reason is not None or self.response_started and reason == "deadline":
+            return
+        self.reason = reason
+        self.task.cancel()
+
+    def started(self) -> None:
+        """La respuesta ha empezado: el plazo deja de aplicarse."""
+        self.response_started = True
+        if self._timer:
+            self._timer.cancel()
+
+    def track(self, cursor):
+        self._cursors.append(cursor)
+        return cursor
+
+    async def close_cursors(self) -> None:
+        for cursor in self._cursors:
+            try:
+                await cursor.close()
+            except Exception:
+                logger.exception("Failed to close cursor of cancelled request")
+        self._cursors = []
+
+    def finish(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+
+
+current_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def track_cursor(cursor):
+    """
+    Registra un cursor Motor de la petición actual para cerrarlo si se cancela.
+
+    Returns:
+        El mismo cursor
+    """
+    deadline = current_deadline.get()
+    if deadline is not None:
+        deadline.track(cursor)
+    return cursor
+
+
+def remaining_ms() -> Optional[int]:
+    """
+    Milisegundos que quedan del plazo de la petición actual.
+
+    Raises:
+        RequestDeadlineExceeded: Si el plazo ya ha vencido
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline.remaining_ms()
+    if remaining is not None and remaining <= 0:
+        raise RequestDeadlineExceeded()
+    return remaining
+
+
+def parse_timeout(scope: Scope) -> Optional[float]:
+    """Lee X-Request-Timeout (segundos), acotado a REQUEST_TIMEOUT_MAX_SECONDS."""
+    for key, value in scope.get("headers", []):
+        if key == TIMEOUT_HEADER:
+            try:
+                timeout = float(value)
+            except ValueError:
+                return None
+            if timeout <= 0:
+                return None
+            return min(timeout, settings.REQUEST_TIMEOUT_MAX_SECONDS)
+    return None
+
+
+def _has_body(scope: Scope) -> bool:
+    if scope["method"] not in BODYLESS_METHODS:
+        return True
+    for key, value in scope.get("headers", []):
+        if key == b"transfer-encoding" or (key == b"content-length" and value != b"0"):
+            return True
+    return False
+
+
+class RequestDeadlineMiddleware:
+    """
+    Middleware ASGI que aborta las peticiones vencidas o abandonadas.
+
+    - Plazo: X-Request-Timeout o el de la clase de ruta (guard_database). Si
+      vence antes de empezar la respuesta se cancela el handler, se cierran
+      sus cursores y se responde 504.
+    - Desconexión: en peticiones sin cuerpo se escucha http.disconnect y, si
+      el cliente se va, se cancela el handler y se cierran sus cursores.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header_timeout = parse_timeout(scope)
+        task = asyncio.current_task()
+        deadline = RequestDeadline(task, header_timeout, header_timeout is not None)
+        token = current_deadline.set(deadline)
+
+        watcher = None
+        if not _has_body(scope):
+            receive, watcher = self._watch_disconnect(receive, deadline)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                deadline.started()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except asyncio.CancelledError:
+            if deadline.reason is None:
+                raise
+            task.uncancel()
+            await deadline.close_cursors()
+            metrics.increment(f"requests_cancelled_{deadline.reason}")
+            if deadline.reason == "deadline" and not deadline.response_started:
+                exc = RequestDeadlineExceeded()
+                response = JSONResponse(
+                    status_code=exc.status_code, content={"detail": exc.detail}
+                )
+                await response(scope, receive, send)
+        finally:
+            deadline.finish()
+            if watcher:
+                watcher.cancel()
+            current_deadline.reset(token)
+
+    def _watch_disconnect(self, receive: Receive, deadline: RequestDeadline):
+        """
+        Lee los mensajes del cliente en segundo plano.
+
+        El primero (la petición vacía) se entrega al handler; si después llega
+        http.disconnect se cancela la petición.
+        """
+        disconnected = asyncio.Event()
+        first: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        async def watch() -> None:
+            message = await receive()
+            first.set_result(message)
+            while message["type"] != "http.disconnect":
+                message = await receive()
+            disconnected.set()
+            deadline.cancel("disconnect")
+
+        delivered = False
+
+        async def wrapped_receive() -> Message:
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return await first
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        return wrapped_receive, asyncio.create_task(watch())
@@ -2,14 +2,25 @@ from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 
 from app.core.exceptions import (
+    AdminRequired,
     CredentialsException,
     DatabaseConnectionError,
     EmailAlreadyRegistered,
     FieldRequired,
     FieldTooShort,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyReused,
+    ImportFormatUnsupported,
+    JobNotFound,
+    JobTypeUnknown,
+    OptionalDependencyMissing,
     ProductAccessForbidden,
     ProductIdInvalid,
     ProductNotFound,
+    ProductSortUnsupported,
+    RequestDeadlineExceeded,
+    ServiceNotReady,
+    ServiceOverloaded,
     TokenInvalid,
 )
 
@@ -50,12 +61,70 @@ async def product_access_forbidden_exception_handler(
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 
+async def product_sort_unsupported_exception_handler(
+    request: Request, exc: ProductSortUnsupported
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def import_format_unsupported_exception_handler(
+    request: Request, exc: ImportFormatUnsupported
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def job_not_found_exception_handler(request: Request, exc: JobNotFound):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def job_type_unknown_exception_handler(request: Request, exc: JobTypeUnknown):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def idempotency_key_reused_exception_handler(
+    request: Request, exc: IdempotencyKeyReused
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def idempotency_key_in_progress_exception_handler(
+    request: Request, exc: IdempotencyKeyInProgress
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def optional_dependency_missing_exception_handler(
+    request: Request, exc: OptionalDependencyMissing
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def admin_required_exception_handler(request: Request, exc: AdminRequired):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
 async def database_connection_error_exception_handler(
     request: Request, exc: DatabaseConnectionError
 ):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 
+async def service_not_ready_exception_handler(request: Request, exc: ServiceNotReady):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def service_overloaded_exception_handler(
+    request: Request, exc: ServiceOverloaded
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+async def request_deadline_exceeded_exception_handler(
+    request: Request, exc: RequestDeadlineExceeded
+):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code, content={"detail": exc.detail or "HTTP Error"}
@@ -82,8 +151,31 @@ def register_exception_handlers(app: FastAPI):
     app.add_exception_handler(
         ProductAccessForbidden, product_access_forbidden_exception_handler
     )
+    app.add_exception_handler(
+        ProductSortUnsupported, product_sort_unsupported_exception_handler
+    )
+    app.add_exception_handler(
+        ImportFormatUnsupported, import_format_unsupported_exception_handler
+    )
+    app.add_exception_handler(JobNotFound, job_not_found_exception_handler)
+    app.add_exception_handler(JobTypeUnknown, job_type_unknown_exception_handler)
+    app.add_exception_handler(
+        IdempotencyKeyReused, idempotency_key_reused_exception_handler
+    )
+    app.add_exception_handler(
+        IdempotencyKeyInProgress, idempotency_key_in_progress_exception_handler
+    )
+    app.add_exception_handler(
+        OptionalDependencyMissing, optional_dependency_missing_exception_handler
+    )
+    app.add_exception_handler(AdminRequired, admin_required_exception_handler)
     app.add_exception_handler(
         DatabaseConnectionError, database_connection_error_exception_handler
     )
+    app.add_exception_handler(ServiceNotReady, service_not_ready_exception_handler)
+    app.add_exception_handler(ServiceOverloaded, service_overloaded_exception_handler)
+    app.add_exception_handler(
+        RequestDeadlineExceeded, request_deadline_exceeded_exception_handler
+    )
     app.add_exception_handler(HTTPException, http_exception_handler)
     app.add_exception_handler(Exception, exception_handler)
@@ -59,6 +59,79 @@ class ProductAccessForbidden(HTTPException):
         super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
 
 
+class ProductSortUnsupported(HTTPException):
+    def __init__(
+        self,
+        detail: str = "Sorting cannot be combined with text search or archived products",
+    ):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class ImportFormatUnsupported(HTTPException):
+    def __init__(
+        self, detail: str = "Import body must be text/csv or application/x-ndjson"
+    ):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=detail
+        )
+
+
+class JobNotFound(HTTPException):
+    def __init__(self, detail: str = "Job not found"):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+class JobOutputUnavailable(HTTPException):
+    def __init__(self, detail: str = "Job has no downloadable output"):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class JobTypeUnknown(HTTPException):
+    def __init__(self, detail: str = "Unknown job type"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class IdempotencyKeyReused(HTTPException):
+    def __init__(
+        self, detail: str = "Idempotency-Key already used with a different payload"
+    ):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail
+        )
+
+
+class IdempotencyKeyInProgress(HTTPException):
+    def __init__(
+        self, detail: str = "A request with this Idempotency-Key is in progress"
+    ):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class AdminRequired(HTTPException):
+    def __init__(self, detail: str = "Admin privileges required"):
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+class OptionalDependencyMissing(HTTPException):
+    def __init__(self, detail: str = "Optional dependency not installed"):
+        super().__init__(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=detail)
+
+
 class DatabaseConnectionError(HTTPException):
     def __init__(self, detail: str = "Database connection failed"):
         super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class ServiceNotReady(HTTPException):
+    def __init__(self, detail: str = "Service not ready"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class ServiceOverloaded(HTTPException):
+    def __init__(self, detail: str = "Too many concurrent requests"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class RequestDeadlineExceeded(HTTPException):
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
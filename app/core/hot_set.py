@@ -0,0 +1,40 @@
+from collections import Counter
+from threading import Lock
+
+
+class HotSet:
+    """
+    Usuarios más activos del proceso, para precalentar el siguiente arranque.
+
+    Cuenta las peticiones autenticadas por usuario. Cuando se superan
+    max_entries claves se conservan solo las más frecuentes, así que la
+    memoria está acotada aunque haya muchos usuarios esporádicos.
+
+    Attributes:
+        max_entries: Número máximo de usuarios contados a la vez
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._counts: Counter[str] = Counter()
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+            if len(self._counts) > self.max_entries:
+                self._counts = Counter(
+                    dict(self._counts.most_common(self.max_entries // 2))
+                )
+
+    def top(self, count: int) -> list[str]:
+        """Las count claves más frecuentes, de más a menos."""
+        with self._lock:
+            return [key for key, _ in self._counts.most_common(count)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+hot_users = HotSet()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _call_site(stack: traceback.StackSummary) -> str:
+    """Frame más interno del código de la aplicación (o el más interno)."""
+    app_frames = [f for f in stack if f.filename.startswith(APP_ROOT)]
+    frame = app_frames[-1] if app_frames else stack[-1]
+    filename = os.path.relpath(frame.filename, os.path.dirname(APP_ROOT))
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopLagMonitor:
+    """
+    Mide el retraso del event loop y captura qué lo está bloqueando.
+
+    Una tarea duerme interval_ms y mide cuánto tarda de más en despertar
+    (histograma event_loop_lag_ms). Un hilo vigía comprueba si la tarea se
+    ha retrasado más de threshold_ms y, en ese caso, captura la pila del
+    hilo del loop mientras sigue bloqueado y la agrupa por punto de llamada.
+
+    Attributes:
+        interval_ms: Periodo de medición
+        threshold_ms: Retraso a partir del cual se captura la pila
+        max_sites: Puntos de llamada distintos que se conservan
+    """
+
+    def __init__(
+        self, interval_ms: float = 100, threshold_ms: float = 100, max_sites: int = 100
+    ):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.max_sites = max_sites
+        self._sites: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread: Optional[int] = None
+        self._expected_wake = 0.0
+        self._tick = 0
+        self._captured: Optional[tuple[int, str]] = None
+
+    def start(self) -> None:
+        """Arranca la medición en el loop actual y el hilo vigía."""
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._expected_wake = time.monotonic() + self.interval
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        histogram = metrics.histogram("event_loop_lag_ms", LAG_BUCKETS)
+        while True:
+            self._tick += 1
+            start = time.monotonic()
+            self._expected_wake = start + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(time.monotonic() - start - self.interval, 0.0) * 1000
+            histogram.observe(lag_ms)
+            if lag_ms >= self.threshold * 1000:
+                metrics.increment("event_loop_blocked")
+                self._record_lag(lag_ms)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            tick = self._tick
+            overdue = time.monotonic() - self._expected_wake
+            if overdue < self.threshold:
+                continue
+            if self._captured and self._captured[0] == tick:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            site = _call_site(stack)
+            with self._lock:
+                entry = self._sites.get(site)
+                if entry is None:
+                    if len(self._sites) >= self.max_sites:
+                        continue
+                    entry = self._sites[site] = {
+                        "count": 0,
+                        "max_lag_ms": 0.0,
+                        "stack": traceback.format_list(stack[-15:]),
+                    }
+                entry["count"] += 1
+            self._captured = (tick, site)
+            logger.warning(
+                "Event loop blocked for more than %.0f ms at %s", overdue * 1000, site
+            )
+
+    def _record_lag(self, lag_ms: float) -> None:
+        captured = self._captured
+        if not captured or captured[0] != self._tick:
+            return
+        with self._lock:
+            entry = self._sites.get(captured[1])
+            if entry is not None:
+                entry["max_lag_ms"] = round(max(entry["max_lag_ms"], lag_ms), 3)
+
+    def snapshot(self) -> dict:
+        """Puntos de llamada que bloquearon el loop, ordenados por frecuencia."""
+        with self._lock:
+            sites = [{"site": site, **entry} for site, entry in self._sites.items()]
+        sites.sort(key=lambda entry: entry["count"], reverse=True)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": metrics.histogram("event_loop_lag_ms", LAG_BUCKETS).snapshot(),
+            "blocking_sites": sites,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+
+
+@contextmanager
+def track_blocking_callbacks(threshold_ms: float) -> Iterator[list[dict]]:
+    """
+    Registra los callbacks del event loop que tardan más de threshold_ms.
+
+    Envuelve asyncio.Handle._run, por donde pasa cada paso de cada tarea,
+    así que funciona con cualquier loop creado dentro del bloque. Pensado
+    para el modo estricto de los tests; en producción usar LoopLagMonitor.
+
+    Yields:
+        Lista (que se va llenando) con {"callback", "duration_ms"}
+    """
+    original = asyncio.events.Handle._run
+    threshold = threshold_ms / 1000
+    offenders: list[dict] = []
+
+    def describe(handle) -> str:
+        task = getattr(handle._callback, "__self__", None)
+        if isinstance(task, asyncio.Task):
+            coro = task.get_coro()
+            code = getattr(coro, "cr_code", None)
+            if code is not None:
+                return f"{coro.__qualname__} ({code.co_filename}:{code.co_firstlineno})"
+        return repr(handle)
+
+    def timed_run(handle):
+        start = time.perf_counter()
+        try:
+            return original(handle)
+        finally:
+            duration = time.perf_counter() - start
+            if duration > threshold:
+                offenders.append(
+                    {
+                        "callback": describe(handle),
+                        "duration_ms": round(duration * 1000, 1),
+                    }
+                )
+
+    asyncio.events.Handle._run = timed_run
+    try:
+        yield offenders
+    finally:
+        asyncio.events.Handle._run = original
+
+
+loop_monitor = LoopLagMonitor(
+    interval_ms=settings.LOOP_MONITOR_INTERVAL_MS,
+    threshold_ms=settings.LOOP_MONITOR_THRESHOLD_MS,
+)
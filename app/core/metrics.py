@@ -0,0 +1,89 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Optional
+
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """
+    Histograma acumulativo en memoria con cubetas fijas.
+
+    Attributes:
+        name: Nombre de la métrica
+        buckets: Límites superiores de cada cubeta (ordenados)
+    """
+
+    def __init__(self, name: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        """Registra una observación."""
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        """Devuelve el estado actual del histograma como diccionario."""
+        with self._lock:
+            labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "avg": self._sum / self._count if self._count else 0.0,
+                "max": self._max,
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso, expuesto en GET /metrics."""
+
+    def __init__(self):
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[str, int] = {}
+        self._lock = Lock()
+
+    def histogram(self, name: str, buckets: Optional[tuple] = None) -> Histogram:
+        """Obtiene (o crea) un histograma por nombre."""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, buckets or DEFAULT_BUCKETS)
+            return self._histograms[name]
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Incrementa un contador por nombre."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            "counters": counters,
+            "histograms": {name: h.snapshot() for name, h in histograms.items()},
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+metrics = MetricsRegistry()
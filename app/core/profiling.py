@@ -0,0 +1,253 @@
+import json
+import logging
+import random
+from collections import deque
+from threading import Lock
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import OptionalDependencyMissing
+from app.dependencies.auth import is_admin
+from app.utils.tokens import TokenError, get_token_service
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+# Categorías de tiempo; cada muestra se atribuye a la más interna de su pila
+CATEGORIES = (
+    ("database", ("/beanie/", "/motor/", "/pymongo/", "/bson/")),
+    ("validation", ("/pydantic/", "/pydantic_core/")),
+    ("json", ("/json/", "/fastapi/encoders.py", "/orjson/")),
+    ("jwt", ("/jose/", "/jwt/", "/joserfc/")),
+    ("password_hashing", ("/argon2/", "/passlib/")),
+)
+
+
+def require_pyinstrument():
+    """Importa pyinstrument bajo demanda; es una dependencia opcional."""
+    try:
+        import pyinstrument
+    except ImportError:
+        raise OptionalDependencyMissing("pyinstrument is required for profiling")
+    return pyinstrument
+
+
+def _frame_category(frame_info: str) -> Optional[str]:
+    for category, patterns in CATEGORIES:
+        if any(pattern in frame_info for pattern in patterns):
+            return category
+    return None
+
+
+def category_breakdown(session) -> dict:
+    """
+    Reparte el tiempo muestreado de una sesión entre categorías.
+
+    Cada muestra se asigna a la categoría del frame más interno reconocido
+    (p. ej. la validación Pydantic dentro de Beanie cuenta como validation);
+    el resto queda en other.
+
+    Args:
+        session: Sesión de pyinstrument
+
+    Returns:
+        Milisegundos por categoría, incluido total
+    """
+    totals = {category: 0.0 for category, _ in CATEGORIES}
+    totals["other"] = 0.0
+    for call_stack, time in session.frame_records:
+        category = None
+        for frame_info in reversed(call_stack):
+            category = _frame_category(frame_info)
+            if category:
+                break
+        totals[category or "other"] += time
+    breakdown = {name: round(seconds * 1000, 3) for name, seconds in totals.items()}
+    breakdown["total"] = round(sum(totals.values()) * 1000, 3)
+    return breakdown
+
+
+def server_timing(breakdown: dict) -> str:
+    """Formatea el desglose como cabecera Server-Timing."""
+    return ", ".join(
+        f"{name};dur={duration}" for name, duration in breakdown.items() if duration
+    )
+
+
+def render_session(session, fmt: str) -> tuple[bytes, str]:
+    """
+    Renderiza una sesión como speedscope JSON o como HTML de pyinstrument.
+
+    Returns:
+        Tupla (cuerpo, media type)
+    """
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+    if fmt == "html":
+        return HTMLRenderer().render(session).encode(), "text/html; charset=utf-8"
+    return SpeedscopeRenderer().render(session).encode(), "application/json"
+
+
+class ContinuousProfile:
+    """
+    Vista agregada de las peticiones muestreadas.
+
+    Guarda el desglose acumulado por ruta y las últimas sesiones, que se
+    combinan bajo demanda para obtener un perfil agregado del proceso.
+
+    Attributes:
+        max_sessions: Sesiones que se conservan para el perfil combinado
+    """
+
+    def __init__(self, max_sessions: int = 200):
+        self.max_sessions = max_sessions
+        self._sessions: deque = deque(maxlen=max_sessions)
+        self._routes: dict[str, dict] = {}
+        self._lock = Lock()
+
+    def add(self, route: str, session, breakdown: dict) -> None:
+        with self._lock:
+            self._sessions.append(session)
+            entry = self._routes.setdefault(route, {"samples": 0, "breakdown_ms": {}})
+            entry["samples"] += 1
+            totals = entry["breakdown_ms"]
+            for name, duration in breakdown.items():
+                totals[name] = round(totals.get(name, 0.0) + duration, 3)
+
+    def summary(self) -> dict:
+        """Desglose acumulado por ruta."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "routes": json.loads(json.dumps(self._routes)),
+            }
+
+    def combined_session(self):
+        """Combina las sesiones guardadas en una sola, o None si no hay."""
+        from pyinstrument.session import Session
+
+        with self._lock:
+            sessions = list(self._sessions)
+        if not sessions:
+            return None
+        combined = sessions[0]
+        for session in sessions[1:]:
+            combined = Session.combine(combined, session)
+        return combined
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._routes.clear()
+
+
+continuous_profile = ContinuousProfile(max_sessions=settings.PROFILING_MAX_SESSIONS)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_admin_request(scope: Scope) -> bool:
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = get_token_service().decode(token)
+    except TokenError:
+        return False
+    return is_admin(payload.get("sub") or "")
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila peticiones con pyinstrument.
+
+    - Bajo demanda: un administrador envía X-Profile (speedscope o html) y
+      recibe el perfil en lugar de la respuesta, con el desglose por
+      categoría en Server-Timing.
+    - Muestreo: una fracción sample_rate de las peticiones se perfila sin
+      alterar la respuesta y se acumula en continuous_profile.
+
+    Solo se instala si PROFILING_ENABLED está activo, de modo que desactivado
+    no añade coste alguno.
+
+    Attributes:
+        sample_rate: Fracción de peticiones perfiladas de forma continua
+        interval: Intervalo de muestreo en segundos
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, interval_ms=1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        fmt = _header(scope, PROFILE_HEADER)
+        on_demand = fmt is not None and _is_admin_request(scope)
+        sampled = (
+            not on_demand and self.sample_rate and random.random() < self.sample_rate
+        )
+        if not (on_demand or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        status_code = 500
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, capture if on_demand else send)
+        finally:
+            session = profiler.stop()
+
+        route = scope.get("route")
+        key = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+        breakdown = category_breakdown(session)
+        continuous_profile.add(key, session, breakdown)
+        if not on_demand:
+            return
+
+        body, media_type = render_session(session, fmt)
+        headers = [
+            (b"content-type", media_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+            (b"server-timing", server_timing(breakdown).encode()),
+            (b"x-profiled-status", str(status_code).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def install_profiling(app) -> None:
+    """Añade ProfilingMiddleware si el profiling está habilitado y disponible."""
+    if not settings.PROFILING_ENABLED:
+        return
+    try:
+        require_pyinstrument()
+    except OptionalDependencyMissing:
+        logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed")
+        return
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+    )
@@ -0,0 +1,340 @@
+import functools
+import inspect
+import json
+import logging
+from collections import OrderedDict
+from contextlib import nullcontext
+from threading import Lock
+from typing import Optional
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.slow_queries import command_shape
+
+logger = logging.getLogger(__name__)
+
+# Comandos internos del driver que no merecen un span
+IGNORED_COMMANDS = {
+    "hello",
+    "ismaster",
+    "isMaster",
+    "saslStart",
+    "saslContinue",
+    "endSessions",
+}
+
+# Las excepciones (p. ej. un 404) se registran como eventos, pero el estado de
+# error lo decide el span SERVER según el código de respuesta
+SPAN_OPTIONS = {"record_exception": True, "set_status_on_exception": False}
+
+_tracer = None
+_provider = None
+
+
+def get_tracer():
+    """Tracer activo, o None si el tracing está desactivado."""
+    return _tracer
+
+
+def trace_span(name: str, **attributes):
+    """
+    Abre un span hijo del actual; sin tracing es un nullcontext.
+
+    Args:
+        name: Nombre del span
+        attributes: Atributos del span
+    """
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(
+        name, attributes=attributes or None, **SPAN_OPTIONS
+    )
+
+
+def traced(name: str):
+    """
+    Decorador que envuelve una función (síncrona o asíncrona) en un span.
+
+    Conserva la firma, por lo que puede aplicarse a dependencias de FastAPI.
+    Sin tracing solo añade la comprobación de _tracer.
+    """
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with _tracer.start_as_current_span(name, **SPAN_OPTIONS):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.start_as_current_span(name, **SPAN_OPTIONS):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que crea el span SERVER de cada petición.
+
+    Extrae el contexto W3C (traceparent/tracestate) de las cabeceras, de modo
+    que la petición continúa la traza del cliente, y nombra el span con la
+    plantilla de la ruta una vez resuelta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry.propagate import extract
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        method = scope["method"]
+        with _tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Listener de comandos de PyMongo que crea un span CLIENT por comando.
+
+    Motor copia el contexto al hilo del driver, así que cada comando queda
+    como hijo del span de la dependencia o del handler que lo lanzó. El
+    filtro se registra redactado en db.query.text.
+    """
+
+    def __init__(self):
+        self._spans: dict[tuple, object] = {}
+        self._lock = Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if _tracer is None or event.command_name in IGNORED_COMMANDS:
+            return
+        from opentelemetry.trace import SpanKind
+
+        collection = event.command.get(event.command_name)
+        attributes = {
+            "db.system.name": "mongodb",
+            "db.namespace": event.database_name,
+            "db.operation.name": event.command_name,
+        }
+        if isinstance(collection, str):
+            attributes["db.collection.name"] = collection
+        shape = command_shape(event.command_name, event.command)
+        if shape:
+            attributes["db.query.text"] = json.dumps(shape, default=str)
+        span = _tracer.start_span(
+            f"mongodb.{event.command_name}", kind=SpanKind.CLIENT, attributes=attributes
+        )
+        with self._lock:
+            self._spans[(event.request_id, event.connection_id)] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        with self._lock:
+            span = self._spans.pop((event.request_id, event.connection_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self._lock:
+            span = self._spans.pop((event.request_id, event.connection_id), None)
+        if span is None:
+            return
+        from opentelemetry.trace import Status, StatusCode
+
+        span.set_status(Status(StatusCode.ERROR, str(event.failure.get("errmsg", ""))))
+        span.end()
+
+
+mongo_tracing_listener = MongoTracingListener()
+
+
+def _tail_sampling_processor_class():
+    from opentelemetry.sdk.trace import SpanProcessor
+    from opentelemetry.trace import StatusCode
+
+    class TailSamplingProcessor(SpanProcessor):
+        """
+        Procesador que decide qué trazas exportar cuando termina su raíz local.
+
+        Los spans se retienen por traza hasta que acaba el span raíz; la traza
+        se exporta si tuvo errores, si superó latency_ms o, en otro caso, con
+        probabilidad ratio (determinista por trace_id).
+        """
+
+        def __init__(
+            self, downstream, latency_ms: float, ratio: float, max_traces: int = 10000
+        ):
+            self.downstream = downstream
+            self.latency_ns = latency_ms * 1_000_000
+            self.ratio_bound = int(ratio * (1 << 64))
+            self.max_traces = max_traces
+            self._traces: OrderedDict[int, list] = OrderedDict()
+            self._decisions: OrderedDict[int, bool] = OrderedDict()
+            self._lock = Lock()
+
+        def on_start(self, span, parent_context=None) -> None:
+            self.downstream.on_start(span, parent_context=parent_context)
+
+        def on_end(self, span) -> None:
+            trace_id = span.context.trace_id
+            is_root = span.parent is None or span.parent.is_remote
+            with self._lock:
+                decision = self._decisions.get(trace_id)
+                if decision is None and not is_root:
+                    if trace_id not in self._traces:
+                        if len(self._traces) >= self.max_traces:
+                            self._traces.popitem(last=False)
+                        self._traces[trace_id] = []
+                    self._traces[trace_id].append(span)
+                    return
+                spans = self._traces.pop(trace_id, [])
+                if decision is None:
+                    spans.append(span)
+                    decision = self._keep(trace_id, [span, *spans])
+                    self._decisions[trace_id] = decision
+                    if len(self._decisions) > self.max_traces:
+                        self._decisions.popitem(last=False)
+                else:
+                    spans.append(span)
+            if decision:
+                for ended in spans:
+                    self.downstream.on_end(ended)
+
+        def _keep(self, trace_id: int, spans: list) -> bool:
+            root = spans[0]
+            if any(s.status.status_code == StatusCode.ERROR for s in spans):
+                return True
+            if root.end_time - root.start_time >= self.latency_ns:
+                return True
+            return (trace_id & 0xFFFFFFFFFFFFFFFF) < self.ratio_bound
+
+        def shutdown(self) -> None:
+            self.downstream.shutdown()
+
+        def force_flush(self, timeout_millis: int = 30000) -> bool:
+            return self.downstream.force_flush(timeout_millis)
+
+    return TailSamplingProcessor
+
+
+def configure_tracing(
+    exporter,
+    sample_ratio: float = 1.0,
+    tail_latency_ms: Optional[float] = None,
+    processor=None,
+):
+    """
+    Crea el TracerProvider y activa el tracing del proceso.
+
+    Sin tail_latency_ms el muestreo es de cabecera: ParentBased con
+    TraceIdRatioBased(sample_ratio), respetando la decisión del llamante.
+    Con tail_latency_ms se registran todas las trazas y la decisión se toma
+    al terminar (errores, lentas o sample_ratio del resto).
+
+    Args:
+        exporter: Exportador de spans (p. ej. OTLPSpanExporter)
+        sample_ratio: Fracción de trazas muestreadas
+        tail_latency_ms: Umbral de latencia del muestreo de cola (opcional)
+        processor: Procesador de exportación; por defecto BatchSpanProcessor,
+            que exporta en un hilo aparte sin añadir latencia a la petición
+
+    Returns:
+        TracerProvider configurado
+    """
+    global _tracer, _provider
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import (
+        ALWAYS_ON,
+        ParentBased,
+        TraceIdRatioBased,
+    )
+
+    export_processor = processor or BatchSpanProcessor(exporter)
+    if tail_latency_ms is not None:
+        sampler = ParentBased(ALWAYS_ON)
+        export_processor = _tail_sampling_processor_class()(
+            export_processor, tail_latency_ms, sample_ratio
+        )
+    else:
+        sampler = ParentBased(TraceIdRatioBased(sample_ratio))
+
+    provider = TracerProvider(
+        sampler=sampler,
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+    )
+    provider.add_span_processor(export_processor)
+    _provider = provider
+    _tracer = provider.get_tracer("app")
+    return provider
+
+
+def shutdown_tracing() -> None:
+    """Exporta los spans pendientes y desactiva el tracing."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+
+
+def install_tracing(app) -> None:
+    """Configura el exportador OTLP y el middleware si TRACING_ENABLED está activo."""
+    if not settings.TRACING_ENABLED:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but OpenTelemetry is not installed")
+        return
+    provider = configure_tracing(
+        OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT),
+        sample_ratio=settings.TRACING_SAMPLE_RATIO,
+        tail_latency_ms=settings.TRACING_TAIL_LATENCY_MS,
+    )
+    trace.set_tracer_provider(provider)
+    app.add_middleware(TracingMiddleware)
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+from beanie import Document
+
+from app.core.metrics import metrics
+from app.db.resilience import max_time_ms
+
+
+class BatchLoader:
+    """
+    Agrupa lecturas concurrentes por _id de un modelo en un único find con $in.
+
+    Las llamadas a load() hechas en la misma iteración del event loop (por
+    ejemplo, varias peticiones GET /products/{id} de la misma página) se
+    resuelven con una sola consulta al primario. No hay caché: cada lote se
+    lee en el momento, así que los datos nunca están más obsoletos que con
+    Document.get. Cada llamador recibe su propia instancia del documento.
+    El maxTimeMS del lote es el del plazo más próximo entre sus llamadores.
+
+    Attributes:
+        document_model: Clase del documento Beanie a leer
+        max_batch: Número máximo de ids por consulta
+    """
+
+    def __init__(self, document_model: type[Document], max_batch: int = 100):
+        self.document_model = document_model
+        self.max_batch = max_batch
+        self._pending: dict[Any, list[asyncio.Future]] = {}
+        self._expires_at: Optional[float] = None
+        self._scheduled = False
+        self._loads: set[asyncio.Task] = set()
+        self._batch_size = metrics.histogram(
+            "batch_loader_batch_size", (1, 2, 5, 10, 25, 50, 100, 250)
+        )
+
+    async def load(self, document_id: Any) -> Optional[Document]:
+        """
+        Encola un id y espera a que su lote se lea.
+
+        Args:
+            document_id: _id del documento
+
+        Returns:
+            El documento, o None si no existe
+
+        Raises:
+            RequestDeadlineExceeded: Si el plazo de la petición ya ha vencido
+        """
+        expires_at = time.monotonic() + max_time_ms("reads") / 1000
+        if self._expires_at is None or expires_at < self._expires_at:
+            self._expires_at = expires_at
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(document_id, []).append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+
+        doc = await future
+        if doc is None:
+            return None
+        return self.document_model.model_validate(doc)
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        expires_at, self._expires_at = self._expires_at, None
+        # La consulta es compartida: se ejecuta en su propia tarea para que la
+        # cancelación de un llamador no afecte al resto del lote
+        task = asyncio.create_task(self._load(batch, expires_at))
+        self._loads.add(task)
+        task.add_done_callback(self._loads.discard)
+
+    async def _load(
+        self, batch: dict[Any, list[asyncio.Future]], expires_at: float
+    ) -> None:
+        self._batch_size.observe(len(batch))
+        metrics.increment("batch_loader_waiters", sum(map(len, batch.values())))
+        collection = self.document_model.get_pymongo_collection()
+        try:
+            cursor = collection.find(
+                {"_id": {"$in": list(batch)}},
+                max_time_ms=max(1, int((expires_at - time.monotonic()) * 1000)),
+            )
+            docs = {doc["_id"]: doc async for doc in cursor}
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+
+        for document_id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(docs.get(document_id))
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional
+
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Contadores del pool de conexiones de PyMongo.
+
+    Lleva las conexiones prestadas en cada momento y los fallos al pedir una
+    conexión o los vaciados del pool desde la última lectura.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checked_out = 0
+        self._checkout_failures = 0
+        self._pool_cleared = 0
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self._checkout_failures += 1
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self._pool_cleared += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def drain(self) -> dict:
+        """Devuelve los contadores y reinicia los de fallos."""
+        with self._lock:
+            stats = {
+                "checked_out": self.checked_out,
+                "checkout_failures": self._checkout_failures,
+                "pool_cleared": self._pool_cleared,
+            }
+            self._checkout_failures = 0
+            self._pool_cleared = 0
+        return stats
+
+
+pool_stats = PoolStatsListener()
+
+
+class ReadinessChecker:
+    """
+    Comprueba la conexión con MongoDB en segundo plano.
+
+    Cada interval_seconds hace un ping (con timeout) y revisa la topología y
+    el pool; /readyz solo lee el último resultado, así que una sonda no
+    genera tráfico hacia la base de datos. Si el último resultado es más
+    antiguo que stale_after_seconds se considera no listo.
+
+    Attributes:
+        interval_seconds: Periodo entre comprobaciones
+        timeout_seconds: Tiempo máximo del ping
+        stale_after_seconds: Antigüedad máxima del último resultado válido
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 5,
+        timeout_seconds: float = 2,
+        stale_after_seconds: float = 15,
+    ):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+        self._state: Optional[dict] = None
+        self._checked_at = 0.0
+
+    def start(self, client) -> None:
+        """Arranca las comprobaciones periódicas con el cliente Motor."""
+        self._client = client
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Readiness check crashed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def check(self) -> dict:
+        """Ejecuta una comprobación y guarda su resultado."""
+        started = time.monotonic()
+        error = None
+        try:
+            await asyncio.wait_for(
+                self._client.admin.command("ping"), self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            error = "Database ping timed out"
+        except Exception as exc:
+            error = f"Database ping failed: {exc.__class__.__name__}"
+        latency_ms = (time.monotonic() - started) * 1000
+
+        topology = self._client.topology_description
+        writable = topology.has_writable_server()
+        if error is None and not writable:
+            error = "No writable server available"
+        pool = pool_stats.drain()
+
+        state = {
+            "ready": error is None,
+            "error": error,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "ping_ms": round(latency_ms, 3),
+            "topology": topology.topology_type_name,
+            "writable_server": writable,
+            "known_servers": len(topology.known_servers),
+            "pool": pool,
+        }
+        if error:
+            logger.warning("Readiness check failed: %s", error)
+        self._state = state
+        self._checked_at = time.monotonic()
+        return state
+
+    def status(self) -> dict:
+        """
+        Último resultado con su antigüedad; no realiza ninguna operación de E/S.
+
+        Returns:
+            Estado con ready a False si aún no hubo comprobación o si el
+            resultado está caducado
+        """
+        if self._state is None:
+            return {"ready": False, "error": "Readiness not checked yet"}
+        age = time.monotonic() - self._checked_at
+        state = {**self._state, "age_seconds": round(age, 3)}
+        if age > self.stale_after_seconds:
+            state["ready"] = False
+            state["error"] = "Readiness check is stale"
+        return state
+
+
+readiness = ReadinessChecker(
+    interval_seconds=settings.READINESS_INTERVAL_SECONDS,
+    timeout_seconds=settings.READINESS_TIMEOUT_SECONDS,
+    stale_after_seconds=settings.READINESS_STALE_AFTER_SECONDS,
+)
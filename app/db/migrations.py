@@ -0,0 +1,561 @@
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Union
+
+from beanie import Document
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STATE_COLLECTION = "migrations"
+LOCK_ID = "lock"
+INDEX_NOT_FOUND = 27
+
+
+@dataclass
+class Migration:
+    """
+    Migración versionada de una colección.
+
+    El paso de datos aplica update a los documentos que cumplen filter, por
+    rangos de _id; después se crean los índices indicados (en MongoDB 4.2+ la
+    construcción no bloquea la colección) y se eliminan los que retira.
+
+    Attributes:
+        version: Número de versión; las migraciones se aplican en orden
+        name: Nombre descriptivo
+        collection: Colección afectada
+        filter: Documentos pendientes de migrar
+        update: Documento de actualización o pipeline; None si solo hay índices
+        indexes: Índices a crear al terminar el paso de datos
+        drop_indexes: Nombres de los índices que la migración retira
+    """
+
+    version: int
+    name: str
+    collection: str
+    filter: dict = field(default_factory=dict)
+    update: Optional[Union[dict, list]] = None
+    indexes: list[IndexModel] = field(default_factory=list)
+    drop_indexes: list[str] = field(default_factory=list)
+
+
+_migrations: dict[int, Migration] = {}
+
+
+def register_migration(migration: Migration) -> Migration:
+    """
+    Registra una migración.
+
+    Raises:
+        ValueError: Si ya hay otra migración con la misma versión
+    """
+    existing = _migrations.get(migration.version)
+    if existing and existing.name != migration.name:
+        raise ValueError(f"Duplicate migration version {migration.version}")
+    _migrations[migration.version] = migration
+    return migration
+
+
+def get_migrations() -> list[Migration]:
+    """Migraciones registradas (las de app.migrations), ordenadas por versión."""
+    importlib.import_module("app.migrations")
+    return [_migrations[version] for version in sorted(_migrations)]
+
+
+def migration_indexes(collection: str) -> list[IndexModel]:
+    """Índices que crean las migraciones registradas sobre una colección."""
+    return [
+        index
+        for migration in get_migrations()
+        if migration.collection == collection
+        for index in migration.indexes
+    ]
+
+
+def retired_indexes(collection: str) -> list[str]:
+    """Índices que retiran las migraciones registradas sobre una colección."""
+    return [
+        name
+        for migration in get_migrations()
+        if migration.collection == collection
+        for name in migration.drop_indexes
+    ]
+
+
+async def drop_index(collection: AsyncIOMotorCollection, name: str) -> bool:
+    """
+    Elimina un índice; si ya no existe (otro proceso lo eliminó) no falla.
+
+    Returns:
+        True si se ha eliminado
+    """
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as exc:
+        if exc.code != INDEX_NOT_FOUND:
+            raise
+        return False
+    return True
+
+
+async def drop_outdated_indexes(
+    db: AsyncIOMotorDatabase,
+    models: list[type[Document]],
+    wait_seconds: Optional[float] = None,
+    poll_seconds: float = 1.0,
+) -> list[str]:
+    """
+    Elimina los índices retirados por las migraciones o por los modelos.
+
+    Sustituye a allow_index_dropping de init_beanie, que borraría cualquier
+    índice no declarado: los de las migraciones y los que se crean a mano.
+    Solo se eliminan los nombres de Migration.drop_indexes y de
+    Settings.retired_indexes de cada modelo (por ejemplo, los del formato de
+    almacenamiento que ya no se usa), nunca uno que el modelo o una
+    migración declaren. Se ejecuta antes de init_beanie para que este pueda
+    crear los que los sustituyen (solo puede haber un índice de texto), y con
+    el bloqueo de migraciones para que las réplicas no lo hagan a la vez.
+
+    Args:
+        db: Base de datos Motor
+        models: Modelos Beanie (aún sin inicializar)
+        wait_seconds: Espera máxima por el bloqueo; por defecto
+            MIGRATION_LOCK_SECONDS. Si no se obtiene no se elimina nada
+        poll_seconds: Espera entre intentos de tomar el bloqueo
+
+    Returns:
+        Nombres de los índices eliminados, como colección.índice
+    """
+    runner = build_runner(db)
+    if wait_seconds is None:
+        wait_seconds = settings.MIGRATION_LOCK_SECONDS
+    if not await runner.wait_for_lock(wait_seconds, poll_seconds):
+        logger.warning("Migration lock busy, skipping retired index cleanup")
+        return []
+    dropped = []
+    try:
+        for model in models:
+            name = model.Settings.name
+            retired = [
+                *getattr(model.Settings, "retired_indexes", []),
+                *retired_indexes(name),
+            ]
+            if not retired:
+                continue
+            declared = {
+                index.document["name"]
+                for index in [
+                    *getattr(model.Settings, "indexes", []),
+                    *migration_indexes(name),
+                ]
+            }
+            collection = db[name]
+            existing = await collection.index_information()
+            for index_name in dict.fromkeys(retired):
+                if index_name in declared or index_name not in existing:
+                    continue
+                if await drop_index(collection, index_name):
+                    dropped.append(f"{name}.{index_name}")
+                    logger.info("Dropped retired index %s.%s", name, index_name)
+    finally:
+        await runner.release_lock()
+    return dropped
+
+
+async def replication_lag(db: AsyncIOMotorDatabase) -> Optional[float]:
+    """
+    Retraso (segundos) del secundario más atrasado respecto al primario.
+
+    Returns:
+        Retraso máximo, o None si no es un replica set o no hay permisos
+    """
+    try:
+        status = await db.client.admin.command("replSetGetStatus")
+    except OperationFailure:
+        return None
+    members = status.get("members", [])
+    primary = next((m for m in members if m.get("state") == 1), None)
+    if primary is None:
+        return None
+    lags = [
+        (primary["optimeDate"] - member["optimeDate"]).total_seconds()
+        for member in members
+        if member.get("state") == 2
+    ]
+    return max(lags, default=0.0)
+
+
+class MigrationThrottle:
+    """
+    Regula el ritmo de una migración para no degradar el servicio.
+
+    Tras cada lote espera una pausa adaptativa: se duplica si el lote tardó
+    más que target_latency_ms y se reduce a la mitad si no. Si el retraso de
+    replicación supera max_lag_seconds, espera hasta que baje.
+
+    Attributes:
+        target_latency_ms: Latencia objetivo de cada lote
+        max_lag_seconds: Retraso de replicación máximo tolerado
+        min_pause_ms: Pausa mínima entre lotes
+        max_pause_ms: Pausa máxima entre lotes
+    """
+
+    def __init__(
+        self,
+        target_latency_ms: float = 200,
+        max_lag_seconds: float = 10,
+        min_pause_ms: float = 10,
+        max_pause_ms: float = 5000,
+        lag_probe: Optional[Callable[[], Awaitable[Optional[float]]]] = None,
+        lag_poll_seconds: float = 1.0,
+    ):
+        self.target_latency_ms = target_latency_ms
+        self.max_lag_seconds = max_lag_seconds
+        self.min_pause_ms = min_pause_ms
+        self.max_pause_ms = max_pause_ms
+        self.lag_probe = lag_probe
+        self.lag_poll_seconds = lag_poll_seconds
+        self.pause_ms = min_pause_ms
+
+    def next_pause(self, latency_ms: float) -> float:
+        """Calcula la pausa tras un lote que tardó latency_ms."""
+        if latency_ms > self.target_latency_ms:
+            self.pause_ms = min(self.max_pause_ms, max(self.pause_ms * 2, 1))
+        else:
+            self.pause_ms = max(self.min_pause_ms, self.pause_ms / 2)
+        return self.pause_ms
+
+    async def wait(self, latency_ms: float) -> None:
+        await asyncio.sleep(self.next_pause(latency_ms) / 1000)
+        if self.lag_probe is None:
+            return
+        while (lag := await self.lag_probe()) is not None and (
+            lag > self.max_lag_seconds
+        ):
+            metrics.increment("migration_lag_waits")
+            logger.info("Replication lag %.1fs, pausing migration", lag)
+            await asyncio.sleep(self.lag_poll_seconds)
+
+
+class MigrationLockLost(RuntimeError):
+    """Otro proceso tomó el bloqueo de migraciones."""
+
+
+class MigrationRunner:
+    """
+    Ejecuta las migraciones pendientes con checkpoints y bloqueo.
+
+    El estado de cada versión (checkpoint de _id, documentos procesados y
+    estado) se guarda en la colección migrations tras cada lote, de modo que
+    una ejecución interrumpida se reanuda donde quedó. Un bloqueo con
+    expiración garantiza que solo un proceso migre a la vez. En modo dry_run
+    no se escribe nada: solo se cuentan los documentos afectados.
+
+    Attributes:
+        db: Base de datos
+        batch_size: Documentos por lote
+        throttle: Regulador de ritmo
+        lock_seconds: Duración del bloqueo; se renueva tras cada lote
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        batch_size: int = 1000,
+        throttle: Optional[MigrationThrottle] = None,
+        lock_seconds: float = 60,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.throttle = throttle or MigrationThrottle()
+        self.lock_seconds = lock_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.state = db[STATE_COLLECTION]
+
+    async def status(self) -> list[dict]:
+        """Estado de cada migración registrada."""
+        states = {
+            doc["_id"]: doc async for doc in self.state.find({"_id": {"$ne": LOCK_ID}})
+        }
+        return [
+            {
+                "version": migration.version,
+                "name": migration.name,
+                "collection": migration.collection,
+                "status": states.get(migration.version, {}).get("status", "pending"),
+                "processed": states.get(migration.version, {}).get("processed", 0),
+            }
+            for migration in get_migrations()
+        ]
+
+    async def run(
+        self,
+        target: Optional[int] = None,
+        dry_run: bool = False,
+        on_progress: Optional[Callable[[Migration, int, int], Awaitable[None]]] = None,
+    ) -> list[dict]:
+        """
+        Aplica las migraciones pendientes hasta la versión target (incluida).
+
+        De las ya completadas solo se vuelven a crear los índices que falten.
+
+        Args:
+            target: Última versión a aplicar; None para todas
+            dry_run: Solo contar documentos e índices afectados
+            on_progress: Corrutina que recibe la migración, los documentos
+                procesados tras cada lote y el total estimado al empezar
+
+        Returns:
+            Resultado de cada migración aplicada (o simulada)
+
+        Raises:
+            MigrationLockLost: Si otro proceso toma el bloqueo durante la ejecución
+        """
+        if not dry_run and not await self._acquire_lock():
+            logger.info("Migrations already running in another process")
+            return []
+        try:
+            results = []
+            for migration in get_migrations():
+                if target is not None and migration.version > target:
+                    break
+                state = await self.state.find_one({"_id": migration.version}) or {}
+                if state.get("status") == "completed":
+                    if not dry_run:
+                        await self._restore_indexes(migration)
+                    continue
+                results.append(
+                    await self._run_migration(migration, state, dry_run, on_progress)
+                )
+            return results
+        finally:
+            if not dry_run:
+                await self.release_lock()
+
+    async def _run_migration(
+        self,
+        migration: Migration,
+        state: dict,
+        dry_run: bool,
+        on_progress: Optional[Callable[[Migration, int, int], Awaitable[None]]],
+    ) -> dict:
+        collection = self.db[migration.collection]
+        checkpoint = state.get("checkpoint")
+        processed = state.get("processed", 0)
+        modified = state.get("modified", 0)
+        logger.info("Running migration %d %s", migration.version, migration.name)
+        if not dry_run:
+            await self._save(migration, status="running", error=None)
+
+        try:
+            total = processed
+            if on_progress and migration.update is not None:
+                pending = dict(migration.filter)
+                if checkpoint is not None:
+                    pending["_id"] = {"$gt": checkpoint}
+                total += await collection.count_documents(pending)
+            while migration.update is not None:
+                query = dict(migration.filter)
+                if checkpoint is not None:
+                    query["_id"] = {"$gt": checkpoint}
+                cursor = collection.find(query, {"_id": 1}).sort("_id", 1)
+                ids = [doc["_id"] async for doc in cursor.limit(self.batch_size)]
+                if not ids:
+                    break
+
+                started = time.perf_counter()
+                if not dry_run:
+                    result = await collection.update_many(
+                        {**migration.filter, "_id": {"$gte": ids[0], "$lte": ids[-1]}},
+                        migration.update,
+                    )
+                    modified += result.modified_count
+                latency_ms = (time.perf_counter() - started) * 1000
+                checkpoint = ids[-1]
+                processed += len(ids)
+                if not dry_run:
+                    await self._save(
+                        migration,
+                        checkpoint=checkpoint,
+                        processed=processed,
+                        modified=modified,
+                    )
+                    await self._renew_lock()
+                if on_progress:
+                    await on_progress(migration, processed, max(total, processed))
+                await self.throttle.wait(latency_ms)
+
+            index_names = [index.document["name"] for index in migration.indexes]
+            if migration.indexes and not dry_run:
+                await collection.create_indexes(migration.indexes)
+            if not dry_run:
+                for name in migration.drop_indexes:
+                    await drop_index(collection, name)
+        except Exception as exc:
+            if not dry_run:
+                await self._save(migration, status="failed", error=str(exc))
+            raise
+
+        if not dry_run:
+            await self._save(
+                migration,
+                status="completed",
+                finished_at=datetime.now(timezone.utc),
+            )
+        return {
+            "version": migration.version,
+            "name": migration.name,
+            "dry_run": dry_run,
+            "processed": processed,
+            "modified": modified,
+            "indexes": index_names,
+            "dropped_indexes": migration.drop_indexes,
+        }
+
+    async def _restore_indexes(self, migration: Migration) -> None:
+        """Vuelve a crear los índices de una migración completada que falten."""
+        if not migration.indexes:
+            return
+        collection = self.db[migration.collection]
+        existing = await collection.index_information()
+        missing = [
+            index
+            for index in migration.indexes
+            if index.document["name"] not in existing
+        ]
+        if missing:
+            logger.info(
+                "Restoring indexes of migration %d %s",
+                migration.version,
+                migration.name,
+            )
+            await collection.create_indexes(missing)
+
+    async def _save(self, migration: Migration, **fields) -> None:
+        await self.state.update_one(
+            {"_id": migration.version},
+            {
+                "$set": {
+                    "name": migration.name,
+                    "updated_at": datetime.now(timezone.utc),
+                    **fields,
+                }
+            },
+            upsert=True,
+        )
+
+    async def wait_for_lock(self, timeout: float, poll_seconds: float = 1.0) -> bool:
+        """
+        Toma el bloqueo de migraciones, esperando a que otro proceso lo suelte.
+
+        Returns:
+            False si no se obtiene en timeout segundos
+        """
+        deadline = time.monotonic() + timeout
+        while not await self._acquire_lock():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_seconds)
+        return True
+
+    async def release_lock(self) -> None:
+        """Suelta el bloqueo si lo tiene este proceso."""
+        await self.state.delete_one({"_id": LOCK_ID, "owner": self.owner})
+
+    async def _acquire_lock(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.state.find_one_and_update(
+                {
+                    "_id": LOCK_ID,
+                    "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}],
+                },
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "expires_at": now + timedelta(seconds=self.lock_seconds),
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _renew_lock(self) -> None:
+        if not await self._acquire_lock():
+            raise MigrationLockLost("Migration lock taken by another process")
+
+
+def build_runner(db: AsyncIOMotorDatabase) -> MigrationRunner:
+    """Crea un MigrationRunner con la configuración de MIGRATION_*."""
+    return MigrationRunner(
+        db,
+        batch_size=settings.MIGRATION_BATCH_SIZE,
+        throttle=MigrationThrottle(
+            target_latency_ms=settings.MIGRATION_TARGET_LATENCY_MS,
+            max_lag_seconds=settings.MIGRATION_MAX_REPLICATION_LAG_SECONDS,
+            min_pause_ms=settings.MIGRATION_MIN_PAUSE_MS,
+            max_pause_ms=settings.MIGRATION_MAX_PAUSE_MS,
+            lag_probe=lambda: replication_lag(db),
+        ),
+        lock_seconds=settings.MIGRATION_LOCK_SECONDS,
+    )
+
+
+async def main(argv: Optional[list[str]] = None) -> None:
+    """
+    CLI de migraciones.
+
+    Uso:
+        python -m app.db.migrations status
+        python -m app.db.migrations run [--target N] [--dry-run] [--batch-size N]
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Estado de las migraciones")
+    run = commands.add_parser("run", help="Aplica las migraciones pendientes")
+    run.add_argument("--target", type=int, help="Última versión a aplicar")
+    run.add_argument("--dry-run", action="store_true", help="No escribe nada")
+    run.add_argument("--batch-size", type=int, help="Documentos por lote")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    try:
+        runner = build_runner(client[settings.MONGO_DB])
+        if args.command == "status":
+            output = await runner.status()
+        else:
+            if args.batch_size:
+                runner.batch_size = args.batch_size
+
+            async def progress(
+                migration: Migration, processed: int, total: int
+            ) -> None:
+                logger.info("%s: %d/%d documents", migration.name, processed, total)
+
+            output = await runner.run(args.target, args.dry_run, progress)
+        print(json.dumps(output, indent=2, default=str))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
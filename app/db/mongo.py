@@ -1,11 +1,44 @@
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+from typing import Literal, Optional
+
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorClientSession,
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase,
+)
+from pymongo.read_preferences import Primary, ReadPreference, SecondaryPreferred
 
 from app.core.config import settings
+from app.core.tracing import mongo_tracing_listener
+from app.db.health import pool_stats
+from app.db.slow_queries import slow_query_listener
+
+ReadPolicy = Literal["primary", "secondary_preferred"]
 
 
 async def connect_to_mongo() -> tuple[AsyncIOMotorClient, AsyncIOMotorDatabase]:
-    """Establece conexión con MongoDB usando Motor (driver asíncrono)."""
-    client = AsyncIOMotorClient(settings.MONGO_URI)
+    """
+    Establece conexión con MongoDB usando Motor (driver asíncrono).
+
+    Por defecto todas las operaciones van al primario; las rutas que toleran
+    lecturas ligeramente desactualizadas eligen su política con get_collection.
+    Si SLOW_QUERY_THRESHOLD_MS está definido se adjunta el listener de
+    consultas lentas, y con TRACING_ENABLED el que crea un span por comando.
+    """
+    listeners = [pool_stats]
+    if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+        listeners.append(slow_query_listener)
+    if settings.TRACING_ENABLED:
+        listeners.append(mongo_tracing_listener)
+    client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        read_preference=Primary(),
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        event_listeners=listeners,
+    )
+    if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+        slow_query_listener.attach(client, asyncio.get_running_loop())
     db = client[settings.MONGO_DB]
     return client, db
 
@@ -14,3 +47,74 @@ async def close_mongo_connection(client: AsyncIOMotorClient) -> None:
     """Cierra la conexión con MongoDB de forma segura."""
     if client:
         client.close()
+
+
+def get_read_preference(policy: ReadPolicy) -> ReadPreference:
+    """
+    Traduce una política de lectura de ruta a una preferencia de lectura de PyMongo.
+
+    Args:
+        policy: "primary" para lecturas previas a escrituras,
+            "secondary_preferred" para listados, búsquedas y agregaciones
+
+    Returns:
+        Preferencia de lectura; las lecturas en secundarios quedan acotadas
+        por MONGO_READ_MAX_STALENESS_SECONDS
+    """
+    if policy == "secondary_preferred":
+        return SecondaryPreferred(
+            max_staleness=settings.MONGO_READ_MAX_STALENESS_SECONDS
+        )
+    return Primary()
+
+
+def get_collection(document, policy: ReadPolicy = "primary") -> AsyncIOMotorCollection:
+    """
+    Obtiene la colección de un modelo Beanie con la política de lectura indicada.
+
+    Args:
+        document: Clase del documento Beanie (ya inicializada)
+        policy: Política de lectura de la ruta
+
+    Returns:
+        Colección Motor configurada con la preferencia de lectura
+    """
+    return document.get_pymongo_collection().with_options(
+        read_preference=get_read_preference(policy)
+    )
+
+
+class CausalTokenStore:
+    """
+    Guarda el último clusterTime/operationTime observado por cada usuario.
+
+    Tras una escritura se registran los tiempos de la sesión; la siguiente
+    sesión del mismo usuario avanza hasta ellos para que cualquier lectura,
+    aunque vaya a un secundario, vea sus propias escrituras.
+    """
+
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._tokens: dict[str, tuple[Optional[dict], Optional[object]]] = {}
+
+    def record(self, user_id: str, session: AsyncIOMotorClientSession) -> None:
+        """Registra los tiempos causales de la sesión del usuario."""
+        if session.cluster_time is None and session.operation_time is None:
+            return
+        if user_id not in self._tokens and len(self._tokens) >= self.max_users:
+            self._tokens.pop(next(iter(self._tokens)))
+        self._tokens[user_id] = (session.cluster_time, session.operation_time)
+
+    def advance(self, user_id: str, session: AsyncIOMotorClientSession) -> None:
+        """Avanza una sesión nueva hasta los tiempos registrados del usuario."""
+        cluster_time, operation_time = self._tokens.get(user_id, (None, None))
+        if cluster_time is not None:
+            session.advance_cluster_time(cluster_time)
+        if operation_time is not None:
+            session.advance_operation_time(operation_time)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+
+causal_tokens = CausalTokenStore()
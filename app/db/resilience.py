@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Literal
+
+from pymongo.errors import ConnectionFailure, NetworkTimeout
+
+from app.core.config import settings
+from app.core.deadlines import remaining_ms
+from app.core.exceptions import DatabaseConnectionError, ServiceOverloaded
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RouteClass = Literal["auth", "reads", "writes", "analytics"]
+
+# Errores que indican que MongoDB no está disponible. Un maxTimeMS agotado
+# (ExecutionTimeout) es una consulta lenta y no abre el circuito
+UNAVAILABLE_ERRORS = (ConnectionFailure, NetworkTimeout)
+
+
+def max_time_ms(route_class: RouteClass) -> int:
+    """
+    maxTimeMS para las consultas de una clase de ruta.
+
+    Args:
+        route_class: "reads" para listados y búsquedas, "analytics" para
+            agregaciones y estadísticas
+
+    Si la petición tiene plazo se usa lo que queda de él cuando es menor, de
+    modo que el servidor aborta la consulta al vencer el plazo.
+
+    Returns:
+        Límite en milisegundos que el servidor aplica a la consulta
+
+    Raises:
+        RequestDeadlineExceeded: Si el plazo de la petición ya ha vencido
+    """
+    if route_class == "analytics":
+        limit = settings.MONGO_MAX_TIME_MS_ANALYTICS
+    else:
+        limit = settings.MONGO_MAX_TIME_MS_READS
+    remaining = remaining_ms()
+    if remaining is not None:
+        return min(limit, remaining)
+    return limit
+
+
+def request_timeout(route_class: RouteClass) -> float:
+    """Plazo por defecto (segundos) de una clase de ruta."""
+    return {
+        "auth": settings.REQUEST_TIMEOUT_AUTH,
+        "reads": settings.REQUEST_TIMEOUT_READS,
+        "writes": settings.REQUEST_TIMEOUT_WRITES,
+        "analytics": settings.REQUEST_TIMEOUT_ANALYTICS,
+    }[route_class]
+
+
+class CircuitBreaker:
+    """
+    Interruptor que corta el acceso a MongoDB cuando falla demasiado.
+
+    Cerrado: registra el resultado de las últimas window operaciones. Si hay
+    al menos min_calls y la proporción de fallos alcanza failure_rate, se
+    abre y todas las peticiones fallan al instante con 503. Pasados
+    open_seconds deja pasar una única petición de prueba (semiabierto): si
+    tiene éxito se cierra y, si no, vuelve a abrirse.
+
+    Attributes:
+        window: Número de resultados recientes considerados
+        min_calls: Resultados mínimos antes de poder abrirse
+        failure_rate: Proporción de fallos que lo abre
+        open_seconds: Tiempo abierto antes de probar la recuperación
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_seconds: float = 10,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """
+        Comprueba si se permite la llamada.
+
+        Raises:
+            DatabaseConnectionError: Si el interruptor está abierto
+        """
+        if self.state == "closed":
+            return
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                raise DatabaseConnectionError("Database unavailable (circuit open)")
+            self.state = "half_open"
+        if self._probing:
+            raise DatabaseConnectionError("Database unavailable (circuit open)")
+        self._probing = True
+
+    def record_success(self) -> None:
+        if self.state == "half_open":
+            logger.info("Database circuit closed")
+            self._reset("closed")
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == "half_open":
+            self._open()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def release_probe(self) -> None:
+        """Libera la prueba semiabierta si terminó sin tocar la base de datos."""
+        self._probing = False
+
+    def _open(self) -> None:
+        logger.warning("Database circuit opened")
+        metrics.increment("circuit_breaker_opened")
+        self._reset("open")
+        self._opened_at = time.monotonic()
+
+    def _reset(self, state: str) -> None:
+        self.state = state
+        self._outcomes.clear()
+        self._probing = False
+
+
+class Bulkhead:
+    """
+    Límite de concurrencia de una clase de ruta.
+
+    Las peticiones que no consiguen plaza en max_wait_ms se rechazan con 503,
+    de modo que una clase saturada (p. ej. analytics) no agota el pool de
+    conexiones del resto.
+
+    Attributes:
+        name: Clase de ruta
+        limit: Peticiones simultáneas permitidas
+        max_wait_ms: Espera máxima por una plaza
+    """
+
+    def __init__(self, name: str, limit: int, max_wait_ms: float = 100):
+        self.name = name
+        self.limit = limit
+        self.max_wait = max_wait_ms / 1000
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> None:
+        """
+        Raises:
+            ServiceOverloaded: Si no hay plaza dentro de max_wait_ms
+        """
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            metrics.increment(f"bulkhead_rejected_{self.name}")
+            raise ServiceOverloaded(f"Too many concurrent {self.name} requests")
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+circuit_breaker = CircuitBreaker(
+    window=settings.CIRCUIT_BREAKER_WINDOW,
+    min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+    failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+    open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+)
+
+bulkheads: dict[str, Bulkhead] = {
+    "auth": Bulkhead("auth", settings.BULKHEAD_AUTH, settings.BULKHEAD_MAX_WAIT_MS),
+    "reads": Bulkhead("reads", settings.BULKHEAD_READS, settings.BULKHEAD_MAX_WAIT_MS),
+    "writes": Bulkhead(
+        "writes", settings.BULKHEAD_WRITES, settings.BULKHEAD_MAX_WAIT_MS
+    ),
+    "analytics": Bulkhead(
+        "analytics", settings.BULKHEAD_ANALYTICS, settings.BULKHEAD_MAX_WAIT_MS
+    ),
+}
@@ -0,0 +1,277 @@
+import argparse
+import itertools
+import json
+import logging
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Literal, Optional
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from app.core.config import settings
+from app.db.migrations import migration_indexes
+from app.models.product import Product, to_stored
+from app.utils.auth_utils import hash_password
+
+logger = logging.getLogger(__name__)
+
+PriceDistribution = Literal["lognormal", "uniform", "pareto"]
+
+MAX_PRICE = 999999.99
+SYLLABLES = [
+    "ka", "lo", "mi", "ra", "te", "su", "no", "vi", "pe", "da", "go", "ri",
+    "an", "el", "or", "us", "im", "ex", "tra", "pro", "max", "neo", "zen", "flex",
+]  # fmt: skip
+
+
+@dataclass
+class SeedOptions:
+    """
+    Parámetros del generador de datos sintéticos.
+
+    Attributes:
+        users: Número de usuarios
+        products: Número de productos
+        workers: Procesos que insertan en paralelo
+        batch_size: Documentos por insert_many
+        owner_skew: Exponente Zipf del reparto de productos por usuario
+            (0 = uniforme; 1.1 concentra gran parte en pocos usuarios)
+        price_distribution: lognormal, uniform o pareto
+        vocabulary_size: Palabras distintas del vocabulario
+        word_skew: Exponente Zipf de la frecuencia de palabras (realismo de $text)
+        days: Antigüedad máxima de created_at
+        password: Contraseña común de los usuarios generados
+        email_domain: Dominio de los emails generados
+        seed: Semilla para obtener siempre los mismos datos
+    """
+
+    users: int = 1000
+    products: int = 100000
+    workers: int = 4
+    batch_size: int = 5000
+    owner_skew: float = 1.1
+    price_distribution: PriceDistribution = "lognormal"
+    vocabulary_size: int = 5000
+    word_skew: float = 1.0
+    days: int = 365
+    password: str = "loadtest-password"
+    email_domain: str = "loadtest.example"
+    seed: int = 42
+
+
+def zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    """Pesos acumulados de una distribución Zipf sobre size elementos."""
+    return list(
+        itertools.accumulate(1 / (rank**exponent) for rank in range(1, size + 1))
+    )
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list[str]:
+    """Palabras pseudoaleatorias distintas de 2 a 4 sílabas."""
+    words: dict[str, None] = {}
+    while len(words) < size:
+        words["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))] = None
+    return list(words)
+
+
+def price_sampler(
+    distribution: PriceDistribution, rng: random.Random
+) -> Callable[[], float]:
+    """
+    Genera precios con dos decimales dentro del rango válido de la API.
+
+    - lognormal: mediana ~50, cola larga
+    - uniform: entre 1 y 1000
+    - pareto: muchos precios bajos y pocos muy altos
+    """
+    draws = {
+        "lognormal": lambda: rng.lognormvariate(math.log(50), 1.0),
+        "uniform": lambda: rng.uniform(1, 1000),
+        "pareto": lambda: 5 * rng.paretovariate(1.5),
+    }
+    if distribution not in draws:
+        raise ValueError(f"Unsupported price distribution: {distribution}")
+    draw = draws[distribution]
+    return lambda: round(min(draw(), MAX_PRICE), 2)
+
+
+def generate_products(
+    count: int, user_ids: list[str], options: SeedOptions, seed: int
+) -> Iterator[list[dict]]:
+    """
+    Genera productos en lotes de options.batch_size, listos para insert_many.
+
+    Los propietarios siguen una Zipf (owner_skew) y los nombres y
+    descripciones se componen de un vocabulario con frecuencias Zipf, de
+    modo que $text encuentra términos muy comunes y términos raros.
+
+    Args:
+        count: Número de productos a generar
+        user_ids: IDs de los propietarios posibles
+        options: Parámetros de generación
+        seed: Semilla de este generador
+
+    Yields:
+        Listas de documentos en el formato de almacenamiento activo
+    """
+    rng = random.Random(seed)
+    vocabulary = build_vocabulary(options.vocabulary_size, random.Random(options.seed))
+    word_weights = zipf_cum_weights(len(vocabulary), options.word_skew)
+    owner_weights = zipf_cum_weights(len(user_ids), options.owner_skew)
+    price = price_sampler(options.price_distribution, rng)
+    now = datetime.now(timezone.utc)
+    max_age = options.days * 86400
+
+    remaining = count
+    while remaining > 0:
+        size = min(options.batch_size, remaining)
+        owners = rng.choices(user_ids, cum_weights=owner_weights, k=size)
+        batch = []
+        for owner in owners:
+            words = rng.choices(vocabulary, cum_weights=word_weights, k=12)
+            batch.append(
+                to_stored(
+                    {
+                        "name": " ".join(words[:3]).capitalize()[:100],
+                        "description": " ".join(words[3 : rng.randint(5, 12)]),
+                        "price": price(),
+                        "user_created": owner,
+                        "created_at": now - timedelta(seconds=rng.randrange(max_age)),
+                        "updated_at": None,
+                        "deleted_at": None,
+                    }
+                )
+            )
+        remaining -= size
+        yield batch
+
+
+def build_users(count: int, hashed_password: str, options: SeedOptions) -> list[dict]:
+    """
+    Documentos de usuario con un hash de contraseña precalculado.
+
+    Todos comparten el mismo hash Argon2 (calculado una sola vez), así que
+    pueden iniciar sesión con options.password en las pruebas de carga.
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"user{index}@{options.email_domain}",
+            "hashed_password": hashed_password,
+            "created_at": now,
+        }
+        for index in range(count)
+    ]
+
+
+def _insert_products(args: tuple) -> int:
+    """Worker: genera e inserta su parte de productos con una conexión propia."""
+    count, user_ids, options, seed = args
+    client = MongoClient(settings.MONGO_URI, w=1)
+    try:
+        collection = client[settings.MONGO_DB]["products"]
+        inserted = 0
+        for batch in generate_products(count, user_ids, options, seed):
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+        return inserted
+    finally:
+        client.close()
+
+
+def run_seed(options: SeedOptions, defer_indexes: bool = False) -> dict:
+    """
+    Inserta usuarios y productos sintéticos en MONGO_DB.
+
+    Los productos se reparten entre options.workers procesos, cada uno con
+    su propio cliente e insert_many no ordenados. Con defer_indexes se
+    eliminan los índices secundarios de products antes de la carga y se
+    reconstruyen al final (los del modelo y los de las migraciones, que el
+    listado fuerza con hint), que es bastante más rápido para millones de
+    documentos.
+
+    Returns:
+        Recuento, duración y documentos por segundo
+    """
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB]
+    started = time.perf_counter()
+    try:
+        users = build_users(options.users, hash_password(options.password), options)
+        for start in range(0, len(users), options.batch_size):
+            db["users"].insert_many(
+                users[start : start + options.batch_size], ordered=False
+            )
+        user_ids = [str(user["_id"]) for user in users]
+
+        if defer_indexes:
+            db["products"].drop_indexes()
+        share, extra = divmod(options.products, options.workers)
+        tasks = [
+            (
+                share + (1 if worker < extra else 0),
+                user_ids,
+                options,
+                options.seed + worker,
+            )
+            for worker in range(options.workers)
+        ]
+        with ProcessPoolExecutor(max_workers=options.workers) as pool:
+            products = sum(pool.map(_insert_products, tasks))
+        loaded = time.perf_counter() - started
+
+        if defer_indexes:
+            db["products"].create_indexes(
+                [*Product.Settings.indexes, *migration_indexes("products")]
+            )
+    finally:
+        client.close()
+
+    elapsed = time.perf_counter() - started
+    documents = len(users) + products
+    return {
+        "users": len(users),
+        "products": products,
+        "load_seconds": round(loaded, 2),
+        "total_seconds": round(elapsed, 2),
+        "documents_per_second": round(documents / loaded) if loaded else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    CLI del generador.
+
+    Uso:
+        python -m app.db.seed --users 100000 --products 10000000 --workers 8
+    """
+    defaults = SeedOptions()
+    parser = argparse.ArgumentParser(prog="python -m app.db.seed")
+    for name, value in asdict(defaults).items():
+        flag = f"--{name.replace('_', '-')}"
+        if name == "price_distribution":
+            parser.add_argument(
+                flag, default=value, choices=["lognormal", "uniform", "pareto"]
+            )
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="Reconstruye los índices de products tras la carga",
+    )
+    args = vars(parser.parse_args(argv))
+    defer_indexes = args.pop("defer_indexes")
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(run_seed(SeedOptions(**args), defer_indexes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
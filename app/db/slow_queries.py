@@ -0,0 +1,328 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Optional
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Comandos que admiten explain y campo donde va su filtro
+EXPLAINABLE = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes",
+}
+
+# Campos añadidos por el driver que explain no acepta
+DRIVER_FIELDS = {
+    "lsid",
+    "$clusterTime",
+    "$db",
+    "$readPreference",
+    "txnNumber",
+    "readConcern",
+    "writeConcern",
+    "startTransaction",
+    "autocommit",
+}
+
+current_request_scope: ContextVar[Optional[Scope]] = ContextVar(
+    "current_request_scope", default=None
+)
+
+
+def redact(value: Any) -> Any:
+    """
+    Sustituye los valores de un filtro por "?" conservando su forma.
+
+    Se mantienen claves y operadores ($gte, $in, ...); las listas se
+    reducen a la forma de su primer elemento.
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0])] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    """Forma redactada del filtro, orden y pipeline de un comando."""
+    field = EXPLAINABLE.get(command_name)
+    shape: dict = {}
+    if field in ("updates", "deletes"):
+        statements = command.get(field) or [{}]
+        shape["filter"] = redact(statements[0].get("q", {}))
+    elif field:
+        shape["pipeline" if field == "pipeline" else "filter"] = redact(
+            command.get(field, {})
+        )
+    if command.get("sort"):
+        shape["sort"] = {key: value for key, value in command["sort"].items()}
+    return shape
+
+
+def summarize_explain(explain: dict) -> dict:
+    """
+    Extrae lo esencial de un explain("executionStats").
+
+    Returns:
+        Etapas del plan ganador (COLLSCAN, IXSCAN, ...), índices usados y
+        documentos/claves examinados frente a devueltos
+    """
+    stages: list[str] = []
+    indexes: list[str] = []
+    stats: dict = {}
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            if "winningPlan" in node:
+                collect(node["winningPlan"])
+            if "executionStats" in node and not stats:
+                stats.update(node["executionStats"])
+            for key, item in node.items():
+                if key not in ("winningPlan", "rejectedPlans", "executionStats"):
+                    walk(item)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    def collect(plan: Any) -> None:
+        if isinstance(plan, dict):
+            if "stage" in plan:
+                stages.append(plan["stage"])
+            if "indexName" in plan:
+                indexes.append(plan["indexName"])
+            for key in ("inputStage", "queryPlan"):
+                collect(plan.get(key))
+            for child in plan.get("inputStages", []):
+                collect(child)
+
+    walk(explain)
+    return {
+        "plan_stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Listener de comandos de PyMongo que registra los comandos lentos.
+
+    Por cada comando que supera threshold_ms guarda la ruta, la forma del
+    filtro (con los valores redactados) y la duración, y lo escribe en el log.
+    La primera vez que aparece una forma lanza explain("executionStats") en
+    el event loop, como máximo uno cada explain_interval segundos.
+
+    Attributes:
+        threshold_ms: Umbral de duración a partir del cual se registra
+        explain_interval: Segundos mínimos entre dos explain
+        max_entries: Comandos lentos recientes que se conservan
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 100,
+        explain_interval: float = 10,
+        max_entries: int = 500,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self._recent: deque = deque(maxlen=max_entries)
+        self._shapes: dict[str, dict] = {}
+        self._pending: dict[tuple, tuple] = {}
+        self._lock = Lock()
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_explain = 0.0
+        self._explaining = False
+
+    def attach(self, client, loop: asyncio.AbstractEventLoop) -> None:
+        """Asocia el cliente Motor y el loop con los que se ejecutan los explain."""
+        self._client = client
+        self._loop = loop
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in EXPLAINABLE:
+            return
+        scope = current_request_scope.get()
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (
+                event.command,
+                scope,
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool = False) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        command, scope = pending
+        self.record(
+            event.database_name, event.command_name, command, scope, duration_ms, failed
+        )
+
+    def record(
+        self,
+        database: str,
+        command_name: str,
+        command: dict,
+        scope: Optional[Scope],
+        duration_ms: float,
+        failed: bool = False,
+    ) -> None:
+        """Registra un comando lento y, si su forma es nueva, programa su explain."""
+        route = None
+        if scope is not None:
+            path = getattr(scope.get("route"), "path", scope.get("path"))
+            route = f"{scope.get('method')} {path}"
+        shape = command_shape(command_name, command)
+        collection = command.get(command_name)
+        key = json.dumps(
+            [database, command_name, collection, shape], sort_keys=True, default=str
+        )
+        entry = {
+            "at": time.time(),
+            "route": route,
+            "database": database,
+            "collection": collection,
+            "command": command_name,
+            "shape": shape,
+            "duration_ms": round(duration_ms, 3),
+            "failed": failed,
+        }
+        with self._lock:
+            self._recent.append(entry)
+            stats = self._shapes.get(key)
+            if stats is None:
+                stats = self._shapes[key] = {
+                    "command": command_name,
+                    "collection": collection,
+                    "shape": shape,
+                    "routes": [],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "explain": None,
+                }
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + duration_ms, 3)
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            if route and route not in stats["routes"]:
+                stats["routes"].append(route)
+            explain = stats["explain"] is None and self._should_explain()
+        logger.warning("Slow query %s", json.dumps(entry, default=str))
+        if explain:
+            self._schedule_explain(key, database, command)
+
+    def _should_explain(self) -> bool:
+        now = time.monotonic()
+        if self._explaining or self._client is None:
+            return False
+        if now - self._last_explain < self.explain_interval:
+            return False
+        self._explaining = True
+        self._last_explain = now
+        return True
+
+    def _schedule_explain(self, key: str, database: str, command: dict) -> None:
+        explained = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        coroutine = self._explain(key, database, explained)
+        try:
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        except RuntimeError:
+            coroutine.close()
+            with self._lock:
+                self._explaining = False
+
+    async def _explain(self, key: str, database: str, command: dict) -> None:
+        try:
+            result = await self._client[database].command(
+                {"explain": command, "verbosity": "executionStats"}
+            )
+            summary = summarize_explain(result)
+        except Exception as exc:
+            summary = {"error": str(exc)}
+        with self._lock:
+            self._explaining = False
+            stats = self._shapes.get(key)
+            if stats is None:
+                return
+            stats["explain"] = summary
+        logger.warning(
+            "Slow query plan %s",
+            json.dumps(
+                {"collection": stats["collection"], "shape": stats["shape"], **summary},
+                default=str,
+            ),
+        )
+
+    def snapshot(self, limit: int = 100) -> dict:
+        """Comandos lentos recientes y resumen por forma de consulta."""
+        with self._lock:
+            recent = list(self._recent)[-limit:]
+            shapes = sorted(
+                (dict(stats) for stats in self._shapes.values()),
+                key=lambda stats: stats["total_ms"],
+                reverse=True,
+            )
+        return {"threshold_ms": self.threshold_ms, "shapes": shapes, "recent": recent}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._shapes.clear()
+
+
+slow_query_listener = SlowQueryListener(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS or 0,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    max_entries=settings.SLOW_QUERY_MAX_ENTRIES,
+)
+
+
+class RequestScopeMiddleware:
+    """
+    Middleware ASGI que publica el scope de la petición en un ContextVar.
+
+    Motor copia el contexto al hilo donde PyMongo ejecuta el comando, por lo
+    que el listener puede asociar cada comando a su ruta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_scope.reset(token)
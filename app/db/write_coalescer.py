@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Optional
+
+from beanie import Document, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from app.core.exceptions import DatabaseConnectionError, ServiceOverloaded
+from app.core.metrics import metrics
+
+
+class WriteCoalescer:
+    """
+    Agrupa inserciones concurrentes de un modelo en un único insert_many.
+
+    Las inserciones que llegan dentro de una ventana corta (max_delay_ms) o
+    hasta completar max_batch documentos se envían juntas como un insert_many
+    no ordenado. Cada llamador recibe su propio documento o su propio error.
+
+    Attributes:
+        document_model: Clase del documento Beanie a insertar
+        max_batch: Número máximo de documentos por lote
+        max_delay_ms: Tiempo máximo que espera un documento antes del envío
+        max_queue: Número máximo de documentos pendientes
+    """
+
+    def __init__(
+        self,
+        document_model: type[Document],
+        max_batch: int = 500,
+        max_delay_ms: float = 2.0,
+        max_queue: int = 10000,
+    ):
+        self.document_model = document_model
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.max_queue = max_queue
+        self._pending: list[tuple[Document, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set[asyncio.Task] = set()
+        self._closed = False
+        self._batch_size = metrics.histogram(
+            "write_coalescer_batch_size", (1, 5, 10, 50, 100, 250, 500, 1000)
+        )
+        self._added_latency = metrics.histogram("write_coalescer_added_latency_ms")
+
+    async def insert(
+        self, document: Document, session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Document:
+        """
+        Encola un documento y espera a que su lote se inserte.
+
+        Args:
+            document: Documento a insertar
+            session: Sesión causal del llamador; se avanza hasta los tiempos
+                del lote para conservar read-your-writes
+
+        Returns:
+            El documento insertado (con id asignado)
+
+        Raises:
+            ServiceOverloaded: Si la cola está llena
+            DatabaseConnectionError: Si el coalescer está cerrado
+        """
+        if self._closed:
+            raise DatabaseConnectionError("Write coalescer is closed")
+        if len(self._pending) >= self.max_queue:
+            metrics.increment("write_coalescer_rejected")
+            raise ServiceOverloaded("Write queue is full")
+
+        if document.id is None:
+            document.id = PydanticObjectId()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((document, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay_ms / 1000, self._schedule_flush
+            )
+
+        cluster_time, operation_time = await future
+        if session is not None:
+            if cluster_time is not None:
+                session.advance_cluster_time(cluster_time)
+            if operation_time is not None:
+                session.advance_operation_time(operation_time)
+        return document
+
+    async def close(self) -> None:
+        """Deja de aceptar inserciones y envía todo lo pendiente."""
+        self._closed = True
+        while self._pending:
+            self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending[: self.max_batch]
+        self._pending = self._pending[self.max_batch :]
+        if self._pending and not self._closed:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay_ms / 1000, self._schedule_flush
+            )
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[Document, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        self._batch_size.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self._added_latency.observe((started - enqueued_at) * 1000)
+
+        errors: dict[int, Exception] = {}
+        times = (None, None)
+        collection = self.document_model.get_pymongo_collection()
+        try:
+            async with await collection.database.client.start_session(
+                causal_consistency=True
+            ) as session:
+                try:
+                    await self.document_model.insert_many(
+                        [document for document, _, _ in batch],
+                        session=session,
+                        ordered=False,
+                    )
+                except BulkWriteError as exc:
+                    for error in exc.details.get("writeErrors", []):
+                        error_class = (
+                            DuplicateKeyError
+                            if error.get("code") == 11000
+                            else WriteError
+                        )
+                        errors[error["index"]] = error_class(
+                            error.get("errmsg"), error.get("code"), error
+                        )
+                times = (session.cluster_time, session.operation_time)
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for index, (_, future, _) in enumerate(batch):
+            if future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(times)
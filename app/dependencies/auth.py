@@ -2,10 +2,12 @@ from typing import Optional
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 
 from app.core.config import settings
-from app.core.exceptions import TokenInvalid
+from app.core.exceptions import AdminRequired, TokenInvalid
+from app.core.hot_set import hot_users
+from app.core.tracing import trace_span, traced
+from app.utils.tokens import TokenError, get_token_service
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.api_prefix}/auth/login",
@@ -13,10 +15,14 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
+@traced("dependency.get_current_user_id")
 async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
     """
     Extrae y valida el ID del usuario desde el token JWT.
 
+    Cada usuario autenticado se cuenta en hot_users, el conjunto que se
+    precalienta en el siguiente arranque.
+
     Args:
         token: Token JWT del header Authorization
 
@@ -27,12 +33,29 @@ async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
         TokenInvalid: Si el token es inválido, expirado o no contiene user_id
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        with trace_span("jwt.decode"):
+            payload = get_token_service().decode(token)
         user_id: Optional[str] = payload.get("sub")
         if user_id is None:
             raise TokenInvalid(detail="Token payload invalid")
+        hot_users.record(user_id)
         return user_id
-    except JWTError:
+    except TokenError:
         raise TokenInvalid(detail="Invalid token or expired token")
+
+
+def is_admin(user_id: str) -> bool:
+    """Indica si el usuario está configurado como administrador (ADMIN_USER_IDS)."""
+    return user_id in settings.ADMIN_USER_IDS
+
+
+async def get_admin_user_id(user_id: str = Depends(get_current_user_id)) -> str:
+    """
+    Exige que el usuario autenticado sea administrador.
+
+    Raises:
+        AdminRequired: Si el usuario no está en ADMIN_USER_IDS
+    """
+    if not is_admin(user_id):
+        raise AdminRequired()
+    return user_id
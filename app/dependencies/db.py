@@ -0,0 +1,173 @@
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import ExecutionTimeout
+from starlette.types import Receive, Scope, Send
+
+from app.core.deadlines import current_deadline
+from app.core.exceptions import DatabaseConnectionError, RequestDeadlineExceeded
+from app.db.mongo import causal_tokens
+from app.db.resilience import (
+    UNAVAILABLE_ERRORS,
+    Bulkhead,
+    RouteClass,
+    bulkheads,
+    circuit_breaker,
+    request_timeout,
+)
+from app.db.write_coalescer import WriteCoalescer
+from app.dependencies.auth import get_current_user_id
+from app.models.product import Product
+
+
+async def get_causal_session(
+    user_id: str = Depends(get_current_user_id),
+) -> AsyncIterator[AsyncIOMotorClientSession]:
+    """
+    Abre una sesión causalmente consistente para el usuario autenticado.
+
+    La sesión parte de los últimos tiempos causales del usuario, de modo que
+    sus lecturas (incluidas las servidas por secundarios) ven sus escrituras
+    previas. Al terminar se registran los nuevos tiempos para la próxima petición.
+
+    Args:
+        user_id: ID del usuario autenticado (inyectado automáticamente)
+
+    Yields:
+        Sesión Motor con causal_consistency activada
+    """
+    client = Product.get_pymongo_collection().database.client
+    async with await client.start_session(causal_consistency=True) as session:
+        causal_tokens.advance(user_id, session)
+        yield session
+        causal_tokens.record(user_id, session)
+
+
+def get_write_coalescer(request: Request) -> Optional[WriteCoalescer]:
+    """Devuelve el coalescer de escrituras si está habilitado en la aplicación."""
+    return getattr(request.app.state, "write_coalescer", None)
+
+
+class DatabaseGuard:
+    """
+    Plaza del bulkhead y llamada al circuit breaker de una petición.
+
+    La libera guard_database al terminar el endpoint o, si el endpoint
+    responde con stream(), la respuesta al terminar de enviar el cuerpo.
+    """
+
+    def __init__(self, bulkhead: Bulkhead):
+        self.bulkhead = bulkhead
+        self.streaming = False
+        self._finished = False
+
+    def finish(self, exc: Optional[BaseException] = None) -> None:
+        """
+        Registra el resultado en el circuit breaker y libera la plaza.
+
+        Los errores de conexión y de red cuentan como fallos. Un maxTimeMS
+        agotado es una consulta lenta, no una base de datos caída: no cuenta
+        ni como fallo ni como éxito. El resto de resultados (incluidos 404 o
+        422) cuentan como éxitos. Solo tiene efecto la primera llamada.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            if isinstance(exc, UNAVAILABLE_ERRORS):
+                circuit_breaker.record_failure()
+            elif exc is None or (
+                isinstance(exc, Exception) and not isinstance(exc, ExecutionTimeout)
+            ):
+                circuit_breaker.record_success()
+            else:
+                circuit_breaker.release_probe()
+        finally:
+            self.bulkhead.release()
+
+    def stream(self, content: AsyncIterator, **kwargs) -> StreamingResponse:
+        """
+        Respuesta en streaming que mantiene la plaza hasta enviar el cuerpo.
+
+        Los errores de la base de datos mientras se genera el cuerpo cuentan
+        en el circuit breaker, aunque ya no puedan cambiar el código de estado.
+
+        Args:
+            content: Iterador asíncrono del cuerpo
+            **kwargs: Argumentos de StreamingResponse (media_type, headers...)
+        """
+        self.streaming = True
+        return GuardedStreamingResponse(self, content, **kwargs)
+
+
+class GuardedStreamingResponse(StreamingResponse):
+    """StreamingResponse que cierra su DatabaseGuard al terminar de enviarse."""
+
+    def __init__(self, guard: DatabaseGuard, content: AsyncIterator, **kwargs):
+        super().__init__(content, **kwargs)
+        self.guard = guard
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        except BaseException as exc:
+            self.guard.finish(exc)
+            raise
+        self.guard.finish()
+
+
+def guard_database(
+    route_class: RouteClass,
+) -> Callable[[], AsyncIterator[DatabaseGuard]]:
+    """
+    Crea la dependencia que protege el acceso a MongoDB de una clase de ruta.
+
+    La petición ocupa una plaza del bulkhead de su clase y pasa por el
+    circuit breaker (ver DatabaseGuard.finish). Los errores de conexión o de
+    red se responden con 503 y un maxTimeMS agotado con 504. Si la petición
+    no trae X-Request-Timeout se le aplica el plazo configurado para la
+    clase (REQUEST_TIMEOUT_*).
+
+    Las rutas que responden en streaming deben recibir el DatabaseGuard y
+    construir la respuesta con guard.stream(): así la plaza se libera y el
+    resultado se registra cuando termina el cuerpo, no al salir del endpoint.
+
+    Args:
+        route_class: "auth", "reads", "writes" o "analytics"
+
+    Raises:
+        ServiceOverloaded: Si el bulkhead está lleno
+        DatabaseConnectionError: Si el circuito está abierto o MongoDB falla
+        RequestDeadlineExceeded: Si una consulta agota su maxTimeMS
+    """
+    bulkhead = bulkheads[route_class]
+    timeout = request_timeout(route_class)
+
+    async def dependency() -> AsyncIterator[DatabaseGuard]:
+        deadline = current_deadline.get()
+        if deadline is not None:
+            deadline.apply_route_default(timeout)
+        await bulkhead.acquire()
+        guard = DatabaseGuard(bulkhead)
+        try:
+            circuit_breaker.before_call()
+        except BaseException:
+            bulkhead.release()
+            raise
+        try:
+            yield guard
+        except ExecutionTimeout as exc:
+            guard.finish(exc)
+            raise RequestDeadlineExceeded("Database query timed out") from exc
+        except UNAVAILABLE_ERRORS as exc:
+            guard.finish(exc)
+            raise DatabaseConnectionError("Database unavailable") from exc
+        except BaseException as exc:
+            guard.finish(exc)
+            raise
+        if not guard.streaming:
+            guard.finish()
+
+    return dependency
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from fastapi import Header
+
+
+async def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Clave para que los reintentos no repitan la escritura",
+    ),
+) -> Optional[str]:
+    """
+    Obtiene la cabecera Idempotency-Key de la petición.
+
+    Returns:
+        Valor de la cabecera, o None si no se envió
+    """
+    return idempotency_key or None
@@ -1,17 +1,31 @@
 from beanie import PydanticObjectId
 from fastapi import Depends
 
+from app.core.config import settings
 from app.core.exceptions import ProductAccessForbidden, ProductNotFound
+from app.core.tracing import traced
+from app.db.batch_loader import BatchLoader
+from app.db.resilience import max_time_ms
 from app.dependencies.auth import get_current_user_id
 from app.models.product import Product
+from app.services.product_archive import restore_archived_product
 
+product_loader = BatchLoader(Product, max_batch=settings.PRODUCT_LOADER_MAX_BATCH)
 
+
+@traced("dependency.get_valid_product")
 async def get_valid_product(
     product_id: PydanticObjectId, user_id: str = Depends(get_current_user_id)
 ) -> Product:
     """
     Obtiene un producto válido que pertenece al usuario autenticado.
 
+    La lectura va siempre al primario, ya que suele preceder a una escritura.
+    Con PRODUCT_LOADER_ENABLED las lecturas concurrentes de distintos ids se
+    agrupan en un único find con $in (ver BatchLoader).
+    Si el archivado está habilitado y el producto no está en la colección
+    activa, se busca en products_archive y se restaura de forma transparente.
+
     Args:
         product_id: ID del producto a obtener
         user_id: ID del usuario autenticado (inyectado automáticamente)
@@ -20,11 +34,16 @@ async def get_valid_product(
         Producto válido que pertenece al usuario
 
     Raises:
-        ProductNotFound: Si el producto no existe
+        ProductNotFound: Si el producto no existe o fue eliminado
         ProductAccessForbidden: Si el producto no pertenece al usuario
     """
-    product = await Product.get(product_id)
-    if not product:
+    if settings.PRODUCT_LOADER_ENABLED:
+        product = await product_loader.load(product_id)
+    else:
+        product = await Product.get(product_id, max_time_ms=max_time_ms("reads"))
+    if not product and settings.PRODUCT_ARCHIVE_AFTER_DAYS is not None:
+        product = await restore_archived_product(product_id, user_id)
+    if not product or product.deleted_at is not None:
         raise ProductNotFound()
     if product.user_created != user_id:
         raise ProductAccessForbidden()
@@ -1,15 +1,34 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from beanie import init_beanie
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 
 from app.core.config import settings
+from app.core.deadlines import RequestDeadlineMiddleware
 from app.core.exception_handlers import register_exception_handlers
-from app.core.exceptions import DatabaseConnectionError
+from app.core.exceptions import DatabaseConnectionError, ServiceNotReady
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
+from app.core.profiling import install_profiling
+from app.core.tracing import install_tracing, shutdown_tracing
+from app.db.health import readiness
+from app.db.migrations import drop_outdated_indexes
 from app.db.mongo import close_mongo_connection, connect_to_mongo
-from app.models.product import Product
+from app.db.slow_queries import RequestScopeMiddleware
+from app.db.write_coalescer import WriteCoalescer
+from app.dependencies.auth import get_admin_user_id
+from app.models.idempotency import IdempotencyRecord
+from app.models.job import Job
+from app.models.product import Product, ProductArchive, ProductTagCount
 from app.models.user import User
-from app.routes import auth, products
+from app.routes import auth, jobs, products, profiling
+from app.services.jobs import JobWorkerPool
+from app.services.migrations import run_startup_migrations
+from app.services.product_archive import run_product_archiver
+from app.services.product_events import build_publisher
+from app.services.warmup import run_hot_set_recorder, save_hot_set, warm_up
+from app.utils.tokens import get_token_service
 
 
 @asynccontextmanager
@@ -19,16 +38,83 @@ async def lifespan(app: FastAPI):
 
     Se ejecuta al inicio y al final de la aplicación para:
     - Conectar a MongoDB y configurar Beanie
-    - Cerrar conexiones al finalizar
+    - Aplicar las migraciones pendientes antes de declararse disponible (opcional)
+    - Precalentar cachés e índices antes de declararse disponible (opcional)
+    - Arrancar la comprobación periódica de disponibilidad (/readyz)
+    - Arrancar el coalescer de escrituras y el archivado de productos (opcionales)
+    - Arrancar el pool de workers de trabajos en segundo plano
+    - Arrancar el monitor de retraso del event loop
+    - Publicar los cambios de productos desde un change stream (opcional)
+    - Guardar el hot set de usuarios para el precalentamiento del siguiente arranque
+    - Vaciar las escrituras pendientes, detener tareas y cerrar conexiones al finalizar
     """
     client, db = await connect_to_mongo()
-    await init_beanie(database=db, document_models=[User, Product])
+    document_models = [
+        User,
+        Product,
+        ProductArchive,
+        ProductTagCount,
+        IdempotencyRecord,
+        Job,
+    ]
+    # Sin allow_index_dropping: init_beanie borraría los índices de las migraciones
+    await drop_outdated_indexes(db, document_models)
+    await init_beanie(database=db, document_models=document_models)
     app.state.mongo_client = client
     app.state.mongo_db = db
+    if settings.MIGRATIONS_RUN_ON_STARTUP:
+        await run_startup_migrations(db)
+    app.state.warmup = None
+    if settings.WARMUP_ENABLED:
+        # Antes de arrancar ReadinessChecker: /readyz no pasa a listo hasta acabar
+        app.state.warmup = await warm_up(db)
+    readiness.start(client)
+    app.state.write_coalescer = None
+    if settings.WRITE_COALESCER_ENABLED:
+        app.state.write_coalescer = WriteCoalescer(
+            Product,
+            max_batch=settings.WRITE_COALESCER_MAX_BATCH,
+            max_delay_ms=settings.WRITE_COALESCER_MAX_DELAY_MS,
+            max_queue=settings.WRITE_COALESCER_MAX_QUEUE,
+        )
+    app.state.job_pool = None
+    if settings.JOBS_ENABLED:
+        app.state.job_pool = JobWorkerPool(
+            concurrency=settings.JOBS_CONCURRENCY,
+            lease_seconds=settings.JOBS_LEASE_SECONDS,
+            heartbeat_seconds=settings.JOBS_HEARTBEAT_SECONDS,
+            poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        )
+        app.state.job_pool.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    background_tasks = []
+    if settings.PRODUCT_ARCHIVE_AFTER_DAYS is not None:
+        background_tasks.append(asyncio.create_task(run_product_archiver()))
+    if settings.PRODUCT_EVENTS_ENABLED:
+        background_tasks.append(asyncio.create_task(build_publisher(db).run()))
+    if settings.WARMUP_ENABLED:
+        background_tasks.append(asyncio.create_task(run_hot_set_recorder(db)))
 
     yield
 
+    if app.state.job_pool:
+        await app.state.job_pool.stop()
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await task
+    if app.state.write_coalescer:
+        await app.state.write_coalescer.close()
+    if settings.WARMUP_ENABLED:
+        with suppress(Exception):
+            await save_hot_set(db, settings.WARMUP_HOT_USERS)
+    await readiness.stop()
     await close_mongo_connection(client)
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -56,12 +142,58 @@ app = FastAPI(
             "name": "products",
             "description": "Operaciones CRUD para productos",
         },
+        {
+            "name": "jobs",
+            "description": "Trabajos en segundo plano con consulta de progreso",
+        },
+        {
+            "name": "profiling",
+            "description": "Perfilado de peticiones y consultas lentas (solo administradores)",
+        },
     ],
 )
 
 register_exception_handlers(app)
+install_profiling(app)
+if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+    app.add_middleware(RequestScopeMiddleware)
+install_tracing(app)
+if settings.REQUEST_DEADLINES_ENABLED:
+    app.add_middleware(RequestDeadlineMiddleware)
 app.include_router(auth.router, prefix=settings.api_prefix)
 app.include_router(products.router, prefix=settings.api_prefix)
+app.include_router(jobs.router, prefix=settings.api_prefix)
+app.include_router(profiling.router, prefix=settings.api_prefix)
+
+
+@app.get("/livez", tags=["health"])
+async def liveness_check():
+    """
+    Sonda de vida: el proceso responde. No realiza ninguna operación de E/S.
+
+    Returns:
+        - 200: El proceso atiende peticiones
+    """
+    return {"status": "alive"}
+
+
+@app.get("/readyz", tags=["health"])
+async def readiness_check():
+    """
+    Sonda de disponibilidad servida desde memoria.
+
+    El estado lo refresca en segundo plano ReadinessChecker (ping a MongoDB,
+    topología y pool cada READINESS_INTERVAL_SECONDS); la respuesta incluye
+    su antigüedad en age_seconds.
+
+    Returns:
+        - 200: Base de datos accesible según la última comprobación
+        - 503: Sin conexión, sin primario o comprobación caducada (ServiceNotReady)
+    """
+    state = readiness.status()
+    if not state["ready"]:
+        raise ServiceNotReady(state["error"])
+    return {"status": "ready", **state}
 
 
 @app.get("/health", tags=["health"])
@@ -70,7 +202,9 @@ async def health_check():
     Endpoint de verificación de salud de la aplicación.
 
     Verifica el estado de la aplicación y la conectividad con MongoDB.
-    Útil para monitoreo, load balancers y verificación de despliegues.
+    Útil para monitoreo, load balancers y verificación de despliegues. La
+    conectividad se lee del último resultado de ReadinessChecker, sin
+    consultar la base de datos en cada llamada.
 
     Returns:
         - 200: Aplicación y base de datos funcionando correctamente
@@ -79,9 +213,7 @@ async def health_check():
     if not hasattr(app.state, "mongo_client") or not app.state.mongo_client:
         raise DatabaseConnectionError("Database not initialized")
 
-    try:
-        await app.state.mongo_client.admin.command("ping")
-    except Exception:
+    if not readiness.status()["ready"]:
         raise DatabaseConnectionError("Database connection failed")
 
     return {
@@ -90,3 +222,26 @@ async def health_check():
         "project": settings.PROJECT_NAME,
         "database": "connected",
     }
+
+
+@app.get("/.well-known/jwks.json", tags=["auth"])
+async def jwks():
+    """
+    Claves públicas con las que se verifican los tokens de acceso (JWKS).
+
+    Incluye la clave activa y las retiradas que aún verifican; con HS256
+    (sin JWT_KEYS) la lista está vacía.
+    """
+    return get_token_service().jwks()
+
+
+@app.get("/metrics", tags=["health"])
+async def get_metrics(_: str = Depends(get_admin_user_id)):
+    """
+    Métricas internas del proceso (contadores e histogramas).
+
+    Incluye, entre otras, el tamaño de lote y la latencia añadida del
+    coalescer de escrituras y el retraso del event loop (event_loop_lag_ms).
+    Solo para administradores, como los endpoints de /profiling.
+    """
+    return metrics.snapshot()
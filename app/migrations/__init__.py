@@ -0,0 +1,15 @@
+"""
+Migraciones versionadas.
+
+Cada módulo vNNNN_<nombre>.py registra una migración con register_migration;
+para añadir una nueva, créalo con la siguiente versión e impórtalo aquí.
+Se aplican con `python -m app.db.migrations run`, con el trabajo
+run_migrations o al arrancar (MIGRATIONS_RUN_ON_STARTUP).
+"""
+
+from app.migrations import (  # noqa: F401
+    v0001_backfill_product_deleted_at,
+    v0002_products_owner_created_index,
+    v0003_products_sort_indexes,
+    v0004_products_tags_index,
+)
@@ -0,0 +1,13 @@
+from app.db.migrations import Migration, register_migration
+
+# Sin deleted_at explícito los productos anteriores al borrado lógico no
+# entran en los índices parciales ni en las consultas con ACTIVE_FILTER
+migration = register_migration(
+    Migration(
+        version=1,
+        name="backfill_product_deleted_at",
+        collection="products",
+        filter={"deleted_at": {"$exists": False}},
+        update={"$set": {"deleted_at": None}},
+    )
+)
@@ -0,0 +1,11 @@
+from app.db.migrations import Migration, register_migration
+from app.models.product import OWNER_CREATED_INDEXES
+
+migration = register_migration(
+    Migration(
+        version=2,
+        name="products_owner_created_index",
+        collection="products",
+        indexes=OWNER_CREATED_INDEXES,
+    )
+)
@@ -0,0 +1,11 @@
+from app.db.migrations import Migration, register_migration
+from app.models.product import OWNER_NAME_INDEXES, OWNER_PRICE_INDEXES
+
+migration = register_migration(
+    Migration(
+        version=3,
+        name="products_sort_indexes",
+        collection="products",
+        indexes=[*OWNER_PRICE_INDEXES, *OWNER_NAME_INDEXES],
+    )
+)
@@ -0,0 +1,11 @@
+from app.db.migrations import Migration, register_migration
+from app.models.product import OWNER_TAGS_INDEXES
+
+migration = register_migration(
+    Migration(
+        version=4,
+        name="products_tags_index",
+        collection="products",
+        indexes=OWNER_TAGS_INDEXES,
+    )
+)
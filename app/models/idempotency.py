@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+from app.core.config import settings
+
+
+class IdempotencyRecord(Document):
+    """
+    Resultado almacenado de una escritura identificada por Idempotency-Key.
+
+    Attributes:
+        key: Clave compuesta por usuario, operación e Idempotency-Key (única)
+        fingerprint: Hash del cuerpo de la petición original
+        status: "in_progress" mientras se ejecuta, "completed" al terminar
+        response: Respuesta serializada de la ejecución original
+        claim: Identificador de la ejecución que tiene reservada la clave
+        lease_until: Fin de la reserva; después otra petición puede tomarla
+        created_at: Fecha de creación (expira por TTL)
+    """
+
+    key: str = Field(..., description="Clave de idempotencia con su ámbito")
+    fingerprint: str = Field(..., description="Hash del cuerpo de la petición")
+    status: Literal["in_progress", "completed"] = Field(
+        "in_progress", description="Estado de la ejecución original"
+    )
+    response: Optional[dict] = Field(None, description="Respuesta almacenada")
+    claim: Optional[str] = Field(None, description="Ejecución que tiene la reserva")
+    lease_until: Optional[datetime] = Field(
+        None, description="Fecha y hora en que caduca la reserva"
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Fecha y hora de creación",
+    )
+
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+            IndexModel(
+                [("created_at", ASCENDING)],
+                name="created_at_ttl",
+                expireAfterSeconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+            ),
+        ]
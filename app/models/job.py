@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+JobStatus = Literal["queued", "running", "completed", "failed"]
+
+
+class Job(Document):
+    """
+    Trabajo en segundo plano ejecutado por el pool de workers.
+
+    Attributes:
+        type: Tipo de trabajo (debe estar registrado)
+        params: Parámetros del trabajo
+        user_id: ID del usuario que lo solicitó
+        status: Estado actual del trabajo
+        progress: Progreso entre 0 y 1
+        message: Último mensaje de progreso
+        result: Resultado del trabajo al completarse
+        error: Error del último intento fallido
+        attempts: Número de intentos realizados
+        lease_owner: Worker que tiene el trabajo reservado
+        lease_expires_at: Fin de la reserva; se renueva con heartbeats
+        created_at: Fecha y hora de creación
+        started_at: Fecha y hora del último inicio
+        finished_at: Fecha y hora de finalización
+    """
+
+    type: str = Field(..., description="Tipo de trabajo")
+    params: dict = Field(default_factory=dict, description="Parámetros del trabajo")
+    user_id: str = Field(..., description="ID del usuario que solicitó el trabajo")
+    status: JobStatus = Field("queued", description="Estado del trabajo")
+    progress: float = Field(0.0, ge=0, le=1, description="Progreso entre 0 y 1")
+    message: Optional[str] = Field(None, description="Último mensaje de progreso")
+    result: Optional[dict] = Field(None, description="Resultado del trabajo")
+    error: Optional[str] = Field(None, description="Error del último intento")
+    attempts: int = Field(0, description="Número de intentos realizados")
+    lease_owner: Optional[str] = Field(None, description="Worker con la reserva")
+    lease_expires_at: Optional[datetime] = Field(
+        None, description="Fecha y hora de expiración de la reserva"
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Fecha y hora de creación",
+    )
+    started_at: Optional[datetime] = Field(None, description="Inicio del trabajo")
+    finished_at: Optional[datetime] = Field(None, description="Fin del trabajo")
+
+    class Settings:
+        name = "jobs"
+        indexes = [
+            IndexModel(
+                [("status", ASCENDING), ("created_at", ASCENDING)],
+                name="status_created_at",
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("lease_expires_at", ASCENDING)],
+                name="status_lease_expires_at",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job(type={self.type}, status={self.status})"
@@ -1,8 +1,268 @@
 from datetime import datetime, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Union
 
-from beanie import Document, Indexed
-from pydantic import Field, validator
+from beanie import DecimalAnnotation, Document
+from bson import Decimal128, ObjectId
+from pydantic import AfterValidator, AliasChoices, BeforeValidator, Field, validator
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from app.core.config import settings
+
+# Filtro de productos activos (no eliminados). Usa $type para que los índices
+# parciales puedan declararlo; las consultas deben incluirlo para usarlos.
+ACTIVE_FILTER = {"deleted_at": {"$type": "null"}}
+
+# Almacenamiento compacto (PRODUCT_COMPACT_STORAGE): nombres cortos en BSON,
+# propietario como ObjectId y precio como Decimal128. La API no cambia.
+COMPACT_STORAGE = settings.PRODUCT_COMPACT_STORAGE
+COMPACT_FIELDS = {
+    "description": "d",
+    "user_created": "u",
+    "created_at": "c",
+    "updated_at": "m",
+}
+
+# Migración en línea entre formatos (PRODUCT_LAYOUT_MIGRATING): mientras el
+# trabajo compact_product_layout convierte los documentos conviven ambos, así
+# que los filtros por propietario aceptan los dos y se crean los índices de
+# los dos. PRODUCT_COMPACT_STORAGE solo se cambia cuando el trabajo termina.
+LAYOUT_MIGRATING = settings.PRODUCT_LAYOUT_MIGRATING
+
+
+def layout_field(field: str, compact: bool) -> str:
+    """Nombre de un campo de Product en un formato de almacenamiento."""
+    if compact:
+        return COMPACT_FIELDS.get(field, field)
+    return field
+
+
+def stored(field: str) -> str:
+    """Nombre con el que se guarda en MongoDB un campo de Product."""
+    return layout_field(field, COMPACT_STORAGE)
+
+
+def stored_layouts() -> tuple[bool, ...]:
+    """Formatos presentes en la colección: el configurado y, si se migra, el otro."""
+    if LAYOUT_MIGRATING:
+        return (COMPACT_STORAGE, not COMPACT_STORAGE)
+    return (COMPACT_STORAGE,)
+
+
+def owner_ref(user_id: str) -> Union[str, ObjectId]:
+    """Valor almacenado del propietario, para usarlo en filtros de consultas."""
+    if COMPACT_STORAGE and ObjectId.is_valid(user_id):
+        return ObjectId(user_id)
+    return user_id
+
+
+def stored_filter(field: str, condition) -> dict:
+    """
+    Filtro sobre un campo de Product en el formato almacenado.
+
+    Durante la migración de formato es un $or con el nombre de cada formato;
+    para combinar varios en una consulta hay que usar $and.
+
+    Args:
+        field: Nombre del campo en el modelo
+        condition: Valor u operadores de consulta del campo
+
+    Returns:
+        Filtro de consulta
+    """
+    names = dict.fromkeys(layout_field(field, compact) for compact in stored_layouts())
+    if len(names) == 1:
+        return {stored(field): condition}
+    return {"$or": [{name: condition} for name in names]}
+
+
+def owner_filter(user_id: str) -> dict:
+    """
+    Filtro de los productos de un usuario.
+
+    Durante la migración de formato acepta el propietario con ambos nombres
+    y como texto u ObjectId, para que ningún producto desaparezca mientras
+    se convierte.
+    """
+    if not LAYOUT_MIGRATING:
+        return {stored("user_created"): owner_ref(user_id)}
+    owners = [user_id, ObjectId(user_id)] if ObjectId.is_valid(user_id) else [user_id]
+    return stored_filter("user_created", {"$in": owners})
+
+
+def stored_expr(field: str) -> Union[str, dict]:
+    """
+    Expresión de agregación que lee un campo de Product.
+
+    Durante la migración de formato lee el nombre del formato configurado y,
+    si falta, el del otro.
+    """
+    names = [f"${layout_field(field, compact)}" for compact in stored_layouts()]
+    if len(dict.fromkeys(names)) == 1:
+        return names[0]
+    return {"$ifNull": names}
+
+
+def to_stored(fields: dict) -> dict:
+    """
+    Convierte campos de Product con nombres de la API al formato almacenado.
+
+    Se usa en las escrituras que no pasan por el modelo (importación,
+    actualizaciones parciales con $set).
+
+    Args:
+        fields: Campos con los nombres del modelo
+
+    Returns:
+        Documento con los nombres y tipos del almacenamiento activo
+    """
+    if not COMPACT_STORAGE:
+        return fields
+    doc = {stored(key): value for key, value in fields.items()}
+    if "user_created" in fields:
+        doc[stored("user_created")] = owner_ref(fields["user_created"])
+    if fields.get("price") is not None:
+        doc["price"] = Decimal128(str(fields["price"]))
+    return doc
+
+
+class OwnerId(str):
+    """ID del usuario propietario; en almacenamiento compacto se guarda como ObjectId."""
+
+
+def _owner_from_bson(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+Owner = Annotated[str, BeforeValidator(_owner_from_bson), AfterValidator(OwnerId)]
+Price = DecimalAnnotation if COMPACT_STORAGE else float
+
+
+def layout_indexes(
+    keys: list[tuple[str, Union[int, str]]], name: str, **kwargs
+) -> list[IndexModel]:
+    """
+    Índice sobre campos de Product en cada formato de stored_layouts().
+
+    El del formato compacto lleva el sufijo _compact para que ambos puedan
+    convivir durante la migración de formato. El primero es siempre el del
+    formato configurado.
+
+    Args:
+        keys: Campos (nombres del modelo) y dirección
+        name: Nombre del índice en el formato estándar
+        **kwargs: Opciones de IndexModel
+
+    Returns:
+        Un IndexModel por formato
+    """
+    return [
+        IndexModel(
+            [(layout_field(field, compact), direction) for field, direction in keys],
+            name=layout_index_name(name, compact),
+            **kwargs,
+        )
+        for compact in stored_layouts()
+    ]
+
+
+def layout_index_name(name: str, compact: bool) -> str:
+    """Nombre en un formato de un índice creado con layout_indexes."""
+    return f"{name}_compact" if compact else name
+
+
+def text_index(name: str, **kwargs) -> IndexModel:
+    """
+    Índice de texto sobre name y description.
+
+    Solo puede haber uno por colección, así que durante la migración de
+    formato cubre la descripción con ambos nombres (sufijo _migrating).
+    """
+    descriptions = dict.fromkeys(
+        layout_field("description", compact) for compact in stored_layouts()
+    )
+    if LAYOUT_MIGRATING:
+        name = f"{name}_migrating"
+    else:
+        name = layout_index_name(name, COMPACT_STORAGE)
+    return IndexModel(
+        [("name", TEXT), *((field, TEXT) for field in descriptions)],
+        name=name,
+        **kwargs,
+    )
+
+
+def retired_layout_indexes(names: list[str], text_name: str) -> list[str]:
+    """
+    Índices de formato que no corresponden a la configuración actual.
+
+    Los de layout_indexes en un formato que ya no se almacena y las otras
+    variantes del índice de texto; se declaran en Settings.retired_indexes
+    para que drop_outdated_indexes los elimine al arrancar.
+
+    Args:
+        names: Nombres base (formato estándar) de los índices de layout_indexes
+        text_name: Nombre base del índice de text_index
+    """
+    layouts = stored_layouts()
+    retired = [
+        layout_index_name(name, compact)
+        for compact in (False, True)
+        if compact not in layouts
+        for name in names
+    ]
+    current_text = text_index(text_name).document["name"]
+    variants = [text_name, f"{text_name}_compact", f"{text_name}_migrating"]
+    return retired + [name for name in variants if name != current_text]
+
+
+# Índices compuestos por propietario. No están en Product.Settings.indexes:
+# los crean las migraciones 2 a 4 (python -m app.db.migrations run antes de
+# desplegar, o al arrancar con MIGRATIONS_RUN_ON_STARTUP), no init_beanie.
+# El listado los fuerza con hint, así que deben existir antes de servir.
+
+# Productos activos de un usuario por fecha de creación (migración 2)
+OWNER_CREATED_INDEXES = layout_indexes(
+    [("user_created", ASCENDING), ("created_at", DESCENDING)],
+    "user_created_created_at_active",
+    partialFilterExpression=ACTIVE_FILTER,
+)
+
+# Ordenación del listado: cada clave admitida tiene un índice compuesto con el
+# propietario, de modo que el orden sale del índice (sin etapa SORT en memoria)
+# en ambos sentidos (migración 3).
+OWNER_PRICE_INDEXES = layout_indexes(
+    [("user_created", ASCENDING), ("price", ASCENDING)],
+    "user_created_price_active",
+    partialFilterExpression=ACTIVE_FILTER,
+)
+OWNER_NAME_INDEXES = layout_indexes(
+    [("user_created", ASCENDING), ("name", ASCENDING)],
+    "user_created_name_active",
+    partialFilterExpression=ACTIVE_FILTER,
+)
+# Filtro por etiquetas de los productos de un usuario (índice multikey,
+# migración 4)
+OWNER_TAGS_INDEXES = layout_indexes(
+    [("user_created", ASCENDING), ("tags", ASCENDING)],
+    "user_created_tags_active",
+    partialFilterExpression=ACTIVE_FILTER,
+)
+# Índices del formato configurado, los que fuerza el listado
+SORT_INDEXES = {
+    "price": OWNER_PRICE_INDEXES[0],
+    "created_at": OWNER_CREATED_INDEXES[0],
+    "name": OWNER_NAME_INDEXES[0],
+}
+
+
+def _stored_field(name: str, *args, **kwargs):
+    """Field con alias de almacenamiento; lee documentos en ambos formatos."""
+    return Field(
+        *args,
+        alias=stored(name),
+        validation_alias=AliasChoices(stored(name), name),
+        **kwargs,
+    )
 
 
 class Product(Document):
@@ -13,39 +273,80 @@ class Product(Document):
         name: Nombre del producto
         description: Descripción opcional del producto
         price: Precio del producto (debe ser positivo)
+        tags: Etiquetas (categorías) del producto, normalizadas en minúsculas
         user_created: ID del usuario que creó el producto (indexado)
         created_at: Fecha y hora de creación
         updated_at: Fecha y hora de última actualización
+        deleted_at: Fecha de eliminación lógica (None si está activo)
+        restored_at: Fecha en que se restauró desde el archivo
+
+    Las consultas con filtros en crudo deben usar owner_filter(),
+    stored_filter() y stored_expr() para funcionar con ambos formatos de
+    almacenamiento, también durante la migración entre ellos.
     """
 
     name: str = Field(
         ..., min_length=1, max_length=100, description="Nombre del producto"
     )
-    description: Optional[str] = Field(
-        None, max_length=500, description="Descripción opcional del producto"
+    description: Optional[str] = _stored_field(
+        "description",
+        None,
+        max_length=500,
+        description="Descripción opcional del producto",
     )
-    price: float = Field(
+    price: Price = Field(
         ..., ge=0, description="Precio del producto (debe ser mayor o igual a 0)"
     )
-    user_created: Annotated[str, Indexed()] = Field(
-        ..., description="ID del usuario que creó el producto"
+    tags: list[str] = Field(
+        default_factory=list, description="Etiquetas (categorías) del producto"
+    )
+    user_created: Owner = _stored_field(
+        "user_created", ..., description="ID del usuario que creó el producto"
     )
-    created_at: datetime = Field(
+    created_at: datetime = _stored_field(
+        "created_at",
         default_factory=lambda: datetime.now(timezone.utc),
         description="Fecha y hora de creación del producto",
     )
-    updated_at: Optional[datetime] = Field(
-        None, description="Fecha y hora de última actualización"
+    updated_at: Optional[datetime] = _stored_field(
+        "updated_at", None, description="Fecha y hora de última actualización"
+    )
+    deleted_at: Optional[datetime] = Field(
+        None, description="Fecha y hora de eliminación lógica"
+    )
+    restored_at: Optional[datetime] = Field(
+        None, description="Fecha y hora de restauración desde el archivo"
     )
 
     class Settings:
         name = "products"
+        bson_encoders = {OwnerId: owner_ref}
         indexes = [
-            [
-                ("name", "text"),
-                ("description", "text"),
-            ]
+            *layout_indexes(
+                [("user_created", ASCENDING)],
+                "user_created_active",
+                partialFilterExpression=ACTIVE_FILTER,
+            ),
+            text_index("text_active", partialFilterExpression=ACTIVE_FILTER),
+            # Purga en segundo plano de los productos eliminados lógicamente
+            IndexModel(
+                [("deleted_at", ASCENDING)],
+                name="deleted_at_ttl",
+                expireAfterSeconds=settings.SOFT_DELETE_RETENTION_DAYS * 86400,
+            ),
         ]
+        # Índices del otro formato de almacenamiento (incluidos los de las
+        # migraciones 2 a 4) que drop_outdated_indexes elimina al arrancar
+        retired_indexes = retired_layout_indexes(
+            [
+                "user_created_active",
+                "user_created_created_at_active",
+                "user_created_price_active",
+                "user_created_name_active",
+                "user_created_tags_active",
+            ],
+            "text_active",
+        )
 
     @validator("price")
     def validate_price(cls, v):
@@ -59,3 +360,71 @@ class Product(Document):
 
     def __repr__(self) -> str:
         return f"Product(id={self.id}, name={self.name}, price={self.price}, user_created={self.user_created})"
+
+
+class ProductArchive(Product):
+    """
+    Producto archivado (colección fría) por no haberse modificado en N días.
+
+    Mantiene los mismos campos que Product para poder leerse de forma
+    transparente cuando un producto ya no está en la colección activa.
+
+    Attributes:
+        archived_at: Fecha y hora en que se movió al archivo
+    """
+
+    archived_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Fecha y hora de archivado",
+    )
+
+    class Settings:
+        name = "products_archive"
+        bson_encoders = {OwnerId: owner_ref}
+        indexes = [
+            *layout_indexes([("user_created", ASCENDING)], "user_created"),
+            text_index("text"),
+        ]
+        retired_indexes = retired_layout_indexes(["user_created"], "text")
+
+
+class ProductTagCount(Document):
+    """
+    Número de productos activos de un usuario con una etiqueta.
+
+    Se mantiene con $inc en cada escritura de productos para servir el facet
+    de etiquetas sin agregar la colección products; el trabajo
+    rebuild_tag_counts lo recalcula si se desvía.
+
+    Attributes:
+        user_id: ID del usuario propietario
+        tag: Etiqueta
+        product_count: Productos activos (incluidos los archivados) con la etiqueta
+        updated_at: Fecha y hora de la última actualización
+    """
+
+    user_id: str = Field(..., description="ID del usuario propietario")
+    tag: str = Field(..., description="Etiqueta")
+    product_count: int = Field(0, description="Productos con la etiqueta")
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Fecha y hora de la última actualización",
+    )
+
+    class Settings:
+        name = "product_tag_counts"
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("tag", ASCENDING)],
+                name="user_id_tag",
+                unique=True,
+            ),
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("product_count", DESCENDING),
+                    ("tag", ASCENDING),
+                ],
+                name="user_id_product_count",
+            ),
+        ]
@@ -7,6 +7,8 @@ from app.core.exceptions import (
     FieldRequired,
     FieldTooShort,
 )
+from app.db.resilience import max_time_ms
+from app.dependencies.db import guard_database
 from app.models.user import User
 from app.schemas.user import Token, UserCreate, UserOut
 from app.utils.auth_utils import create_access_token, hash_password, verify_password
@@ -25,6 +27,7 @@ router = APIRouter(
 
 @router.post(
     "/register",
+    dependencies=[Depends(guard_database("auth"))],
     response_model=UserOut,
     status_code=status.HTTP_201_CREATED,
     summary="Registrar nuevo usuario",
@@ -39,7 +42,9 @@ async def register(user_data: UserCreate):
 
     Retorna la información del usuario creado (sin la contraseña).
     """
-    existing_user = await User.find_one(User.email == user_data.email)
+    existing_user = await User.find_one(
+        User.email == user_data.email, max_time_ms=max_time_ms("reads")
+    )
     if existing_user:
         raise EmailAlreadyRegistered()
 
@@ -51,6 +56,7 @@ async def register(user_data: UserCreate):
 
 @router.post(
     "/login",
+    dependencies=[Depends(guard_database("auth"))],
     response_model=Token,
     summary="Iniciar sesión",
     description="Autentica al usuario y devuelve un token JWT",
@@ -72,7 +78,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         raise FieldRequired("password")
     if form_data.password == "":
         raise FieldTooShort("password")
-    user = await User.find_one(User.email == form_data.username)
+    user = await User.find_one(
+        User.email == form_data.username, max_time_ms=max_time_ms("reads")
+    )
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise CredentialsException()
 
@@ -0,0 +1,115 @@
+import os
+
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import FileResponse
+
+from app.core.exceptions import (
+    AdminRequired,
+    JobNotFound,
+    JobOutputUnavailable,
+    JobTypeUnknown,
+)
+from app.db.resilience import max_time_ms
+from app.dependencies.auth import get_current_user_id, is_admin
+from app.dependencies.db import guard_database
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobOut
+from app.services.jobs import get_job_handler, is_admin_only
+from app.services.product_export import export_output
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={
+        400: {"description": "Bad request"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden"},
+        404: {"description": "Not found"},
+    },
+)
+
+
+@router.post(
+    "/",
+    dependencies=[Depends(guard_database("writes"))],
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Encolar trabajo en segundo plano",
+    description="Encola una operación pesada para ejecutarla fuera de la petición",
+)
+async def create_job(
+    job_data: JobCreate,
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Encola un nuevo trabajo en segundo plano.
+
+    - **type**: Tipo de trabajo registrado (por ejemplo archive_products)
+    - **params**: Parámetros específicos del trabajo
+
+    Los trabajos de mantenimiento (archive_products, compact_product_layout,
+    run_migrations, rebuild_tag_counts) solo los encolan administradores.
+    Retorna el trabajo en estado queued; su avance se consulta con GET /jobs/{id}.
+    """
+    if get_job_handler(job_data.type) is None:
+        raise JobTypeUnknown()
+    if is_admin_only(job_data.type) and not is_admin(user_id):
+        raise AdminRequired()
+
+    job = Job(type=job_data.type, params=job_data.params, user_id=user_id)
+    await job.insert()
+
+    pool = getattr(request.app.state, "job_pool", None)
+    if pool:
+        pool.notify()
+    return job
+
+
+@router.get(
+    "/{job_id}",
+    dependencies=[Depends(guard_database("reads"))],
+    response_model=JobOut,
+    summary="Consultar estado de un trabajo",
+    description="Obtiene el estado y progreso de un trabajo del usuario",
+)
+async def get_job(
+    job_id: PydanticObjectId, user_id: str = Depends(get_current_user_id)
+):
+    """
+    Obtiene el estado, progreso y resultado de un trabajo.
+
+    Solo puede consultarlo el usuario que lo creó.
+    """
+    job = await Job.get(job_id)
+    if not job or job.user_id != user_id:
+        raise JobNotFound()
+    return job
+
+
+@router.get(
+    "/{job_id}/download",
+    dependencies=[Depends(guard_database("reads"))],
+    response_class=FileResponse,
+    responses={409: {"description": "Job has no downloadable output"}},
+    summary="Descargar el resultado de un trabajo",
+    description="Descarga el fichero generado por una exportación terminada",
+)
+async def download_job_output(
+    job_id: PydanticObjectId, user_id: str = Depends(get_current_user_id)
+):
+    """
+    Descarga el fichero generado por un trabajo export_products.
+
+    Solo puede descargarlo el usuario que lo creó y una vez completado;
+    mientras tanto, o si el fichero ya no existe, responde 409.
+    """
+    job = await Job.get(job_id, max_time_ms=max_time_ms("reads"))
+    if not job or job.user_id != user_id:
+        raise JobNotFound()
+    output = export_output(job)
+    if output is None:
+        raise JobOutputUnavailable()
+    path, media_type = output
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
@@ -1,12 +1,55 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, status
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorClientSession
 
-from app.dependencies.auth import get_current_user_id
+from app.core.config import settings
+from app.core.deadlines import track_cursor
+from app.core.exceptions import ImportFormatUnsupported, ProductSortUnsupported
+from app.db.mongo import get_collection
+from app.db.resilience import max_time_ms
+from app.db.write_coalescer import WriteCoalescer
+from app.dependencies.auth import get_current_user_id, is_admin
+from app.dependencies.db import (
+    DatabaseGuard,
+    get_causal_session,
+    get_write_coalescer,
+    guard_database,
+)
+from app.dependencies.idempotency import get_idempotency_key
 from app.dependencies.products import get_valid_product
-from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
+from app.models.product import (
+    ACTIVE_FILTER,
+    Product,
+    ProductArchive,
+    owner_filter,
+    stored_expr,
+    to_stored,
+)
+from app.schemas.product import (
+    ProductCreate,
+    ProductLookup,
+    ProductOut,
+    ProductStatsOut,
+    ProductUpdate,
+    Tag,
+    TagCountOut,
+)
+from app.services.idempotency import idempotency
+from app.services.product_export import (
+    ExportCompression,
+    ExportFormat,
+    build_export_filter,
+    require_pyarrow,
+    stream_export,
+)
+from app.services.product_import import ImportFormat, import_products
+from app.services.product_sort import ProductSort, sort_options
+from app.services.product_stats import get_price_stats, price_stats_cache, require_numpy
+from app.services.product_tags import apply_tag_deltas, get_tag_counts, tag_deltas
 
 router = APIRouter(
     prefix="/products",
@@ -22,6 +65,7 @@ router = APIRouter(
 
 @router.get(
     "/",
+    dependencies=[Depends(guard_database("reads"))],
     response_model=List[ProductOut],
     summary="Obtener todos los productos del usuario",
     description="Lista todos los productos creados por el usuario autenticado con filtros opcionales",
@@ -31,6 +75,15 @@ async def get_all_products(
     min_price: float = 0.0,
     max_price: float = 1000000.0,  # A large default value
     query: Optional[str] = None,
+    include_archived: bool = False,
+    ids: Optional[List[PydanticObjectId]] = Query(
+        None, max_length=settings.PRODUCT_LOOKUP_MAX_IDS
+    ),
+    tags: Optional[List[Tag]] = Query(None, max_length=20),
+    tags_match: Literal["all", "any"] = "all",
+    sort: Optional[ProductSort] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
 ):
     """
     Obtiene todos los productos del usuario autenticado.
@@ -38,23 +91,113 @@ async def get_all_products(
     - **min_price**: Filtrar productos con precio mayor o igual a este valor
     - **max_price**: Filtrar productos con precio menor o igual a este valor
     - **query**: Búsqueda de texto en nombre y descripción del producto
+    - **include_archived**: Incluir también los productos archivados
+    - **ids**: Limitar a estos IDs (`?ids=a&ids=b`), en una sola consulta
+    - **tags**: Filtrar por etiquetas (`?tags=a&tags=b`)
+    - **tags_match**: all (todas las etiquetas) o any (alguna)
+    - **sort**: price, created_at o name; con "-" delante, descendente
+    - **limit**: Número máximo de productos (top-k junto con sort)
 
     Retorna una lista de productos que pertenecen al usuario autenticado.
+    La lectura se sirve preferentemente desde un secundario, dentro de una
+    sesión causal para que el usuario vea sus propias escrituras.
+
+    Cada orden lo resuelve un índice compuesto con el propietario, así que
+    con limit solo se leen k entradas del índice. El filtro por etiquetas usa
+    el índice multikey (user_created, tags). La ordenación no se puede
+    combinar con query ni con include_archived.
     """
-    find_query = {"user_created": user_id}
+    if sort and (query or include_archived):
+        raise ProductSortUnsupported()
+    sort_spec, hint = sort_options(sort) if sort else (None, None)
+
+    find_query = {**owner_filter(user_id), **ACTIVE_FILTER}
     if query:
         find_query["$text"] = {"$search": query}
+    if ids:
+        find_query["_id"] = {"$in": list(dict.fromkeys(ids))}
+    if tags:
+        find_query["tags"] = {"$all" if tags_match == "all" else "$in": tags}
 
-    products = await Product.find(
+    filter_query = Product.find(
         find_query,
         Product.price >= min_price,
         Product.price <= max_price,
-    ).to_list()
+    ).get_filter_query()
+    cursor = track_cursor(
+        get_collection(Product, "secondary_preferred").find(
+            filter_query,
+            session=session,
+            max_time_ms=max_time_ms("reads"),
+            sort=sort_spec,
+            hint=hint,
+            limit=limit or 0,
+        )
+    )
+    products = [Product.model_validate(doc) async for doc in cursor]
+    if include_archived and not (limit and len(products) >= limit):
+        archive_cursor = track_cursor(
+            get_collection(ProductArchive, "secondary_preferred").find(
+                filter_query,
+                session=session,
+                max_time_ms=max_time_ms("reads"),
+                limit=limit - len(products) if limit else 0,
+            )
+        )
+        products += [Product.model_validate(doc) async for doc in archive_cursor]
     return products
 
 
+@router.post(
+    "/lookup",
+    dependencies=[Depends(guard_database("reads"))],
+    response_model=List[ProductOut],
+    summary="Obtener varios productos por ID",
+    description="Obtiene en una sola consulta los productos del usuario con los IDs indicados",
+)
+async def lookup_products(
+    data: ProductLookup,
+    user_id: str = Depends(get_current_user_id),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
+):
+    """
+    Obtiene varios productos por ID con un único find con $in.
+
+    - **ids**: IDs a obtener (como máximo PRODUCT_LOOKUP_MAX_IDS)
+
+    Pensado para carritos y listas de seguimiento, que de otro modo harían
+    una petición GET /products/{product_id} por producto. Los productos se
+    devuelven en el orden pedido; los que no existen, están eliminados o no
+    pertenecen al usuario se omiten. Si el archivado está habilitado, los IDs
+    no encontrados se buscan también en products_archive.
+    """
+    ids = list(dict.fromkeys(data.ids))
+    find_query = {**owner_filter(user_id), **ACTIVE_FILTER}
+    found = {}
+    for model in (Product, ProductArchive):
+        missing = [product_id for product_id in ids if product_id not in found]
+        if not missing or (
+            model is ProductArchive and settings.PRODUCT_ARCHIVE_AFTER_DAYS is None
+        ):
+            break
+        cursor = track_cursor(
+            get_collection(model, "secondary_preferred").find(
+                {"_id": {"$in": missing}, **find_query},
+                session=session,
+                max_time_ms=max_time_ms("reads"),
+            )
+        )
+        found.update({doc["_id"]: doc async for doc in cursor})
+    return [
+        Product.model_validate(found[product_id])
+        for product_id in ids
+        if product_id in found
+    ]
+
+
 @router.get(
     "/aggregation/by_user",
+    dependencies=[Depends(guard_database("analytics"))],
     response_model=dict,
     summary="Estadísticas de productos por usuario",
     description="Obtiene el conteo de productos agrupados por usuario",
@@ -67,23 +210,127 @@ async def aggregate_products_by_user():
     que ha creado cada usuario en el sistema.
     """
     pipeline = [
-        {"$group": {"_id": "$user_created", "count": {"$sum": 1}}},
+        {"$match": ACTIVE_FILTER},
+        {
+            "$group": {
+                "_id": {"$toString": stored_expr("user_created")},
+                "count": {"$sum": 1},
+            }
+        },
         {"$project": {"user_id": "$_id", "count": 1, "_id": 0}},
     ]
-    result = await Product.get_pymongo_collection().aggregate(pipeline).to_list()
+    collection = get_collection(Product, "secondary_preferred")
+    cursor = track_cursor(
+        collection.aggregate(pipeline, maxTimeMS=max_time_ms("analytics"))
+    )
+    result = await cursor.to_list()
 
     return {"data": result}
 
 
+@router.get(
+    "/stats",
+    dependencies=[Depends(guard_database("analytics"))],
+    response_model=ProductStatsOut,
+    summary="Estadísticas de precio del usuario",
+    description="Percentiles, desviación típica, totales e histograma de precios",
+)
+async def get_product_stats(
+    user_id: str = Depends(get_current_user_id),
+    bins: int = Query(10, ge=1, le=100),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
+):
+    """
+    Obtiene estadísticas de precio de los productos del usuario autenticado.
+
+    - **bins**: Número de intervalos del histograma
+
+    Los precios se leen con proyección, dentro de la sesión causal del
+    usuario, y se calculan de forma vectorizada con NumPy. El resultado se
+    cachea por usuario y se invalida con sus escrituras.
+    """
+    require_numpy()
+    return await get_price_stats(user_id, bins, session)
+
+
+@router.get(
+    "/tags",
+    dependencies=[Depends(guard_database("reads"))],
+    response_model=List[TagCountOut],
+    summary="Etiquetas del usuario",
+    description="Número de productos activos por etiqueta, de más a menos frecuente",
+)
+async def get_product_tags(
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
+):
+    """
+    Obtiene el facet de etiquetas del usuario autenticado.
+
+    - **limit**: Número máximo de etiquetas
+
+    Se sirve desde contadores que se actualizan con cada escritura, así que
+    no recorre los productos. Para navegar por una categoría, usar
+    GET /products?tags=etiqueta.
+    """
+    return await get_tag_counts(user_id, limit, session=session)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Exportar productos en formato columnar",
+    description="Exporta productos como Parquet o Arrow IPC para análisis",
+)
+async def export_products(
+    user_id: str = Depends(get_current_user_id),
+    guard: DatabaseGuard = Depends(guard_database("analytics")),
+    format: ExportFormat = "parquet",
+    compression: ExportCompression = "zstd",
+    user_created: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    Exporta productos en streaming como Parquet o Arrow IPC.
+
+    - **format**: parquet o arrow
+    - **compression**: códec de compresión (en arrow solo lz4 y zstd)
+    - **user_created**: filtrar por usuario (solo administradores)
+    - **created_from** / **created_to**: rango de fechas de creación
+
+    Los usuarios no administradores solo exportan sus propios productos.
+    Requiere la dependencia opcional pyarrow.
+    """
+    require_pyarrow()
+    if not is_admin(user_id):
+        user_created = user_id
+    query = build_export_filter(user_created, created_from, created_to)
+    return guard.stream(
+        stream_export(query, format, compression, settings.EXPORT_BATCH_SIZE),
+        media_type="application/vnd.apache.parquet"
+        if format == "parquet"
+        else "application/vnd.apache.arrow.stream",
+        headers={"Content-Disposition": f"attachment; filename=products.{format}"},
+    )
+
+
 @router.post(
     "/",
+    dependencies=[Depends(guard_database("writes"))],
     response_model=ProductOut,
     status_code=status.HTTP_201_CREATED,
     summary="Crear nuevo producto",
     description="Crea un nuevo producto asociado al usuario autenticado",
 )
 async def create_product(
-    product_data: ProductCreate, user_id: str = Depends(get_current_user_id)
+    product_data: ProductCreate,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
+    coalescer: Optional[WriteCoalescer] = Depends(get_write_coalescer),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
 ):
     """
     Crea un nuevo producto.
@@ -91,16 +338,89 @@ async def create_product(
     - **name**: Nombre del producto (requerido)
     - **description**: Descripción opcional del producto
     - **price**: Precio del producto (debe ser mayor o igual a 0)
+    - **tags**: Etiquetas opcionales (se guardan en minúsculas y sin repetir)
 
     El producto se asocia automáticamente al usuario autenticado.
+    Si el coalescer de escrituras está habilitado, la inserción se agrupa con
+    otras concurrentes en un único insert_many. Con la cabecera Idempotency-Key
+    los reintentos devuelven la respuesta original sin crear duplicados.
     """
-    product = Product(**product_data.model_dump(), user_created=user_id)
-    await product.insert()
-    return product
+
+    async def insert_product() -> dict:
+        product = Product(**product_data.model_dump(), user_created=user_id)
+        if coalescer:
+            await coalescer.insert(product, session=session)
+        else:
+            await product.insert(session=session)
+        await apply_tag_deltas(user_id, tag_deltas([], product.tags), session=session)
+        return ProductOut.model_validate(product).model_dump(mode="json")
+
+    result, replayed = await idempotency.execute(
+        user_id,
+        "create_product",
+        idempotency_key,
+        product_data.model_dump(mode="json"),
+        insert_product,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    else:
+        price_stats_cache.invalidate(user_id)
+    return result
+
+
+@router.post(
+    "/import",
+    response_class=StreamingResponse,
+    summary="Importar productos en bloque",
+    description="Importa productos desde un cuerpo CSV o NDJSON (opcionalmente gzip)",
+)
+async def bulk_import_products(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    guard: DatabaseGuard = Depends(guard_database("writes")),
+    format: Optional[ImportFormat] = None,
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+):
+    """
+    Importa productos leyendo el cuerpo de la petición de forma incremental.
+
+    - **format**: csv o ndjson; por defecto se deduce del Content-Type
+    - Content-Encoding: gzip para cuerpos comprimidos
+    - Idempotency-Key: reintentar la misma subida no crea duplicados
+
+    Retorna un informe NDJSON con una línea por fila fallida y un resumen final.
+    """
+    content_type = request.headers.get("content-type", "")
+    if format is None:
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise ImportFormatUnsupported()
+    compressed = request.headers.get("content-encoding", "").lower() == "gzip"
+
+    async def report():
+        async for line in import_products(
+            request.stream(),
+            user_id,
+            format,
+            compressed=compressed,
+            idempotency_key=idempotency_key,
+            batch_size=settings.IMPORT_BATCH_SIZE,
+            max_reported_errors=settings.IMPORT_MAX_REPORTED_ERRORS,
+            max_line_length=settings.IMPORT_MAX_LINE_LENGTH,
+        ):
+            yield line
+        price_stats_cache.invalidate(user_id)
+
+    return guard.stream(report(), media_type="application/x-ndjson")
 
 
 @router.get(
     "/{product_id}",
+    dependencies=[Depends(guard_database("reads"))],
     response_model=ProductOut,
     summary="Obtener producto por ID",
     description="Obtiene un producto específico por su ID (solo si pertenece al usuario)",
@@ -117,12 +437,17 @@ async def get_one_product(product: Product = Depends(get_valid_product)):
 
 @router.put(
     "/{product_id}",
+    dependencies=[Depends(guard_database("writes"))],
     response_model=ProductOut,
     summary="Actualizar producto",
     description="Actualiza un producto existente (solo si pertenece al usuario)",
 )
 async def update_product(
-    data: ProductUpdate, product: Product = Depends(get_valid_product)
+    data: ProductUpdate,
+    response: Response,
+    product: Product = Depends(get_valid_product),
+    session: AsyncIOMotorClientSession = Depends(get_causal_session),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
 ):
     """
     Actualiza un producto existente.
@@ -132,16 +457,42 @@ async def update_product(
     - Actualiza automáticamente el campo updated_at con la fecha actual
 
     Los campos no enviados en la petición mantienen su valor actual.
+    Con la cabecera Idempotency-Key los reintentos devuelven la respuesta original.
     """
-    update_data = data.model_dump(exclude_unset=True)
-    update_data["updated_at"] = datetime.now(timezone.utc)
-    await product.set(update_data)
-    updated_product = await Product.get(product.id)
-    return updated_product
+
+    async def apply_update() -> dict:
+        update_data = data.model_dump(exclude_unset=True)
+        update_data["updated_at"] = datetime.now(timezone.utc)
+        if "tags" in update_data:
+            update_data["tags"] = update_data["tags"] or []
+        old_tags = product.tags
+        await product.set(to_stored(update_data), session=session)
+        if "tags" in update_data:
+            await apply_tag_deltas(
+                product.user_created,
+                tag_deltas(old_tags, update_data["tags"]),
+                session=session,
+            )
+        updated_product = await Product.get(product.id, session=session)
+        return ProductOut.model_validate(updated_product).model_dump(mode="json")
+
+    result, replayed = await idempotency.execute(
+        product.user_created,
+        f"update_product:{product.id}",
+        idempotency_key,
+        data.model_dump(mode="json", exclude_unset=True),
+        apply_update,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    else:
+        price_stats_cache.invalidate(product.user_created)
+    return result
 
 
 @router.delete(
     "/{product_id}",
+    dependencies=[Depends(guard_database("writes"))],
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Eliminar producto",
     description="Elimina un producto existente (solo si pertenece al usuario)",
@@ -151,8 +502,11 @@ async def delete_product(product: Product = Depends(get_valid_product)):
     Elimina un producto existente.
 
     - Solo puede eliminar el usuario que creó el producto
-    - La eliminación es permanente y no se puede deshacer
+    - La eliminación es lógica: se marca deleted_at y el producto deja de ser
+      visible; un índice TTL lo purga tras SOFT_DELETE_RETENTION_DAYS días
     - Retorna status 204 (No Content) si la eliminación es exitosa
     """
-    await product.delete()
+    await product.set({"deleted_at": datetime.now(timezone.utc)})
+    await apply_tag_deltas(product.user_created, tag_deltas(product.tags, []))
+    price_stats_cache.invalidate(product.user_created)
     return None
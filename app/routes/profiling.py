@@ -0,0 +1,140 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response, status
+
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import continuous_profile, render_session, require_pyinstrument
+from app.db.slow_queries import slow_query_listener
+from app.dependencies.auth import get_admin_user_id
+from app.services.product_layout import storage_report
+from app.services.product_sort import explain_sorts
+
+router = APIRouter(
+    prefix="/profiling",
+    tags=["profiling"],
+    responses={
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden"},
+    },
+)
+
+
+@router.get(
+    "/",
+    summary="Perfil continuo agregado",
+    description="Desglose por ruta o perfil combinado de las peticiones muestreadas",
+)
+async def get_continuous_profile(
+    format: Literal["json", "speedscope", "html"] = Query("json"),
+    _: str = Depends(get_admin_user_id),
+):
+    """
+    Devuelve la vista agregada del profiling continuo.
+
+    - **format**: json (desglose en ms por ruta y categoría: database,
+      validation, json, jwt, password_hashing, other), speedscope o html
+      (perfil combinado de las últimas sesiones)
+    """
+    if format == "json":
+        return continuous_profile.summary()
+    require_pyinstrument()
+    session = continuous_profile.combined_session()
+    if session is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    body, media_type = render_session(session, format)
+    return Response(content=body, media_type=media_type)
+
+
+@router.delete(
+    "/",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Reiniciar perfil continuo",
+)
+async def reset_continuous_profile(_: str = Depends(get_admin_user_id)):
+    """Descarta las sesiones y el desglose acumulados."""
+    continuous_profile.reset()
+    return None
+
+
+@router.get(
+    "/slow-queries",
+    summary="Consultas lentas",
+    description="Comandos Mongo que superaron SLOW_QUERY_THRESHOLD_MS, con su explain",
+)
+async def get_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    _: str = Depends(get_admin_user_id),
+):
+    """
+    Devuelve las consultas lentas agrupadas por forma y las más recientes.
+
+    Cada forma incluye rutas de origen, número de ejecuciones, tiempos y el
+    resumen de explain("executionStats"): etapas del plan (p. ej. COLLSCAN),
+    índices y documentos examinados frente a devueltos.
+
+    - **limit**: Número máximo de comandos recientes
+    """
+    return slow_query_listener.snapshot(limit)
+
+
+@router.delete(
+    "/slow-queries",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Reiniciar registro de consultas lentas",
+)
+async def reset_slow_queries(_: str = Depends(get_admin_user_id)):
+    """Descarta las consultas lentas registradas."""
+    slow_query_listener.reset()
+    return None
+
+
+@router.get(
+    "/event-loop",
+    summary="Bloqueos del event loop",
+    description="Histograma de retraso del loop y puntos de llamada que lo bloquearon",
+)
+async def get_event_loop_report(_: str = Depends(get_admin_user_id)):
+    """
+    Devuelve el retraso del event loop y dónde se bloqueó.
+
+    Cada punto de llamada incluye cuántas veces superó LOOP_MONITOR_THRESHOLD_MS,
+    el mayor retraso observado y la pila capturada durante el bloqueo.
+    """
+    return loop_monitor.snapshot()
+
+
+@router.get(
+    "/storage",
+    summary="Almacenamiento de productos",
+    description="Tamaño de datos e índices de las colecciones de productos",
+)
+async def get_storage_report(_: str = Depends(get_admin_user_id)):
+    """
+    Devuelve el tamaño de documentos, almacenamiento e índices ($collStats).
+
+    Permite comparar el formato estándar con el compacto
+    (PRODUCT_COMPACT_STORAGE) antes y después del trabajo compact_product_layout.
+    """
+    return await storage_report()
+
+
+@router.get(
+    "/sort-plans",
+    summary="Planes de las ordenaciones del listado",
+    description="Explain de cada ordenación admitida en GET /products",
+)
+async def get_sort_plans(
+    user_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=1000),
+    admin_id: str = Depends(get_admin_user_id),
+):
+    """
+    Comprueba que cada ordenación admitida se resuelve con su índice.
+
+    - **user_id**: Usuario cuyos productos se consultan (por defecto, el propio)
+    - **limit**: Límite top-k de la consulta
+
+    Cada clave debe tener blocking_sort en false; un true indica que el
+    índice falta o no cubre el orden y MongoDB ordena en memoria.
+    """
+    return await explain_sorts(user_id or admin_id, limit)
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobCreate(BaseModel):
+    """Schema para encolar un trabajo en segundo plano"""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {"type": "archive_products", "params": {"older_than_days": 90}}
+        }
+    )
+
+    type: str = Field(..., min_length=1, description="Tipo de trabajo")
+    params: dict = Field(default_factory=dict, description="Parámetros del trabajo")
+
+
+class JobOut(BaseModel):
+    """Schema para la respuesta de un trabajo"""
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": "507f1f77bcf86cd799439011",
+                "type": "archive_products",
+                "status": "running",
+                "progress": 0.4,
+                "message": "Archiving batch 4",
+                "result": None,
+                "error": None,
+                "attempts": 1,
+                "created_at": "2024-01-15T10:30:00Z",
+                "started_at": "2024-01-15T10:30:01Z",
+                "finished_at": None,
+            }
+        },
+    )
+
+    id: PydanticObjectId = Field(..., description="ID único del trabajo")
+    type: str = Field(..., description="Tipo de trabajo")
+    status: str = Field(..., description="Estado del trabajo")
+    progress: float = Field(..., description="Progreso entre 0 y 1")
+    message: Optional[str] = Field(None, description="Último mensaje de progreso")
+    result: Optional[dict] = Field(None, description="Resultado del trabajo")
+    error: Optional[str] = Field(None, description="Error del último intento")
+    attempts: int = Field(..., description="Número de intentos realizados")
+    created_at: datetime = Field(..., description="Fecha y hora de creación")
+    started_at: Optional[datetime] = Field(None, description="Inicio del trabajo")
+    finished_at: Optional[datetime] = Field(None, description="Fin del trabajo")
@@ -1,8 +1,39 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 
 from beanie import PydanticObjectId
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import (
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    field_validator,
+)
+
+from app.core.config import settings
+
+Tag = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True, to_lower=True, min_length=1, max_length=50
+    ),
+]
+
+
+def split_tags(value):
+    """Admite las etiquetas como lista o como texto separado por comas (CSV)."""
+    if isinstance(value, str):
+        return [tag for tag in value.split(",") if tag.strip()]
+    return value
+
+
+def unique_tags(tags: Optional[list[str]]) -> Optional[list[str]]:
+    """Elimina etiquetas repetidas conservando el orden."""
+    return list(dict.fromkeys(tags)) if tags is not None else None
+
+
+Tags = Annotated[list[Tag], BeforeValidator(split_tags)]
 
 
 class ProductCreate(BaseModel):
@@ -14,6 +45,7 @@ class ProductCreate(BaseModel):
                 "name": "Laptop Gaming",
                 "description": "Laptop para gaming con RTX 4060",
                 "price": 1299.99,
+                "tags": ["laptops", "gaming"],
             }
         }
     )
@@ -30,6 +62,11 @@ class ProductCreate(BaseModel):
         le=999999.99,
         description="Precio del producto (debe ser mayor o igual a 0)",
     )
+    tags: Tags = Field(
+        default_factory=list, max_length=20, description="Etiquetas del producto"
+    )
+
+    _unique_tags = field_validator("tags")(unique_tags)
 
 
 class ProductUpdate(BaseModel):
@@ -41,6 +78,7 @@ class ProductUpdate(BaseModel):
                 "name": "Laptop Gaming Actualizada",
                 "description": "Nueva descripción del producto",
                 "price": 1199.99,
+                "tags": ["laptops"],
             }
         }
     )
@@ -54,6 +92,30 @@ class ProductUpdate(BaseModel):
     price: Optional[float] = Field(
         None, ge=0, le=999999.99, description="Precio del producto"
     )
+    tags: Optional[Tags] = Field(
+        None,
+        max_length=20,
+        description="Etiquetas del producto (reemplaza las actuales)",
+    )
+
+    _unique_tags = field_validator("tags")(unique_tags)
+
+
+class ProductLookup(BaseModel):
+    """Schema para obtener varios productos por ID"""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {"ids": ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439013"]}
+        }
+    )
+
+    ids: list[PydanticObjectId] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.PRODUCT_LOOKUP_MAX_IDS,
+        description="IDs de los productos",
+    )
 
 
 class ProductOut(BaseModel):
@@ -67,6 +129,7 @@ class ProductOut(BaseModel):
                 "name": "Laptop Gaming",
                 "description": "Laptop para gaming con RTX 4060",
                 "price": 1299.99,
+                "tags": ["laptops", "gaming"],
                 "user_created": "507f1f77bcf86cd799439012",
                 "created_at": "2024-01-15T10:30:00Z",
                 "updated_at": "2024-01-15T15:45:00Z",
@@ -78,8 +141,53 @@ class ProductOut(BaseModel):
     name: str = Field(..., description="Nombre del producto")
     description: Optional[str] = Field(None, description="Descripción del producto")
     price: float = Field(..., description="Precio del producto")
+    tags: list[str] = Field(default_factory=list, description="Etiquetas del producto")
     user_created: str = Field(..., description="ID del usuario que creó el producto")
     created_at: datetime = Field(..., description="Fecha y hora de creación")
     updated_at: Optional[datetime] = Field(
         None, description="Fecha y hora de última actualización"
     )
+
+
+class TagCountOut(BaseModel):
+    """Schema del número de productos por etiqueta"""
+
+    tag: str = Field(..., description="Etiqueta")
+    count: int = Field(..., description="Productos activos con la etiqueta")
+
+
+class PriceHistogram(BaseModel):
+    """Schema del histograma de precios"""
+
+    edges: list[float] = Field(..., description="Límites de los intervalos")
+    counts: list[int] = Field(..., description="Productos por intervalo")
+
+
+class ProductStatsOut(BaseModel):
+    """Schema para las estadísticas de precio del usuario"""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "count": 3,
+                "total": 60.0,
+                "mean": 20.0,
+                "stddev": 8.16,
+                "min": 10.0,
+                "max": 30.0,
+                "percentiles": {"p50": 20.0, "p90": 28.0, "p99": 29.8},
+                "histogram": {"edges": [10.0, 20.0, 30.0], "counts": [1, 2]},
+            }
+        }
+    )
+
+    count: int = Field(..., description="Número de productos")
+    total: float = Field(..., description="Suma de precios")
+    mean: Optional[float] = Field(None, description="Precio medio")
+    stddev: Optional[float] = Field(None, description="Desviación típica")
+    min: Optional[float] = Field(None, description="Precio mínimo")
+    max: Optional[float] = Field(None, description="Precio máximo")
+    percentiles: dict[str, Optional[float]] = Field(
+        ..., description="Percentiles p50, p90 y p99"
+    )
+    histogram: PriceHistogram = Field(..., description="Histograma de precios")
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from app.models.idempotency import IdempotencyRecord
+
+POLL_INTERVAL_SECONDS = 0.05
+
+
+def fingerprint_payload(payload: Any) -> str:
+    """Calcula un hash estable del cuerpo de la petición."""
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Ejecuta escrituras una sola vez por Idempotency-Key.
+
+    Las respuestas se guardan en la colección idempotency_keys (con TTL) y en
+    una caché en memoria delante de ella. Las peticiones duplicadas que llegan
+    mientras la original sigue ejecutándose esperan su resultado: en el mismo
+    proceso a través de un future compartido, y entre réplicas consultando el
+    registro "in_progress" hasta que se completa. La reserva de la clave
+    caduca tras lease_seconds, de modo que si el proceso que la tenía muere
+    a mitad de la petición un reintento posterior puede tomarla.
+
+    Attributes:
+        cache_size: Número máximo de respuestas en la caché en memoria
+        wait_seconds: Tiempo máximo de espera por una ejecución de otra réplica
+        lease_seconds: Duración de la reserva de una clave
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 10000,
+        wait_seconds: float = 10.0,
+        lease_seconds: float = 60.0,
+    ):
+        self.cache_size = cache_size
+        self.wait_seconds = wait_seconds
+        self.lease_seconds = lease_seconds
+        self._cache: OrderedDict[str, tuple[str, dict, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def execute(
+        self,
+        user_id: str,
+        scope: str,
+        idempotency_key: Optional[str],
+        payload: Any,
+        operation: Callable[[], Awaitable[dict]],
+    ) -> tuple[dict, bool]:
+        """
+        Ejecuta la operación o devuelve la respuesta almacenada para la clave.
+
+        Args:
+            user_id: ID del usuario autenticado
+            scope: Operación (y recurso) a la que se aplica la clave
+            idempotency_key: Valor de la cabecera Idempotency-Key (opcional)
+            payload: Cuerpo de la petición, para detectar reutilización de claves
+            operation: Corrutina que realiza la escritura y devuelve la respuesta
+
+        Returns:
+            Tupla (respuesta, repetida) donde repetida indica que no se ejecutó
+
+        Raises:
+            IdempotencyKeyReused: Si la clave se usó con otro cuerpo
+            IdempotencyKeyInProgress: Si otra réplica no terminó a tiempo
+        """
+        if not idempotency_key:
+            return await operation(), False
+
+        key = f"{user_id}:{scope}:{idempotency_key}"
+        fingerprint = fingerprint_payload(payload)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._replay(fingerprint, *cached), True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            stored_fingerprint, response = await asyncio.shield(inflight)
+            return self._replay(fingerprint, stored_fingerprint, response), True
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        claim = uuid.uuid4().hex
+        try:
+            record = await self._claim(key, fingerprint, claim)
+            if record is not None:
+                self._cache_set(key, record.fingerprint, record.response)
+                future.set_result((record.fingerprint, record.response))
+                return self._replay(
+                    fingerprint, record.fingerprint, record.response
+                ), True
+
+            try:
+                response = await operation()
+            except BaseException:
+                await self._release(key, claim)
+                raise
+
+            await self._complete(key, claim, response)
+            self._cache_set(key, fingerprint, response)
+            future.set_result((fingerprint, response))
+            return response, False
+        except BaseException as exc:
+            if not future.done():
+                future.set_exception(exc)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _claim(
+        self, key: str, fingerprint: str, claim: str
+    ) -> Optional[IdempotencyRecord]:
+        """
+        Reserva la clave; si ya existe, espera a que su ejecución termine.
+
+        Una reserva caducada (su proceso murió sin completarla ni liberarla)
+        se toma con una actualización condicionada a que siga caducada, así
+        que solo una de las peticiones que esperan la consigue.
+
+        Args:
+            key: Clave con su ámbito
+            fingerprint: Hash del cuerpo de la petición
+            claim: Identificador de esta ejecución
+
+        Returns:
+            None si la clave quedó reservada para esta petición, o el registro
+            completado de una ejecución anterior
+
+        Raises:
+            IdempotencyKeyInProgress: Si la reserva de otra ejecución sigue
+                vigente al agotarse wait_seconds
+        """
+        collection = IdempotencyRecord.get_pymongo_collection()
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            now = datetime.now(timezone.utc)
+            lease = timedelta(seconds=self.lease_seconds)
+            try:
+                await IdempotencyRecord(
+                    key=key,
+                    fingerprint=fingerprint,
+                    claim=claim,
+                    lease_until=now + lease,
+                ).insert()
+                return None
+            except DuplicateKeyError:
+                pass
+
+            taken = await collection.update_one(
+                {
+                    "key": key,
+                    "status": "in_progress",
+                    "$or": [
+                        {"lease_until": {"$lt": now}},
+                        # Registros anteriores a las reservas con caducidad
+                        {"lease_until": None, "created_at": {"$lt": now - lease}},
+                    ],
+                },
+                {
+                    "$set": {
+                        "fingerprint": fingerprint,
+                        "claim": claim,
+                        "lease_until": now + lease,
+                    }
+                },
+            )
+            if taken.modified_count:
+                return None
+
+            record = await IdempotencyRecord.find_one(IdempotencyRecord.key == key)
+            if record is None:
+                # La ejecución original falló y liberó la clave: se reintenta
+                continue
+            if record.status == "completed":
+                return record
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgress()
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    async def _complete(self, key: str, claim: str, response: dict) -> None:
+        await IdempotencyRecord.find_one(
+            IdempotencyRecord.key == key, IdempotencyRecord.claim == claim
+        ).update({"$set": {"status": "completed", "response": response}})
+
+    async def _release(self, key: str, claim: str) -> None:
+        """Libera la clave si la ejecución falló, para permitir reintentos."""
+        await IdempotencyRecord.find_one(
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.claim == claim,
+            IdempotencyRecord.status == "in_progress",
+        ).delete()
+
+    def _replay(
+        self, fingerprint: str, stored_fingerprint: str, response: dict
+    ) -> dict:
+        if fingerprint != stored_fingerprint:
+            raise IdempotencyKeyReused()
+        return response
+
+    def _cache_get(self, key: str) -> Optional[tuple[str, dict]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_fingerprint, response, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return stored_fingerprint, response
+
+    def _cache_set(self, key: str, fingerprint: str, response: dict) -> None:
+        expires_at = time.monotonic() + settings.IDEMPOTENCY_KEY_TTL_SECONDS
+        self._cache[key] = (fingerprint, response, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+idempotency = IdempotencyService(
+    cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS,
+)
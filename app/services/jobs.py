@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+
+from app.core.exceptions import AdminRequired
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[["JobContext"], Awaitable[Optional[dict]]]
+
+# Errores que no se arreglan reintentando: el trabajo falla al primer intento
+NON_RETRYABLE_ERRORS = (AdminRequired, ValueError)
+
+_handlers: dict[str, JobHandler] = {}
+_admin_only: set[str] = set()
+
+
+def job_handler(
+    job_type: str, admin_only: bool = False
+) -> Callable[[JobHandler], JobHandler]:
+    """
+    Registra una corrutina como manejador de un tipo de trabajo.
+
+    Args:
+        job_type: Nombre del tipo de trabajo (usado en POST /jobs)
+        admin_only: Solo los administradores pueden encolarlo
+    """
+
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[job_type] = handler
+        if admin_only:
+            _admin_only.add(job_type)
+        else:
+            _admin_only.discard(job_type)
+        return handler
+
+    return register
+
+
+def get_job_handler(job_type: str) -> Optional[JobHandler]:
+    """Devuelve el manejador registrado para un tipo de trabajo."""
+    return _handlers.get(job_type)
+
+
+def is_admin_only(job_type: str) -> bool:
+    """Indica si el tipo de trabajo solo lo pueden encolar administradores."""
+    return job_type in _admin_only
+
+
+class JobContext:
+    """
+    Contexto que recibe un manejador de trabajo.
+
+    Attributes:
+        job: Trabajo en ejecución
+        params: Parámetros del trabajo
+    """
+
+    def __init__(self, job: Job, owner: str):
+        self.job = job
+        self.params = job.params
+        self._owner = owner
+
+    async def report_progress(
+        self, progress: float, message: Optional[str] = None
+    ) -> None:
+        """
+        Publica el progreso del trabajo para GET /jobs/{id}.
+
+        Args:
+            progress: Progreso entre 0 y 1
+            message: Mensaje descriptivo opcional
+        """
+        progress = min(max(progress, 0.0), 1.0)
+        await Job.get_pymongo_collection().update_one(
+            {"_id": self.job.id, "lease_owner": self._owner},
+            {"$set": {"progress": progress, "message": message}},
+        )
+
+
+class JobWorkerPool:
+    """
+    Pool de workers asyncio que ejecuta los trabajos de la colección jobs.
+
+    Cada worker reserva un trabajo con find_one_and_update (lease) y lo renueva
+    con heartbeats mientras se ejecuta. Si una réplica cae, su reserva expira y
+    otro worker (de esta u otra réplica) retoma el trabajo.
+
+    Attributes:
+        concurrency: Número de trabajos simultáneos en este proceso
+        lease_seconds: Duración de la reserva de un trabajo
+        heartbeat_seconds: Intervalo de renovación de la reserva
+        poll_interval: Espera entre consultas cuando no hay trabajos
+        max_attempts: Intentos antes de marcar el trabajo como fallido
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        lease_seconds: int = 30,
+        heartbeat_seconds: int = 10,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+    ):
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        """Arranca los workers en el loop actual."""
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self.worker_id}/{index}"))
+            for index in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Detiene los workers; los trabajos en curso se devuelven a la cola."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Despierta a los workers inactivos tras encolar un trabajo."""
+        self._wakeup.set()
+
+    async def _worker_loop(self, owner: str) -> None:
+        while True:
+            try:
+                job = await self.claim(owner)
+            except Exception:
+                logger.exception("Job claim failed")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.run(job, owner)
+            except Exception:
+                logger.exception("Job %s crashed", job.id)
+
+    async def claim(self, owner: str) -> Optional[Job]:
+        """
+        Reserva el trabajo pendiente más antiguo (o uno con la reserva expirada).
+
+        Args:
+            owner: Identificador del worker
+
+        Returns:
+            Trabajo reservado, o None si no hay trabajos disponibles
+        """
+        now = datetime.now(timezone.utc)
+        doc = await Job.get_pymongo_collection().find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "lease_expires_at": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return Job.model_validate(doc) if doc else None
+
+    async def run(self, job: Job, owner: str) -> None:
+        """Ejecuta un trabajo reservado y guarda su resultado o su error."""
+        handler = get_job_handler(job.type)
+        if handler is None:
+            await self._finish(job, owner, status="failed", error="Unknown job type")
+            return
+
+        handler_task = asyncio.create_task(handler(JobContext(job, owner)))
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(
+            self._heartbeat(job, owner, handler_task, lease_lost)
+        )
+        try:
+            result = await handler_task
+            await self._finish(
+                job, owner, status="completed", progress=1.0, result=result or {}
+            )
+        except asyncio.CancelledError:
+            if lease_lost.is_set():
+                logger.warning("Lost lease on job %s", job.id)
+                return
+            await self._release(job, owner)
+            raise
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            retry = job.attempts < self.max_attempts and not isinstance(
+                exc, NON_RETRYABLE_ERRORS
+            )
+            await self._finish(
+                job, owner, status="queued" if retry else "failed", error=str(exc)
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(
+        self,
+        job: Job,
+        owner: str,
+        handler_task: asyncio.Task,
+        lease_lost: asyncio.Event,
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            expires_at = datetime.now(timezone.utc) + timedelta(
+                seconds=self.lease_seconds
+            )
+            result = await Job.get_pymongo_collection().update_one(
+                {"_id": job.id, "lease_owner": owner, "status": "running"},
+                {"$set": {"lease_expires_at": expires_at}},
+            )
+            if result.matched_count == 0:
+                lease_lost.set()
+                handler_task.cancel()
+                return
+
+    async def _finish(self, job: Job, owner: str, status: str, **fields) -> None:
+        update = {"status": status, "lease_owner": None, "lease_expires_at": None}
+        if status in ("completed", "failed"):
+            update["finished_at"] = datetime.now(timezone.utc)
+        update.update(fields)
+        await Job.get_pymongo_collection().update_one(
+            {"_id": job.id, "lease_owner": owner}, {"$set": update}
+        )
+
+    async def _release(self, job: Job, owner: str) -> None:
+        """Devuelve un trabajo a la cola al apagar el proceso."""
+        await Job.get_pymongo_collection().update_one(
+            {"_id": job.id, "lease_owner": owner},
+            {
+                "$set": {
+                    "status": "queued",
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                },
+                "$inc": {"attempts": -1},
+            },
+        )
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.exceptions import AdminRequired
+from app.db.migrations import Migration, build_runner
+from app.dependencies.auth import is_admin
+from app.models.product import Product
+from app.services.jobs import JobContext, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+async def run_startup_migrations(
+    db: AsyncIOMotorDatabase, poll_seconds: float = 5.0
+) -> None:
+    """
+    Aplica las migraciones pendientes al arrancar, antes de declararse listo.
+
+    El backfill de deleted_at decide qué productos ven las consultas y el
+    listado fuerza con hint los índices de las migraciones, así que la
+    réplica no debe servir hasta que estén aplicadas. Si otra réplica tiene
+    el bloqueo, espera a que termine. Un fallo se registra y el arranque
+    continúa.
+
+    Args:
+        db: Base de datos Motor
+        poll_seconds: Espera entre comprobaciones mientras otra réplica migra
+    """
+    runner = build_runner(db)
+    while True:
+        try:
+            results = await runner.run()
+            for result in results:
+                logger.info(
+                    "Applied migration %d %s", result["version"], result["name"]
+                )
+            status = await runner.status()
+        except Exception:
+            logger.exception("Startup migrations failed")
+            return
+        if all(migration["status"] == "completed" for migration in status):
+            return
+        logger.info("Waiting for migrations running in another process")
+        await asyncio.sleep(poll_seconds)
+
+
+@job_handler("run_migrations", admin_only=True)
+async def run_migrations_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que aplica las migraciones pendientes.
+
+    Parámetros: target (última versión a aplicar) y dry_run. Solo para
+    administradores.
+
+    Raises:
+        AdminRequired: Si quien lo encola no es administrador
+    """
+    if not is_admin(ctx.job.user_id):
+        raise AdminRequired()
+    target = ctx.params.get("target")
+    dry_run = bool(ctx.params.get("dry_run", False))
+
+    runner = build_runner(Product.get_pymongo_collection().database)
+    pending = [
+        migration["version"]
+        for migration in await runner.status()
+        if migration["status"] != "completed"
+        and (target is None or migration["version"] <= int(target))
+    ]
+
+    async def report(migration: Migration, processed: int, total: int) -> None:
+        done = pending.index(migration.version) if migration.version in pending else 0
+        fraction = (done + (processed / total if total else 1)) / len(pending)
+        await ctx.report_progress(
+            min(fraction, 0.99), f"{migration.name}: {processed}/{total} documents"
+        )
+
+    results = await runner.run(
+        int(target) if target is not None else None, dry_run, report
+    )
+    return {"migrations": results}
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.exceptions import AdminRequired, ProductAccessForbidden
+from app.dependencies.auth import is_admin
+from app.models.product import ACTIVE_FILTER, Product, ProductArchive, stored
+from app.services.jobs import JobContext, job_handler
+from app.services.product_stats import price_stats_cache
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+def stale_products_filter(older_than_days: int) -> dict:
+    """
+    Productos activos sin modificar ni restaurar del archivo en
+    older_than_days días.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return {
+        **ACTIVE_FILTER,
+        "restored_at": {"$not": {"$gte": cutoff}},
+        "$or": [
+            {stored("updated_at"): {"$lt": cutoff}},
+            {stored("updated_at"): None, stored("created_at"): {"$lt": cutoff}},
+        ],
+    }
+
+
+async def archive_stale_products(
+    older_than_days: int,
+    batch_size: int = 500,
+    pause_ms: int = 100,
+    on_batch: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> int:
+    """
+    Mueve a products_archive los productos activos sin modificar en N días.
+
+    Trabaja por lotes y hace una pausa entre ellos para no saturar el primario.
+    Es idempotente: si un lote se interrumpe tras copiarse, el siguiente pase
+    ignora los duplicados del archivo y completa el borrado en la colección activa.
+    Los productos que cambian durante el lote se quedan en la colección activa
+    y se descarta su copia del archivo.
+
+    Args:
+        older_than_days: Antigüedad mínima (sin modificaciones) para archivar
+        batch_size: Productos por lote
+        pause_ms: Pausa entre lotes en milisegundos
+        on_batch: Corrutina opcional que recibe el total archivado tras cada lote
+
+    Returns:
+        Número de productos archivados
+    """
+    stale_filter = stale_products_filter(older_than_days)
+    hot = Product.get_pymongo_collection()
+    cold = ProductArchive.get_pymongo_collection()
+    archived = 0
+
+    while True:
+        batch = await hot.find(stale_filter).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return archived
+
+        now = datetime.now(timezone.utc)
+        for doc in batch:
+            doc["archived_at"] = now
+        try:
+            await cold.insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+
+        ids = [doc["_id"] for doc in batch]
+        # El borrado repite el filtro: un producto modificado entre la lectura y
+        # el borrado ya no está frío y su copia del archivo es la versión anterior
+        result = await hot.delete_many({"_id": {"$in": ids}, **stale_filter})
+        archived += result.deleted_count
+        if result.deleted_count < len(ids):
+            kept = await hot.distinct("_id", {"_id": {"$in": ids}})
+            if kept:
+                await cold.delete_many({"_id": {"$in": kept}})
+        if on_batch:
+            await on_batch(archived)
+        await asyncio.sleep(pause_ms / 1000)
+
+
+async def restore_archived_product(
+    product_id: PydanticObjectId, user_id: str
+) -> Optional[Product]:
+    """
+    Devuelve a la colección activa un producto archivado.
+
+    Se usa como lectura de respaldo cuando un producto no está en la colección
+    activa: al volver a accederse deja de estar frío. La propiedad se
+    comprueba antes de moverlo. Se anota restored_at, que el archivador
+    también tiene en cuenta, para que el siguiente pase no lo devuelva al
+    archivo; updated_at no cambia porque leerlo no lo modifica.
+
+    Args:
+        product_id: ID del producto
+        user_id: ID del usuario que lo solicita
+
+    Returns:
+        Producto restaurado, o None si tampoco está en el archivo
+
+    Raises:
+        ProductAccessForbidden: Si el producto pertenece a otro usuario
+    """
+    cold = ProductArchive.get_pymongo_collection()
+    doc = await cold.find_one({"_id": product_id})
+    if doc is None:
+        return None
+    if Product.model_validate(doc).user_created != user_id:
+        raise ProductAccessForbidden()
+    doc.pop("archived_at", None)
+    doc["restored_at"] = datetime.now(timezone.utc)
+    await Product.get_pymongo_collection().replace_one(
+        {"_id": product_id}, doc, upsert=True
+    )
+    await cold.delete_one({"_id": product_id})
+    price_stats_cache.invalidate(user_id)
+    return Product.model_validate(doc)
+
+
+async def run_product_archiver() -> None:
+    """Tarea en segundo plano que archiva productos fríos periódicamente."""
+    while True:
+        try:
+            archived = await archive_stale_products(
+                settings.PRODUCT_ARCHIVE_AFTER_DAYS,
+                batch_size=settings.PRODUCT_ARCHIVE_BATCH_SIZE,
+                pause_ms=settings.PRODUCT_ARCHIVE_BATCH_PAUSE_MS,
+            )
+            if archived:
+                price_stats_cache.clear()
+                logger.info("Archived %d stale products", archived)
+        except Exception:
+            logger.exception("Product archiver failed")
+        await asyncio.sleep(settings.PRODUCT_ARCHIVE_INTERVAL_SECONDS)
+
+
+@job_handler("archive_products", admin_only=True)
+async def archive_products_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que archiva productos fríos bajo demanda.
+
+    Parámetros: older_than_days (por defecto PRODUCT_ARCHIVE_AFTER_DAYS o 90).
+    Solo para administradores: archiva los productos de todos los usuarios.
+
+    Raises:
+        AdminRequired: Si quien lo encola no es administrador
+    """
+    if not is_admin(ctx.job.user_id):
+        raise AdminRequired()
+    older_than_days = int(
+        ctx.params.get("older_than_days") or settings.PRODUCT_ARCHIVE_AFTER_DAYS or 90
+    )
+    total = await Product.get_pymongo_collection().count_documents(
+        stale_products_filter(older_than_days)
+    )
+
+    async def report(archived: int) -> None:
+        progress = min(archived / total, 0.99) if total else 0.99
+        await ctx.report_progress(progress, f"Archived {archived} of {total} products")
+
+    archived = await archive_stale_products(
+        older_than_days,
+        batch_size=settings.PRODUCT_ARCHIVE_BATCH_SIZE,
+        pause_ms=settings.PRODUCT_ARCHIVE_BATCH_PAUSE_MS,
+        on_batch=report,
+    )
+    if archived:
+        price_stats_cache.clear()
+    return {"archived": archived}
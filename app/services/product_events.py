@@ -0,0 +1,385 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import urlparse
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.product import COMPACT_FIELDS, Product, ProductArchive
+from app.schemas.product import ProductOut
+
+logger = logging.getLogger(__name__)
+
+STREAM_ID = "products"
+# Códigos de error del servidor cuando el resume token ya no está en el oplog
+HISTORY_LOST_CODES = {136, 280, 286}
+WATCH_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}
+]
+API_NAMES = {short: name for name, short in COMPACT_FIELDS.items()}
+
+
+class EventLeaseLost(Exception):
+    """Otra réplica ha tomado la reserva del publicador."""
+
+
+class EventSink:
+    """
+    Destino de los eventos de productos.
+
+    Las implementaciones reciben lotes ordenados y deben escribirlos de forma
+    duradera antes de volver; si además saben cuál fue el último evento
+    escrito (last_event_id), el publicador evita reenviar el lote que quedó
+    sin checkpoint tras una caída.
+    """
+
+    async def publish(self, events: list[dict]) -> None:
+        raise NotImplementedError
+
+    async def last_event_id(self) -> Optional[str]:
+        return None
+
+
+class FileEventSink(EventSink):
+    """Añade los eventos como líneas NDJSON a un fichero local."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def publish(self, events: list[dict]) -> None:
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        await asyncio.to_thread(self._append, lines)
+
+    async def last_event_id(self) -> Optional[str]:
+        return await asyncio.to_thread(self._last_id)
+
+    def _append(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _last_id(self) -> Optional[str]:
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                file.seek(max(file.tell() - 65536, 0))
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return None
+        for line in reversed(lines):
+            try:
+                return json.loads(line)["id"]
+            except (ValueError, KeyError):
+                continue
+        return None
+
+
+class MemoryEventSink(EventSink):
+    """Sink en memoria (sustituto de una cola) para pruebas y desarrollo."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+        self.batches = 0
+
+    async def publish(self, events: list[dict]) -> None:
+        self.events.extend(events)
+        self.batches += 1
+
+    async def last_event_id(self) -> Optional[str]:
+        return self.events[-1]["id"] if self.events else None
+
+
+def build_sink(url: str) -> EventSink:
+    """
+    Crea el sink configurado en PRODUCT_EVENTS_SINK.
+
+    Args:
+        url: file:<ruta> o memory:
+
+    Raises:
+        ValueError: Si el esquema no está soportado
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return FileEventSink(parsed.netloc + parsed.path)
+    if parsed.scheme == "memory":
+        return MemoryEventSink()
+    raise ValueError(f"Unsupported event sink: {url}")
+
+
+def to_event(change: dict) -> dict:
+    """
+    Convierte un evento del change stream en un evento de dominio.
+
+    Tipos: product.created (insert), product.restored (vuelve del archivo:
+    insert con restored_at), product.updated, product.deleted (borrado
+    lógico: se fija deleted_at) y product.removed (el documento sale de
+    products por la purga TTL). El evento de borrado no dice si el producto
+    se ha archivado: ProductEventPublisher pasa a product.archived los que
+    están en products_archive antes de publicarlos.
+
+    Returns:
+        Evento con id estable (el resume token), tipo, producto afectado,
+        campos modificados con sus nombres de la API y el producto actual
+    """
+    operation = change["operationType"]
+    description = change.get("updateDescription") or {}
+    updated = description.get("updatedFields") or {}
+    changed = {
+        API_NAMES.get(field.split(".")[0], field.split(".")[0])
+        for field in [*updated, *description.get("removedFields", [])]
+    }
+    doc = change.get("fullDocument")
+    if operation == "insert":
+        restored = doc is not None and doc.get("restored_at") is not None
+        event_type = "product.restored" if restored else "product.created"
+    elif operation == "delete":
+        event_type = "product.removed"
+    elif updated.get("deleted_at") is not None:
+        event_type = "product.deleted"
+    else:
+        event_type = "product.updated"
+
+    product = None
+    if doc is not None:
+        product = ProductOut.model_validate(Product.model_validate(doc)).model_dump(
+            mode="json"
+        )
+    return {
+        "id": change["_id"]["_data"],
+        "type": event_type,
+        "product_id": str(change["documentKey"]["_id"]),
+        "user_id": product["user_created"] if product else None,
+        "occurred_at": change["clusterTime"].as_datetime().isoformat(),
+        "changed_fields": sorted(changed),
+        "product": product,
+    }
+
+
+class ProductEventPublisher:
+    """
+    Publica los cambios de products en lotes a un EventSink.
+
+    Lee un change stream de la colección products (no hace falta tocar cada
+    ruta de escritura: también cubre importaciones, archivado y migraciones).
+    Tras publicar cada lote guarda el resume token en event_checkpoints, así
+    que al reiniciar se continúa justo después del último lote publicado. Si
+    el proceso cae entre publicar y guardar el token, el lote se vuelve a
+    leer y se descartan los eventos que el sink ya tiene (last_event_id).
+
+    Solo una réplica publica: la que tiene la reserva (lease) del checkpoint.
+
+    Attributes:
+        db: Base de datos Motor
+        sink: Destino de los eventos
+        batch_size: Eventos máximos por lote
+        max_wait_ms: Tiempo máximo que espera un evento antes de publicarse
+        lease_seconds: Duración de la reserva del publicador
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        sink: EventSink,
+        batch_size: int = 100,
+        max_wait_ms: int = 1000,
+        lease_seconds: float = 30,
+    ):
+        self.db = db
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.lease_seconds = lease_seconds
+        self.state = db["event_checkpoints"]
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._batch_size = metrics.histogram(
+            "product_events_batch_size", (1, 5, 10, 50, 100, 500, 1000)
+        )
+
+    async def run(self) -> None:
+        """Tarea en segundo plano: publica mientras tenga la reserva."""
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.consume()
+                    continue
+            except EventLeaseLost:
+                logger.info("Product event publisher lease taken by another process")
+            except OperationFailure as exc:
+                if exc.code in HISTORY_LOST_CODES:
+                    await self._reset(exc)
+                    continue
+                metrics.increment("product_events_errors")
+                logger.exception("Product event publisher failed")
+            except Exception:
+                metrics.increment("product_events_errors")
+                logger.exception("Product event publisher failed")
+            await asyncio.sleep(self.lease_seconds / 2)
+
+    async def consume(self) -> None:
+        """
+        Lee el change stream desde el último checkpoint y publica por lotes.
+
+        Vuelve cuando el stream se cierra. Sin eventos pendientes, el
+        checkpoint avanza igualmente (postBatchResumeToken) para que el token
+        no se quede atrás en el oplog.
+
+        Raises:
+            OperationFailure: Si el resume token ya no está en el oplog
+            EventLeaseLost: Si otra réplica ha tomado la reserva
+        """
+        checkpoint = await self.state.find_one({"_id": STREAM_ID}) or {}
+        token = checkpoint.get("resume_token")
+        already_published = await self.sink.last_event_id() if token else None
+        collection = self.db[Product.Settings.name]
+
+        async with collection.watch(
+            WATCH_PIPELINE,
+            full_document="updateLookup",
+            resume_after=token,
+            batch_size=self.batch_size,
+            max_await_time_ms=self.max_wait_ms,
+        ) as stream:
+            batch: list[dict] = []
+            first_at = saved_at = time.monotonic()
+            saved_token = token
+            # Un lote sin checkpoint se relee entero al reanudar: solo se
+            # buscan eventos ya publicados dentro de ese primer tramo
+            replay_window = self.batch_size
+            while stream.alive:
+                change = await stream.try_next()
+                now = time.monotonic()
+                if change is not None:
+                    if not batch:
+                        first_at = now
+                    event = to_event(change)
+                    if already_published and replay_window > 0:
+                        replay_window -= 1
+                        batch.append(event)
+                        if event["id"] == already_published:
+                            logger.info(
+                                "Skipping %d events already published", len(batch)
+                            )
+                            batch, already_published = [], None
+                        continue
+                    batch.append(event)
+                if len(batch) >= self.batch_size or (
+                    batch and (now - first_at) * 1000 >= self.max_wait_ms
+                ):
+                    await self._publish(batch, stream.resume_token)
+                    batch = []
+                    saved_token, saved_at = stream.resume_token, now
+                elif not batch and (
+                    stream.resume_token != saved_token
+                    or now - saved_at >= self.lease_seconds / 3
+                ):
+                    await self._save(stream.resume_token)
+                    saved_token, saved_at = stream.resume_token, now
+            if batch:
+                await self._publish(batch, stream.resume_token)
+
+    async def _mark_archived(self, batch: list[dict]) -> None:
+        """
+        Pasa a product.archived los borrados de productos que están en el archivo.
+
+        Si el producto se restaura antes de publicar su borrado queda como
+        product.removed, seguido de product.restored.
+        """
+        removed = [event for event in batch if event["type"] == "product.removed"]
+        if not removed:
+            return
+        ids = [ObjectId(event["product_id"]) for event in removed]
+        archived = await self.db[ProductArchive.Settings.name].distinct(
+            "_id", {"_id": {"$in": ids}}
+        )
+        archived_ids = {str(product_id) for product_id in archived}
+        for event in removed:
+            if event["product_id"] in archived_ids:
+                event["type"] = "product.archived"
+
+    async def _publish(self, batch: list[dict], resume_token: dict) -> None:
+        if batch:
+            await self._mark_archived(batch)
+            await self.sink.publish(batch)
+            self._batch_size.observe(len(batch))
+            metrics.increment("product_events_published", len(batch))
+        await self._save(resume_token, len(batch))
+
+    async def _save(self, resume_token: Optional[dict], published: int = 0) -> None:
+        now = datetime.now(timezone.utc)
+        update: dict = {
+            "$set": {
+                "resume_token": resume_token,
+                "expires_at": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now,
+            },
+        }
+        if published:
+            update["$inc"] = {"published": published}
+        result = await self.state.update_one(
+            {"_id": STREAM_ID, "owner": self.owner}, update
+        )
+        if result.matched_count == 0:
+            raise EventLeaseLost()
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.state.find_one_and_update(
+                {
+                    "_id": STREAM_ID,
+                    "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}],
+                },
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "expires_at": now + timedelta(seconds=self.lease_seconds),
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _reset(self, exc: OperationFailure) -> None:
+        """
+        El resume token ya no está en el oplog: hay eventos perdidos.
+
+        Se publica un evento stream.reset para que los consumidores hagan una
+        lectura completa y se continúa desde el momento actual.
+        """
+        logger.error("Product change stream history lost: %s", exc)
+        metrics.increment("product_events_resets")
+        now = datetime.now(timezone.utc)
+        await self.sink.publish(
+            [
+                {
+                    "id": f"reset:{now.isoformat()}",
+                    "type": "stream.reset",
+                    "occurred_at": now.isoformat(),
+                }
+            ]
+        )
+        await self._save(None)
+
+
+def build_publisher(db: AsyncIOMotorDatabase) -> ProductEventPublisher:
+    """Crea el publicador con la configuración de PRODUCT_EVENTS_*."""
+    return ProductEventPublisher(
+        db,
+        build_sink(settings.PRODUCT_EVENTS_SINK),
+        batch_size=settings.PRODUCT_EVENTS_BATCH_SIZE,
+        max_wait_ms=settings.PRODUCT_EVENTS_MAX_WAIT_MS,
+        lease_seconds=settings.PRODUCT_EVENTS_LEASE_SECONDS,
+    )
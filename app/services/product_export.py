@@ -0,0 +1,255 @@
+import asyncio
+import io
+import os
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from app.core.config import settings
+from app.core.exceptions import OptionalDependencyMissing
+from app.db.mongo import get_collection
+from app.dependencies.auth import is_admin
+from app.models.job import Job
+from app.models.product import (
+    ACTIVE_FILTER,
+    Product,
+    owner_filter,
+    stored_expr,
+    stored_filter,
+)
+from app.services.jobs import JobContext, job_handler
+
+ExportFormat = Literal["parquet", "arrow"]
+ExportCompression = Literal["snappy", "zstd", "gzip", "lz4", "brotli", "none"]
+
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Devuelve los campos con los nombres y tipos de la API sea cual sea el
+# formato de almacenamiento (compacto o no)
+EXPORT_PROJECTION = {
+    "_id": 1,
+    "name": 1,
+    "description": stored_expr("description"),
+    "price": {"$toDouble": "$price"},
+    "user_created": {"$toString": stored_expr("user_created")},
+    "created_at": stored_expr("created_at"),
+    "updated_at": stored_expr("updated_at"),
+}
+
+
+def require_pyarrow():
+    """Importa pyarrow bajo demanda; es una dependencia opcional."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise OptionalDependencyMissing("pyarrow is required for product exports")
+    return pa, pq
+
+
+def product_schema(pa):
+    """Esquema Arrow de la exportación de productos."""
+    timestamp = pa.timestamp("ms", tz="UTC")
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("description", pa.string()),
+            ("price", pa.float64()),
+            ("user_created", pa.string()),
+            ("created_at", timestamp),
+            ("updated_at", timestamp),
+        ]
+    )
+
+
+def build_export_filter(
+    user_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> dict:
+    """Construye el filtro de productos activos a exportar."""
+    clauses = []
+    if user_id:
+        clauses.append(owner_filter(user_id))
+    if created_from or created_to:
+        created_at = {}
+        if created_from:
+            created_at["$gte"] = created_from
+        if created_to:
+            created_at["$lt"] = created_to
+        clauses.append(stored_filter("created_at", created_at))
+    query: dict = {**ACTIVE_FILTER}
+    for clause in clauses:
+        # Durante la migración de formato cada cláusula es un $or
+        if "$or" in clause:
+            query.setdefault("$and", []).append(clause)
+        else:
+            query.update(clause)
+    return query
+
+
+async def iter_document_batches(
+    query: dict, batch_size: int
+) -> AsyncIterator[list[dict]]:
+    """Lee la colección en lotes del cursor, sin construir modelos Pydantic."""
+    cursor = get_collection(Product, "secondary_preferred").find(
+        query, EXPORT_PROJECTION, batch_size=batch_size
+    )
+    while docs := await cursor.to_list(length=batch_size):
+        yield docs
+
+
+def to_record_batch(pa, schema, docs: list[dict]):
+    """
+    Convierte un lote de documentos BSON en un RecordBatch columna a columna.
+
+    Cada columna se construye con una sola llamada a pa.array sobre la lista de
+    valores, en lugar de validar un objeto por fila.
+    """
+    columns = [
+        pa.array([str(doc["_id"]) for doc in docs], pa.string()),
+        pa.array([doc.get("name") for doc in docs], pa.string()),
+        pa.array([doc.get("description") for doc in docs], pa.string()),
+        pa.array([doc.get("price") for doc in docs], pa.float64()),
+        pa.array([doc.get("user_created") for doc in docs], pa.string()),
+        pa.array([doc.get("created_at") for doc in docs], schema.field(5).type),
+        pa.array([doc.get("updated_at") for doc in docs], schema.field(6).type),
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escritura que acumula bytes hasta que se vacían."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_export(
+    query: dict,
+    fmt: ExportFormat = "parquet",
+    compression: ExportCompression = "zstd",
+    batch_size: int = 50000,
+) -> AsyncIterator[bytes]:
+    """
+    Exporta productos como Parquet o Arrow IPC, emitiendo bytes por lote.
+
+    Cada lote del cursor se convierte en un RecordBatch (un row group en
+    Parquet) y se comprime en un hilo para no bloquear el event loop.
+
+    Args:
+        query: Filtro de productos (ver build_export_filter)
+        fmt: "parquet" o "arrow" (IPC stream)
+        compression: Códec; en Arrow IPC solo se aplican lz4 y zstd
+        batch_size: Documentos por lote
+    """
+    pa, pq = require_pyarrow()
+    schema = product_schema(pa)
+    sink = _ChunkSink()
+    codec = None if compression == "none" else compression
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=codec or "none")
+    else:
+        ipc_codec = codec if codec in ("lz4", "zstd") else None
+        writer = pa.ipc.new_stream(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression=ipc_codec)
+        )
+
+    async for docs in iter_document_batches(query, batch_size):
+        batch = to_record_batch(pa, schema, docs)
+        await asyncio.to_thread(writer.write_batch, batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    await asyncio.to_thread(writer.close)
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def export_output(job: Job) -> Optional[tuple[str, str]]:
+    """
+    Localiza el fichero generado por un trabajo export_products terminado.
+
+    Args:
+        job: Trabajo cuyo resultado se quiere descargar
+
+    Returns:
+        Tupla (ruta, media type) o None si el trabajo no es una exportación
+        terminada o su fichero ya no existe dentro de EXPORT_DIR
+    """
+    if job.type != "export_products" or job.status != "completed":
+        return None
+    path = (job.result or {}).get("path")
+    if not path:
+        return None
+    root = os.path.realpath(settings.EXPORT_DIR)
+    path = os.path.realpath(path)
+    if os.path.dirname(path) != root or not os.path.isfile(path):
+        return None
+    media_type = EXPORT_MEDIA_TYPES.get(os.path.splitext(path)[1].lstrip("."))
+    return path, media_type or "application/octet-stream"
+
+
+@job_handler("export_products")
+async def export_products_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que exporta productos a un fichero en EXPORT_DIR.
+
+    Parámetros: format, compression, user_id, created_from, created_to.
+    El fichero se descarga con GET /jobs/{id}/download una vez terminado.
+    Solo los administradores pueden exportar productos de otros usuarios.
+    """
+    params = ctx.params
+    user_id = params.get("user_id")
+    if not is_admin(ctx.job.user_id):
+        user_id = ctx.job.user_id
+    query = build_export_filter(
+        user_id,
+        datetime.fromisoformat(params["created_from"])
+        if params.get("created_from")
+        else None,
+        datetime.fromisoformat(params["created_to"])
+        if params.get("created_to")
+        else None,
+    )
+    fmt = params.get("format", "parquet")
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    compression = params.get("compression", "zstd")
+    require_pyarrow()
+    total = await Product.get_pymongo_collection().count_documents(query)
+
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.EXPORT_DIR, f"products-{ctx.job.id}.{fmt}")
+    batch_size = settings.EXPORT_BATCH_SIZE
+    written = 0
+    with open(path, "wb") as output:
+        async for data in stream_export(query, fmt, compression, batch_size):
+            await asyncio.to_thread(output.write, data)
+            written += 1
+            if total:
+                progress = min(written * batch_size / total, 0.99)
+                await ctx.report_progress(progress, f"Exported ~{written * batch_size}")
+    return {"path": path, "rows": total, "bytes": os.path.getsize(path)}
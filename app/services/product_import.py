@@ -0,0 +1,300 @@
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import AsyncIterator, Literal, Optional
+
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.models.product import Product, to_stored
+from app.schemas.product import ProductCreate
+from app.services.product_tags import apply_tag_deltas
+
+ImportFormat = Literal["csv", "ndjson"]
+
+DUPLICATE_KEY = 11000
+
+
+async def iter_text(
+    stream: AsyncIterator[bytes], compressed: bool = False
+) -> AsyncIterator[str]:
+    """
+    Decodifica el cuerpo de la petición a texto de forma incremental.
+
+    Args:
+        stream: Trozos de bytes del cuerpo (request.stream())
+        compressed: Si el cuerpo viene comprimido con gzip
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in stream:
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        if chunk:
+            yield decoder.decode(chunk)
+    if decompressor:
+        tail = decompressor.flush()
+        if not decompressor.eof:
+            raise ValueError("Truncated gzip stream")
+        if tail:
+            yield decoder.decode(tail)
+    yield decoder.decode(b"", final=True)
+
+
+async def iter_lines(
+    chunks: AsyncIterator[str], max_length: Optional[int] = None
+) -> AsyncIterator[Optional[str]]:
+    """
+    Divide el texto en líneas completas sin acumular el cuerpo entero.
+
+    Con max_length, una línea más larga se descarta hasta el siguiente salto
+    de línea y en su lugar se emite None, así que la memoria queda acotada
+    aunque el cuerpo no tenga saltos de línea.
+    """
+    buffer = ""
+    skipping = False
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split("\n")
+        for line in lines:
+            if skipping or (max_length and len(line) > max_length):
+                skipping = False
+                yield None
+            else:
+                yield line.rstrip("\r")
+        if max_length and len(buffer) > max_length:
+            skipping, buffer = True, ""
+    if skipping:
+        yield None
+    elif buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_rows(
+    lines: AsyncIterator[Optional[str]],
+    fmt: ImportFormat,
+    max_length: Optional[int] = None,
+) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Convierte las líneas en filas (número, datos, error de parseo).
+
+    En CSV la primera fila es la cabecera; un registro entre comillas puede
+    ocupar varias líneas, por lo que se acumula hasta cerrar las comillas.
+    Las líneas descartadas por largas (None) son un error de su fila.
+
+    Raises:
+        ValueError: Si la cabecera CSV o un registro entre comillas supera
+            max_length, porque no se puede saber dónde sigue el cuerpo
+    """
+    row_number = 0
+    if fmt == "ndjson":
+        async for line in lines:
+            if line is None:
+                row_number += 1
+                yield row_number, None, "Line too long"
+                continue
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield row_number, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(data, dict):
+                yield row_number, None, "Row must be a JSON object"
+                continue
+            yield row_number, data, None
+        return
+
+    header: Optional[list[str]] = None
+    record = ""
+    async for line in lines:
+        if line is None:
+            if header is None or record:
+                raise ValueError("CSV record too long")
+            row_number += 1
+            yield row_number, None, "Line too long"
+            continue
+        record = f"{record}\n{line}" if record else line
+        if max_length and len(record) > max_length:
+            raise ValueError("CSV record too long")
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, "Column count does not match header"
+            continue
+        yield (
+            row_number,
+            {k: (v if v != "" else None) for k, v in zip(header, values)},
+            None,
+        )
+    if record:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+def _deterministic_id(user_id: str, idempotency_key: str, row_number: int) -> ObjectId:
+    digest = hashlib.sha256(f"{user_id}:{idempotency_key}:{row_number}".encode())
+    return ObjectId(digest.digest()[:12])
+
+
+async def _insert_batch(
+    docs: list[dict], row_numbers: list[int], tag_counts: Counter
+) -> tuple[int, int, list[dict]]:
+    """
+    Inserta un lote sin orden.
+
+    Las etiquetas de los documentos insertados se suman a tag_counts.
+
+    Returns:
+        Tupla (insertados, ya importados, errores por fila)
+    """
+    try:
+        await Product.get_pymongo_collection().insert_many(docs, ordered=False)
+        inserted, duplicates, errors, failed = len(docs), 0, [], set()
+    except BulkWriteError as exc:
+        duplicates = 0
+        errors = []
+        failed = set()
+        for error in exc.details.get("writeErrors", []):
+            failed.add(error["index"])
+            if error.get("code") == DUPLICATE_KEY:
+                duplicates += 1
+            else:
+                row = row_numbers[error["index"]]
+                errors.append({"row": row, "error": error.get("errmsg")})
+        inserted = exc.details.get("nInserted", 0)
+    for index, doc in enumerate(docs):
+        if index not in failed:
+            tag_counts.update(doc.get("tags", ()))
+    return inserted, duplicates, errors
+
+
+async def import_products(
+    stream: AsyncIterator[bytes],
+    user_id: str,
+    fmt: ImportFormat,
+    compressed: bool = False,
+    idempotency_key: Optional[str] = None,
+    batch_size: int = 1000,
+    max_reported_errors: int = 1000,
+    max_line_length: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Importa productos desde un cuerpo CSV/NDJSON y emite un informe NDJSON.
+
+    Las filas se validan contra ProductCreate y se insertan por lotes con
+    insert_many no ordenado; mientras un lote se escribe se parsea el siguiente.
+    La memoria queda acotada a dos lotes. Con Idempotency-Key cada fila recibe
+    un _id determinista, de modo que reintentar la misma subida no duplica.
+    Al terminar se suman a los contadores las etiquetas de lo insertado.
+    Las líneas de más de max_line_length caracteres se descartan como error
+    de su fila; si no se puede seguir (cabecera o registro CSV entre
+    comillas), la importación se detiene con el error.
+
+    Yields:
+        Líneas NDJSON {"row", "error"} por fila fallida y un resumen final
+    """
+    received = 0
+    inserted = 0
+    duplicates = 0
+    failed = 0
+    reported = 0
+    docs: list[dict] = []
+    row_numbers: list[int] = []
+    tag_counts: Counter = Counter()
+    pending: Optional[asyncio.Task] = None
+
+    def report(errors: list[dict]) -> list[str]:
+        nonlocal failed, reported
+        failed += len(errors)
+        lines = []
+        for error in errors:
+            if reported < max_reported_errors:
+                lines.append(json.dumps(error) + "\n")
+                reported += 1
+        return lines
+
+    try:
+        lines = iter_lines(iter_text(stream, compressed), max_line_length)
+        rows = iter_rows(lines, fmt, max_line_length)
+        async for row_number, data, parse_error in rows:
+            received += 1
+            if parse_error:
+                for line in report([{"row": row_number, "error": parse_error}]):
+                    yield line
+                continue
+            try:
+                product = ProductCreate.model_validate(data)
+            except ValidationError as exc:
+                message = "; ".join(
+                    f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+                )
+                for line in report([{"row": row_number, "error": message}]):
+                    yield line
+                continue
+
+            doc = to_stored(
+                {
+                    **product.model_dump(),
+                    "user_created": user_id,
+                    "created_at": datetime.now(timezone.utc),
+                    "updated_at": None,
+                    "deleted_at": None,
+                }
+            )
+            if idempotency_key:
+                doc["_id"] = _deterministic_id(user_id, idempotency_key, row_number)
+            docs.append(doc)
+            row_numbers.append(row_number)
+
+            if len(docs) >= batch_size:
+                if pending:
+                    batch_inserted, batch_duplicates, errors = await pending
+                    inserted += batch_inserted
+                    duplicates += batch_duplicates
+                    for line in report(errors):
+                        yield line
+                pending = asyncio.create_task(
+                    _insert_batch(docs, row_numbers, tag_counts)
+                )
+                docs, row_numbers = [], []
+    except (ValueError, zlib.error) as exc:
+        for line in report([{"row": received + 1, "error": f"Invalid body: {exc}"}]):
+            yield line
+
+    for batch in (
+        pending,
+        _insert_batch(docs, row_numbers, tag_counts) if docs else None,
+    ):
+        if batch is None:
+            continue
+        batch_inserted, batch_duplicates, errors = await batch
+        inserted += batch_inserted
+        duplicates += batch_duplicates
+        for line in report(errors):
+            yield line
+
+    await apply_tag_deltas(user_id, dict(tag_counts))
+
+    summary = {
+        "received": received,
+        "inserted": inserted,
+        "already_imported": duplicates,
+        "failed": failed,
+    }
+    yield json.dumps({"summary": summary}) + "\n"
@@ -0,0 +1,207 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.core.config import settings
+from app.core.exceptions import AdminRequired
+from app.dependencies.auth import is_admin
+from app.models import product as product_model
+from app.models.product import COMPACT_FIELDS, Product, ProductArchive, layout_field
+from app.services.jobs import JobContext, job_handler
+from app.services.product_stats import price_stats_cache
+
+
+def layout_filter(compact: bool) -> dict:
+    """
+    Documentos con algún campo en el formato contrario al de destino.
+
+    Incluye los ya convertidos que la API ha vuelto a escribir en el formato
+    de origen mientras dura la migración (PRODUCT_COMPACT_STORAGE aún no se
+    ha cambiado).
+    """
+    sources = [layout_field(field, not compact) for field in COMPACT_FIELDS]
+    price = {"$type": "decimal"}
+    return {
+        "$or": [
+            *({source: {"$exists": True}} for source in sources),
+            {"price": {"$not": price} if compact else price},
+        ]
+    }
+
+
+def layout_pipeline(compact: bool) -> list[dict]:
+    """
+    Pipeline de actualización que convierte un documento de formato.
+
+    Hacia el formato compacto renombra los campos largos, convierte el
+    propietario a ObjectId (si no es un ID válido se conserva el texto) y el
+    precio a Decimal128; hacia el formato estándar deshace los cambios. Si un
+    campo está en ambos formatos gana el de origen, que es el que escribe la
+    API durante la migración.
+
+    Args:
+        compact: True para migrar al formato compacto, False para revertir
+
+    Returns:
+        Pipeline para update_many
+    """
+    if compact:
+        renames = COMPACT_FIELDS
+    else:
+        renames = {short: name for name, short in COMPACT_FIELDS.items()}
+    new_fields = {
+        target: {"$ifNull": [f"${source}", f"${target}"]}
+        for source, target in renames.items()
+    }
+    if compact:
+        owner = new_fields[COMPACT_FIELDS["user_created"]]
+        new_fields[COMPACT_FIELDS["user_created"]] = {
+            "$convert": {"input": owner, "to": "objectId", "onError": owner}
+        }
+        new_fields["price"] = {"$toDecimal": "$price"}
+    else:
+        owner = new_fields["user_created"]
+        new_fields["user_created"] = {"$toString": owner}
+        new_fields["price"] = {"$toDouble": "$price"}
+    return [{"$set": new_fields}, {"$unset": list(renames)}]
+
+
+async def storage_stats(collection: AsyncIOMotorCollection) -> dict:
+    """
+    Tamaño de datos e índices de una colección ($collStats).
+
+    En un clúster fragmentado suma las estadísticas de todos los shards.
+
+    Returns:
+        count, size, avg_obj_size, storage_size, total_index_size e
+        index_sizes (bytes por índice)
+    """
+    pipeline = [{"$collStats": {"storageStats": {}}}]
+    totals = {"count": 0, "size": 0, "storage_size": 0, "total_index_size": 0}
+    index_sizes: dict[str, int] = {}
+    async for shard in collection.aggregate(pipeline):
+        stats = shard["storageStats"]
+        totals["count"] += stats.get("count", 0)
+        totals["size"] += stats.get("size", 0)
+        totals["storage_size"] += stats.get("storageSize", 0)
+        totals["total_index_size"] += stats.get("totalIndexSize", 0)
+        for name, size in stats.get("indexSizes", {}).items():
+            index_sizes[name] = index_sizes.get(name, 0) + size
+    totals["avg_obj_size"] = totals["size"] // totals["count"] if totals["count"] else 0
+    return {**totals, "index_sizes": index_sizes}
+
+
+async def storage_report() -> dict:
+    """Estadísticas de almacenamiento de las colecciones de productos."""
+    return {
+        "compact_storage": settings.PRODUCT_COMPACT_STORAGE,
+        "layout_migrating": settings.PRODUCT_LAYOUT_MIGRATING,
+        "products": await storage_stats(Product.get_pymongo_collection()),
+        "products_archive": await storage_stats(
+            ProductArchive.get_pymongo_collection()
+        ),
+    }
+
+
+async def migrate_product_layout(
+    collection: AsyncIOMotorCollection,
+    compact: bool = True,
+    batch_size: int = 1000,
+    pause_ms: int = 100,
+    on_batch: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> int:
+    """
+    Convierte en línea los documentos de una colección de productos.
+
+    Trabaja por lotes de _id con una pausa entre ellos para no saturar el
+    primario. Es idempotente y puede reanudarse: solo toca documentos con
+    campos en el formato de origen. Debe ejecutarse con
+    PRODUCT_LAYOUT_MIGRATING activado, para que las consultas vean ambos
+    formatos mientras dura.
+
+    Args:
+        collection: Colección a migrar
+        compact: True para migrar al formato compacto, False para revertir
+        batch_size: Documentos por lote
+        pause_ms: Pausa entre lotes en milisegundos
+        on_batch: Corrutina opcional que recibe el total migrado tras cada lote
+
+    Returns:
+        Número de documentos migrados
+    """
+    pending = layout_filter(compact)
+    pipeline = layout_pipeline(compact)
+    migrated = 0
+
+    while True:
+        cursor = collection.find(pending, {"_id": 1}).limit(batch_size)
+        ids = [doc["_id"] async for doc in cursor]
+        if not ids:
+            return migrated
+        result = await collection.update_many(
+            {"_id": {"$in": ids}, **pending}, pipeline
+        )
+        migrated += result.modified_count
+        if on_batch:
+            await on_batch(migrated)
+        await asyncio.sleep(pause_ms / 1000)
+
+
+@job_handler("compact_product_layout", admin_only=True)
+async def compact_product_layout_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que migra los productos (activos y archivados) de formato.
+
+    Parámetros: direction ("compact", por defecto, o "standard" para revertir).
+    Solo para administradores. Devuelve el tamaño de datos e índices antes y
+    después.
+
+    Pasos: desplegar con PRODUCT_LAYOUT_MIGRATING (se crean los índices de
+    ambos formatos y las consultas aceptan los dos), ejecutar el trabajo,
+    cambiar PRODUCT_COMPACT_STORAGE, repetir el trabajo para convertir lo
+    escrito entre medias y desactivar PRODUCT_LAYOUT_MIGRATING.
+
+    Raises:
+        AdminRequired: Si quien lo encola no es administrador
+        ValueError: Si direction no es válido o no se está migrando el formato
+    """
+    if not is_admin(ctx.job.user_id):
+        raise AdminRequired()
+    direction = ctx.params.get("direction", "compact")
+    if direction not in ("compact", "standard"):
+        raise ValueError(f"Unsupported layout direction: {direction}")
+    if not product_model.LAYOUT_MIGRATING:
+        raise ValueError("PRODUCT_LAYOUT_MIGRATING must be enabled to migrate")
+
+    compact = direction == "compact"
+    before = await storage_report()
+    models = (Product, ProductArchive)
+    pending = [
+        await model.get_pymongo_collection().count_documents(layout_filter(compact))
+        for model in models
+    ]
+    total = sum(pending)
+    migrated = {}
+    for model in models:
+        name = model.get_settings().name
+        done = sum(migrated.values())
+
+        async def report(count: int, name: str = name, done: int = done) -> None:
+            progress = min((done + count) / total, 0.99) if total else 0.99
+            await ctx.report_progress(progress, f"Migrated {count} documents in {name}")
+
+        migrated[name] = await migrate_product_layout(
+            model.get_pymongo_collection(),
+            compact=compact,
+            batch_size=settings.PRODUCT_LAYOUT_MIGRATION_BATCH_SIZE,
+            pause_ms=settings.PRODUCT_LAYOUT_MIGRATION_PAUSE_MS,
+            on_batch=report,
+        )
+    price_stats_cache.clear()
+    return {
+        "direction": direction,
+        "migrated": migrated,
+        "before": before,
+        "after": await storage_report(),
+    }
@@ -0,0 +1,81 @@
+from typing import Literal, Optional, get_args
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from app.db.slow_queries import summarize_explain
+from app.models.product import (
+    ACTIVE_FILTER,
+    LAYOUT_MIGRATING,
+    SORT_INDEXES,
+    Product,
+    owner_filter,
+    stored,
+)
+
+# Claves de ordenación admitidas en GET /products; "-" indica descendente
+ProductSort = Literal["price", "-price", "created_at", "-created_at", "name", "-name"]
+SORT_KEYS: tuple[str, ...] = get_args(ProductSort)
+
+
+def sort_options(sort: ProductSort) -> tuple[list[tuple[str, int]], Optional[str]]:
+    """
+    Orden e índice de una clave de ordenación.
+
+    El índice se fuerza con hint: con un filtro de rango sobre price el
+    planificador podría preferir otro índice y ordenar en memoria. Durante la
+    migración de formato no se fuerza: el filtro por propietario es un $or
+    que necesita el índice de cada formato, y el orden por created_at solo
+    es exacto entre productos del mismo formato.
+
+    Args:
+        sort: Clave admitida, con "-" delante para orden descendente
+
+    Returns:
+        Especificación de sort para find y nombre del índice que la cubre
+        (None durante la migración de formato)
+    """
+    field = sort.lstrip("-")
+    direction = DESCENDING if sort.startswith("-") else ASCENDING
+    hint = None if LAYOUT_MIGRATING else SORT_INDEXES[field].document["name"]
+    return [(stored(field), direction)], hint
+
+
+async def explain_sorts(user_id: str, limit: Optional[int] = 20) -> dict[str, dict]:
+    """
+    Comprueba con explain que ninguna ordenación admitida ordena en memoria.
+
+    Ejecuta explain de la consulta del listado (con el filtro de precio por
+    defecto) para cada clave de SORT_KEYS.
+
+    Args:
+        user_id: Usuario cuyos productos se consultan
+        limit: Límite top-k de la consulta
+
+    Returns:
+        Por clave: resumen del plan, índice esperado y blocking_sort (True si
+        el plan contiene una etapa SORT); error si el índice no existe
+    """
+    collection = Product.get_pymongo_collection()
+    query = Product.find(
+        {**owner_filter(user_id), **ACTIVE_FILTER},
+        Product.price >= 0.0,
+        Product.price <= 1000000.0,
+    ).get_filter_query()
+    report = {}
+    for sort in SORT_KEYS:
+        spec, hint = sort_options(sort)
+        try:
+            explain = await collection.find(
+                query, sort=spec, hint=hint, limit=limit or 0
+            ).explain()
+        except OperationFailure as exc:
+            report[sort] = {"index": hint, "error": str(exc)}
+            continue
+        summary = summarize_explain(explain)
+        report[sort] = {
+            "index": hint,
+            "blocking_sort": "SORT" in summary["plan_stages"],
+            **summary,
+        }
+    return report
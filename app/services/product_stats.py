@@ -0,0 +1,184 @@
+import time
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+
+from app.core.config import settings
+from app.core.deadlines import track_cursor
+from app.core.exceptions import OptionalDependencyMissing
+from app.db.mongo import get_collection
+from app.db.resilience import max_time_ms
+from app.models.product import ACTIVE_FILTER, Product, owner_filter
+from app.services.jobs import JobContext, job_handler
+
+PERCENTILES = (50, 90, 99)
+
+
+def require_numpy():
+    """Importa numpy bajo demanda; es una dependencia opcional."""
+    try:
+        import numpy as np
+    except ImportError:
+        raise OptionalDependencyMissing("numpy is required for product statistics")
+    return np
+
+
+async def load_prices(
+    user_id: str,
+    batch_size: int = 50000,
+    session: Optional[AsyncIOMotorClientSession] = None,
+):
+    """
+    Carga en un array de NumPy los precios de los productos activos del usuario.
+
+    Solo se proyecta el campo price y el cursor se lee en lotes grandes; cada
+    lote se vuelca al array con np.fromiter, sin materializar documentos completos.
+    Con la sesión causal de la petición la lectura puede ir a un secundario
+    y aun así ve las escrituras del usuario; sin ella se lee del primario,
+    porque el resultado se cachea.
+
+    Args:
+        user_id: ID del usuario
+        batch_size: Documentos por lote del cursor
+        session: Sesión causal del usuario, si la hay
+
+    Returns:
+        Array float64 con los precios
+    """
+    np = require_numpy()
+    policy = "secondary_preferred" if session else "primary"
+    cursor = track_cursor(
+        get_collection(Product, policy).find(
+            {**owner_filter(user_id), **ACTIVE_FILTER},
+            {"price": {"$toDouble": "$price"}, "_id": 0},
+            session=session,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms("analytics"),
+        )
+    )
+    chunks = []
+    while docs := await cursor.to_list(length=batch_size):
+        chunks.append(
+            np.fromiter(
+                (doc["price"] for doc in docs), dtype=np.float64, count=len(docs)
+            )
+        )
+    if not chunks:
+        return np.empty(0, dtype=np.float64)
+    return np.concatenate(chunks)
+
+
+def compute_price_stats(prices, bins: int = 10) -> dict:
+    """
+    Calcula estadísticas de precio de forma vectorizada.
+
+    Args:
+        prices: Array de precios
+        bins: Número de intervalos del histograma
+
+    Returns:
+        Diccionario con count, total, mean, stddev (poblacional), min, max,
+        percentiles p50/p90/p99 e histograma
+    """
+    np = require_numpy()
+    count = int(prices.size)
+    if count == 0:
+        return {
+            "count": 0,
+            "total": 0.0,
+            "mean": None,
+            "stddev": None,
+            "min": None,
+            "max": None,
+            "percentiles": {f"p{p}": None for p in PERCENTILES},
+            "histogram": {"edges": [], "counts": []},
+        }
+
+    percentiles = np.percentile(prices, PERCENTILES)
+    counts, edges = np.histogram(prices, bins=bins)
+    return {
+        "count": count,
+        "total": float(prices.sum()),
+        "mean": float(prices.mean()),
+        "stddev": float(prices.std()),
+        "min": float(prices.min()),
+        "max": float(prices.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+    }
+
+
+class PriceStatsCache:
+    """
+    Caché en memoria de estadísticas de precio por usuario y número de intervalos.
+
+    Se agrupa por usuario (max_entries usuarios), de modo que invalidar es
+    O(1). Las escrituras del usuario la invalidan; el TTL acota el desfase
+    cuando la escritura ocurre en otra réplica.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[str, dict[int, tuple[dict, float]]] = {}
+
+    def get(self, user_id: str, bins: int) -> Optional[dict]:
+        by_bins = self._entries.get(user_id)
+        entry = by_bins.get(bins) if by_bins else None
+        if entry is None:
+            return None
+        stats, expires_at = entry
+        if expires_at < time.monotonic():
+            by_bins.pop(bins, None)
+            return None
+        return stats
+
+    def set(self, user_id: str, bins: int, stats: dict) -> None:
+        if user_id not in self._entries and len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._entries.setdefault(user_id, {})[bins] = (stats, expires_at)
+
+    def invalidate(self, user_id: str) -> None:
+        """Descarta las estadísticas del usuario tras una escritura."""
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+price_stats_cache = PriceStatsCache(ttl_seconds=settings.STATS_CACHE_TTL_SECONDS)
+
+
+async def get_price_stats(
+    user_id: str,
+    bins: int = 10,
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> dict:
+    """
+    Devuelve las estadísticas de precio del usuario, usando la caché.
+
+    Args:
+        user_id: ID del usuario
+        bins: Número de intervalos del histograma
+        session: Sesión causal de la petición (ver load_prices)
+    """
+    stats = price_stats_cache.get(user_id, bins)
+    if stats is None:
+        prices = await load_prices(user_id, settings.STATS_BATCH_SIZE, session)
+        stats = compute_price_stats(prices, bins)
+        price_stats_cache.set(user_id, bins, stats)
+    return stats
+
+
+@job_handler("recompute_product_stats")
+async def recompute_product_stats_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que recalcula y precarga las estadísticas de precio del usuario.
+
+    Parámetros: bins (por defecto 10).
+    """
+    bins = int(ctx.params.get("bins", 10))
+    price_stats_cache.invalidate(ctx.job.user_id)
+    stats = await get_price_stats(ctx.job.user_id, bins)
+    return {"count": stats["count"]}
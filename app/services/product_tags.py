@@ -0,0 +1,194 @@
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import UpdateOne
+
+from app.core.exceptions import AdminRequired
+from app.core.metrics import metrics
+from app.db.mongo import get_collection
+from app.db.resilience import max_time_ms
+from app.dependencies.auth import is_admin
+from app.models.product import (
+    ACTIVE_FILTER,
+    Product,
+    ProductArchive,
+    ProductTagCount,
+    stored_expr,
+)
+from app.services.jobs import JobContext, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+def tag_deltas(old: Iterable[str], new: Iterable[str]) -> dict[str, int]:
+    """
+    Cambios de los contadores al pasar de unas etiquetas a otras.
+
+    Returns:
+        +1 por etiqueta añadida y -1 por etiqueta quitada
+    """
+    deltas = Counter(set(new))
+    deltas.subtract(set(old))
+    return {tag: delta for tag, delta in deltas.items() if delta}
+
+
+async def apply_tag_deltas(
+    user_id: str,
+    deltas: dict[str, int],
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> None:
+    """
+    Aplica los cambios a los contadores de etiquetas del usuario.
+
+    Se ejecuta después de escribir los productos: un fallo aquí no deshace la
+    escritura, solo se registra (los contadores se recalculan con el trabajo
+    rebuild_tag_counts).
+
+    Args:
+        user_id: ID del usuario propietario
+        deltas: Cambio por etiqueta (ver tag_deltas)
+        session: Sesión causal de la escritura
+    """
+    if not deltas:
+        return
+    now = datetime.now(timezone.utc)
+    collection = ProductTagCount.get_pymongo_collection()
+    try:
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "tag": tag},
+                    {"$inc": {"product_count": delta}, "$set": {"updated_at": now}},
+                    upsert=True,
+                )
+                for tag, delta in sorted(deltas.items())
+            ],
+            ordered=False,
+            session=session,
+        )
+        removed = [tag for tag, delta in deltas.items() if delta < 0]
+        if removed:
+            await collection.delete_many(
+                {
+                    "user_id": user_id,
+                    "tag": {"$in": removed},
+                    "product_count": {"$lte": 0},
+                },
+                session=session,
+            )
+    except Exception:
+        metrics.increment("tag_counts_errors")
+        logger.exception("Could not update tag counts for user %s", user_id)
+
+
+async def get_tag_counts(
+    user_id: str,
+    limit: int = 100,
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> list[dict]:
+    """
+    Facet de etiquetas del usuario servido desde los contadores.
+
+    Args:
+        user_id: ID del usuario propietario
+        limit: Número máximo de etiquetas
+        session: Sesión causal para ver las propias escrituras
+
+    Returns:
+        Etiquetas con su número de productos, de más a menos frecuente
+    """
+    cursor = get_collection(ProductTagCount, "secondary_preferred").find(
+        {"user_id": user_id, "product_count": {"$gt": 0}},
+        {"_id": 0, "tag": 1, "count": "$product_count"},
+        sort=[("product_count", -1), ("tag", 1)],
+        limit=limit,
+        session=session,
+        max_time_ms=max_time_ms("reads"),
+    )
+    return await cursor.to_list(None)
+
+
+def rebuild_pipeline(started: datetime) -> list[dict]:
+    """
+    Pipeline que recalcula los contadores a partir de products y del archivo.
+
+    Cuenta los productos activos de ambas colecciones por usuario y etiqueta
+    y los escribe con $merge sobre el índice único (user_id, tag). Solo
+    sobrescribe los contadores sin cambios desde started, para no perder los
+    $inc que lleguen mientras se recalcula.
+    """
+    owner = {"$toString": stored_expr("user_created")}
+    return [
+        {"$match": {**ACTIVE_FILTER, "tags.0": {"$exists": True}}},
+        {"$project": {"owner": owner, "tags": 1}},
+        {
+            "$unionWith": {
+                "coll": ProductArchive.Settings.name,
+                "pipeline": [
+                    {"$match": {**ACTIVE_FILTER, "tags.0": {"$exists": True}}},
+                    {"$project": {"owner": owner, "tags": 1}},
+                ],
+            }
+        },
+        {"$unwind": "$tags"},
+        {"$group": {"_id": {"owner": "$owner", "tag": "$tags"}, "count": {"$sum": 1}}},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": "$_id.owner",
+                "tag": "$_id.tag",
+                "product_count": "$count",
+                "updated_at": started,
+            }
+        },
+        {
+            "$merge": {
+                "into": ProductTagCount.Settings.name,
+                "on": ["user_id", "tag"],
+                # Un contador que apply_tag_deltas ha tocado después de
+                # started ya tiene incrementos que el recuento quizá no ve:
+                # se conserva en vez de pisarlo
+                "whenMatched": [
+                    {
+                        "$replaceWith": {
+                            "$cond": [
+                                {"$lt": ["$updated_at", started]},
+                                {"$mergeObjects": ["$$ROOT", "$$new"]},
+                                "$$ROOT",
+                            ]
+                        }
+                    }
+                ],
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+
+@job_handler("rebuild_tag_counts", admin_only=True)
+async def rebuild_tag_counts_job(ctx: JobContext) -> dict:
+    """
+    Trabajo que recalcula todos los contadores de etiquetas.
+
+    Solo para administradores. Los contadores que no se han tocado durante
+    el recálculo (etiquetas que ya no usa ningún producto) se eliminan. Los
+    que cambian mientras dura conservan su valor incremental en lugar del
+    recalculado.
+
+    Raises:
+        AdminRequired: Si quien lo encola no es administrador
+    """
+    if not is_admin(ctx.job.user_id):
+        raise AdminRequired()
+    started = datetime.now(timezone.utc)
+    await ctx.report_progress(0.0, "Rebuilding tag counts")
+    cursor = Product.get_pymongo_collection().aggregate(rebuild_pipeline(started))
+    await cursor.to_list(None)
+    await ctx.report_progress(0.9, "Removing unused tag counts")
+    result = await ProductTagCount.get_pymongo_collection().delete_many(
+        {"updated_at": {"$lt": started}}
+    )
+    return {"removed": result.deleted_count}
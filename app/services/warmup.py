@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from app.core.config import settings
+from app.core.exceptions import OptionalDependencyMissing
+from app.core.hot_set import hot_users
+from app.core.metrics import metrics
+from app.db.migrations import migration_indexes
+from app.db.mongo import get_collection
+from app.models.product import ACTIVE_FILTER, Product, owner_filter
+from app.services.product_sort import sort_options
+from app.services.product_stats import get_price_stats
+from app.services.product_tags import get_tag_counts
+from app.utils.auth_utils import pwd_context
+from app.utils.tokens import get_token_service
+
+logger = logging.getLogger(__name__)
+
+STATE_COLLECTION = "warmup_state"
+HOT_SET_ID = "hot_users"
+# Un orden por índice compuesto del listado: recorre la parte de cada índice
+# que pertenece al usuario
+WARMUP_SORTS = ("-created_at", "price", "name")
+
+
+async def load_hot_set(db: AsyncIOMotorDatabase) -> list[str]:
+    """Usuarios más activos guardados por el proceso anterior."""
+    doc = await db[STATE_COLLECTION].find_one({"_id": HOT_SET_ID})
+    return doc["user_ids"] if doc else []
+
+
+async def save_hot_set(db: AsyncIOMotorDatabase, count: int) -> int:
+    """
+    Guarda los count usuarios más activos de este proceso.
+
+    Con varias réplicas gana la última en guardar: todas ven un tráfico
+    parecido, así que cualquiera sirve de muestra. Un proceso sin peticiones
+    no sobrescribe el conjunto guardado.
+
+    Returns:
+        Número de usuarios guardados
+    """
+    user_ids = hot_users.top(count)
+    if user_ids:
+        await db[STATE_COLLECTION].update_one(
+            {"_id": HOT_SET_ID},
+            {
+                "$set": {
+                    "user_ids": user_ids,
+                    "saved_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+    return len(user_ids)
+
+
+async def run_hot_set_recorder(db: AsyncIOMotorDatabase) -> None:
+    """Tarea en segundo plano: guarda el hot set cada WARMUP_HOT_SET_SAVE_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.WARMUP_HOT_SET_SAVE_SECONDS)
+        try:
+            await save_hot_set(db, settings.WARMUP_HOT_USERS)
+        except Exception:
+            logger.exception("Could not save warm-up hot set")
+
+
+def warm_auth() -> None:
+    """
+    Prepara la firma de tokens y el backend de contraseñas.
+
+    get_token_service lee y prepara las claves de firma, y un ciclo
+    encode/decode carga el backend JWT; get_backend carga el de Argon2, que
+    passlib resuelve de forma perezosa en la primera verificación.
+    """
+    tokens = get_token_service()
+    tokens.decode(tokens.encode({"sub": "warmup"}))
+    pwd_context.handler().get_backend()
+
+
+async def warm_user(user_id: str, limit: int) -> int:
+    """
+    Ejecuta las lecturas habituales de un usuario.
+
+    Lee la primera página del listado con cada orden (y su índice compuesto),
+    el facet de etiquetas y, si numpy está disponible, rellena la caché de
+    estadísticas de precio.
+
+    Returns:
+        Número de consultas ejecutadas
+    """
+    collection = get_collection(Product, "secondary_preferred")
+    query = {**owner_filter(user_id), **ACTIVE_FILTER}
+    queries = 0
+    for sort in WARMUP_SORTS:
+        spec, hint = sort_options(sort)
+        await collection.find(query, sort=spec, hint=hint, limit=limit).to_list(None)
+        queries += 1
+    await get_tag_counts(user_id)
+    queries += 1
+    try:
+        await get_price_stats(user_id)
+        queries += 1
+    except OptionalDependencyMissing:
+        pass
+    return queries
+
+
+async def touch_indexes(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    indexes: list[IndexModel],
+    deadline: Optional[float] = None,
+) -> list[str]:
+    """
+    Recorre entero cada índice compuesto para traerlo a la caché de MongoDB.
+
+    El recorrido es una agregación con hint que solo devuelve un recuento,
+    así que no se transfieren documentos. Los índices de texto y TTL se
+    omiten. Con deadline, cada agregación lleva maxTimeMS con el tiempo que
+    queda, para que el servidor la corte en vez de seguir leyendo el índice
+    después de que el arranque la haya abandonado.
+
+    Args:
+        db: Base de datos Motor
+        collection_name: Colección de los índices
+        indexes: Índices a recorrer
+        deadline: Instante límite (time.monotonic) o None para no limitar
+
+    Returns:
+        Nombres de los índices recorridos
+    """
+    touched = []
+    for index in indexes:
+        spec = index.document
+        keys = list(spec["key"].items())
+        if (
+            len(keys) < 2
+            or "expireAfterSeconds" in spec
+            or any(not isinstance(direction, int) for _, direction in keys)
+        ):
+            continue
+        pipeline = [
+            {"$match": spec.get("partialFilterExpression", {})},
+            {"$project": {"_id": 0, **{field: 1 for field, _ in keys}}},
+            {"$count": "entries"},
+        ]
+        options = {"hint": spec["name"]}
+        if deadline is not None:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            options["maxTimeMS"] = remaining_ms
+        cursor = db[collection_name].aggregate(pipeline, **options)
+        await cursor.to_list(None)
+        touched.append(spec["name"])
+    return touched
+
+
+async def _warm(db: AsyncIOMotorDatabase, report: dict, deadline: float) -> None:
+    warm_auth()
+    report["auth"] = True
+
+    user_ids = list(dict.fromkeys([*settings.WARMUP_USER_IDS, *await load_hot_set(db)]))
+    user_ids = user_ids[: settings.WARMUP_HOT_USERS]
+    semaphore = asyncio.Semaphore(settings.WARMUP_CONCURRENCY)
+
+    async def warm_one(user_id: str) -> None:
+        async with semaphore:
+            try:
+                report["queries"] += await warm_user(
+                    user_id, settings.WARMUP_PRODUCTS_PER_USER
+                )
+                report["users"] += 1
+            except Exception:
+                report["errors"] += 1
+                logger.warning("Warm-up failed for user %s", user_id, exc_info=True)
+
+    await asyncio.gather(*(warm_one(user_id) for user_id in user_ids))
+
+    if settings.WARMUP_TOUCH_INDEXES:
+        report["indexes"] = await touch_indexes(
+            db,
+            Product.Settings.name,
+            [*Product.Settings.indexes, *migration_indexes(Product.Settings.name)],
+            deadline,
+        )
+
+
+async def warm_up(db: AsyncIOMotorDatabase, timeout: Optional[float] = None) -> dict:
+    """
+    Precalienta cachés y working set antes de declararse disponible.
+
+    Prepara la firma de JWT, repite las lecturas de los usuarios más activos
+    del proceso anterior (más WARMUP_USER_IDS) y, con WARMUP_TOUCH_INDEXES,
+    recorre los índices compuestos de products. Todo está acotado por timeout: al vencer se
+    abandona lo que quede y la aplicación arranca igualmente.
+
+    Args:
+        db: Base de datos Motor
+        timeout: Segundos máximos (por defecto WARMUP_TIMEOUT_SECONDS)
+
+    Returns:
+        Informe con usuarios y consultas precalentados, índices recorridos,
+        errores, duración y si se agotó el tiempo
+    """
+    timeout = settings.WARMUP_TIMEOUT_SECONDS if timeout is None else timeout
+    report = {
+        "auth": False,
+        "users": 0,
+        "queries": 0,
+        "indexes": [],
+        "errors": 0,
+        "timed_out": False,
+    }
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(_warm(db, report, started + timeout), timeout)
+    except asyncio.TimeoutError:
+        report["timed_out"] = True
+        metrics.increment("warmup_timeouts")
+        logger.warning("Warm-up stopped after %.1fs", timeout)
+    except Exception:
+        report["errors"] += 1
+        logger.exception("Warm-up failed")
+    report["seconds"] = round(time.monotonic() - started, 3)
+    logger.info("Warm-up finished: %s", report)
+    return report
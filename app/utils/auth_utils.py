@@ -1,14 +1,16 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.tracing import traced
+from app.utils.tokens import get_token_service
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 
+@traced("argon2.hash")
 def hash_password(password: str) -> str:
     """
     Genera un hash seguro de la contraseña usando Argon2.
@@ -22,6 +24,7 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+@traced("argon2.verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica si una contraseña en texto plano coincide con su hash.
@@ -36,6 +39,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@traced("jwt.encode")
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Crea un token JWT de acceso.
@@ -52,7 +56,4 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-    return encoded_jwt
+    return get_token_service().encode(to_encode)
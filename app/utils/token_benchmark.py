@@ -0,0 +1,170 @@
+import argparse
+import json
+import secrets
+import time
+import timeit
+from typing import Optional
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from app.utils.tokens import (
+    BACKENDS,
+    SigningKey,
+    TokenError,
+    TokenService,
+    algorithm_for,
+    build_backend,
+)
+
+ALGORITHMS = ("HS256", "HS384", "HS512", "ES256", "EdDSA")
+CLAIMS = {"sub": "0123456789abcdef01234567"}
+
+
+def generate_key(kid: Optional[str], algorithm: str) -> SigningKey:
+    """Clave efímera del algoritmo indicado."""
+    if algorithm.startswith("HS"):
+        secret = secrets.token_urlsafe(64)
+        return SigningKey(kid, algorithm, secret, secret)
+    if algorithm == "ES256":
+        private = ec.generate_private_key(ec.SECP256R1())
+    else:
+        private = ed25519.Ed25519PrivateKey.generate()
+    return SigningKey(kid, algorithm_for(private), private, private.public_key())
+
+
+def check_correctness(service: TokenService, retired: TokenService) -> list[str]:
+    """
+    Comprueba que el backend acepta lo válido y rechaza lo inválido.
+
+    Args:
+        service: Servicio con la clave activa y la retirada
+        retired: Servicio que firma con la clave retirada
+
+    Returns:
+        Descripción de cada comprobación que falla (vacía si todo es correcto)
+    """
+    failures = []
+    exp = int(time.time()) + 60
+    token = service.encode({**CLAIMS, "exp": exp})
+    try:
+        if service.decode(token) != {**CLAIMS, "exp": exp}:
+            failures.append("round trip changed the claims")
+    except TokenError as exc:
+        failures.append(f"valid token rejected: {exc}")
+    try:
+        service.decode(retired.encode({**CLAIMS, "exp": exp}))
+    except TokenError as exc:
+        failures.append(f"token from the retired key rejected: {exc}")
+
+    header, payload, signature = token.split(".")
+    forged = "A" if signature[0] != "A" else "B"
+    invalid = {
+        "tampered signature": f"{header}.{payload}.{forged}{signature[1:]}",
+        "expired token": service.encode({**CLAIMS, "exp": int(time.time()) - 60}),
+        "malformed token": "not-a-token",
+    }
+    for name, bad_token in invalid.items():
+        try:
+            service.decode(bad_token)
+            failures.append(f"{name} accepted")
+        except TokenError:
+            pass
+    return failures
+
+
+def benchmark_backend(name: str, algorithm: str, iterations: int) -> dict:
+    """
+    Corrección y coste de encode/decode de un backend con un algoritmo.
+
+    Usa dos claves (activa y retirada) para cubrir la selección por kid.
+
+    Returns:
+        Resultado con microsegundos por operación, o el motivo por el que no
+        se ha podido medir
+    """
+    result: dict = {"backend": name, "algorithm": algorithm}
+    try:
+        backend = build_backend(name)
+    except ImportError as exc:
+        return {**result, "skipped": f"not installed: {exc.name}"}
+    if algorithm not in backend.algorithms:
+        return {**result, "skipped": "algorithm not supported"}
+
+    symmetric = algorithm.startswith("HS")
+    active_kid = None if symmetric else "active"
+    active = generate_key(active_kid, algorithm)
+    if symmetric:
+        # Un secreto sin kid: la rotación de secretos HMAC no está soportada
+        keys, retired = [active], TokenService(backend, [active], None)
+    else:
+        old = generate_key("retired", algorithm)
+        keys, retired = [active, old], TokenService(backend, [old], "retired")
+    service = TokenService(backend, keys, active_kid)
+
+    failures = check_correctness(service, retired)
+    claims = {**CLAIMS, "exp": int(time.time()) + 3600}
+    token = service.encode(claims)
+    encode = timeit.timeit(lambda: service.encode(claims), number=iterations)
+    decode = timeit.timeit(lambda: service.decode(token), number=iterations)
+    return {
+        **result,
+        "correct": not failures,
+        "failures": failures,
+        "encode_us": round(encode / iterations * 1e6, 2),
+        "decode_us": round(decode / iterations * 1e6, 2),
+    }
+
+
+def run_benchmark(
+    backends: list[str], algorithms: list[str], iterations: int = 2000
+) -> dict:
+    """
+    Mide todos los backends con todos los algoritmos.
+
+    Returns:
+        Resultados por backend y algoritmo, y para cada algoritmo el backend
+        correcto más rápido en decode (la operación de cada petición)
+    """
+    results = [
+        benchmark_backend(name, algorithm, iterations)
+        for algorithm in algorithms
+        for name in backends
+    ]
+    fastest = {}
+    for algorithm in algorithms:
+        candidates = [
+            result
+            for result in results
+            if result["algorithm"] == algorithm and result.get("correct")
+        ]
+        if candidates:
+            best = min(candidates, key=lambda result: result["decode_us"])
+            fastest[algorithm] = best["backend"]
+    return {"iterations": iterations, "results": results, "fastest": fastest}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    CLI del benchmark.
+
+    Uso:
+        python -m app.utils.token_benchmark --iterations 5000 --algorithms ES256
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.utils.token_benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument(
+        "--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS)
+    )
+    args = parser.parse_args(argv)
+    print(
+        json.dumps(
+            run_benchmark(args.backends, args.algorithms, args.iterations), indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import base64
+import json
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from app.core.config import settings
+
+TokenBackendName = Literal["jose", "pyjwt", "joserfc"]
+TIME_CLAIMS = ("exp", "iat", "nbf")
+HMAC_ALGORITHMS = frozenset({"HS256", "HS384", "HS512"})
+
+
+class TokenError(Exception):
+    """Token mal formado, caducado, con firma inválida o de una clave desconocida."""
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """
+    Material de una clave de firma, ya parseado.
+
+    Attributes:
+        kid: Identificador de la clave (None para el secreto HMAC sin rotación)
+        algorithm: HS256, HS384, HS512, ES256 o EdDSA
+        private: Secreto o clave privada de cryptography; None si solo verifica
+        public: Secreto o clave pública de cryptography
+    """
+
+    kid: Optional[str]
+    algorithm: str
+    private: Any
+    public: Any
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm.startswith("HS")
+
+
+def algorithm_for(key) -> str:
+    """Algoritmo JWS que corresponde a una clave de cryptography."""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return "ES256"
+    raise ValueError(f"Unsupported JWT key type: {key.__class__.__name__}")
+
+
+def load_pem_key(kid: str, pem: bytes) -> SigningKey:
+    """
+    Parsea una clave PEM Ed25519 o EC P-256.
+
+    Una clave privada firma y verifica; una pública solo verifica (claves
+    retiradas que aún deben aceptar los tokens emitidos con ellas).
+
+    Raises:
+        ValueError: Si la clave no es PEM o su tipo no está soportado
+    """
+    if b"PRIVATE KEY" in pem:
+        private = serialization.load_pem_private_key(pem, password=None)
+        public = private.public_key()
+    else:
+        private, public = None, serialization.load_pem_public_key(pem)
+    return SigningKey(kid, algorithm_for(public), private, public)
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def public_jwk(key: SigningKey) -> dict:
+    """JWK pública de una clave asimétrica, para publicarla en el JWKS."""
+    if isinstance(key.public, ed25519.Ed25519PublicKey):
+        raw = key.public.public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        fields = {"kty": "OKP", "crv": "Ed25519", "x": _b64url(raw)}
+    else:
+        numbers = key.public.public_numbers()
+        fields = {
+            "kty": "EC",
+            "crv": "P-256",
+            "x": _b64url(numbers.x.to_bytes(32, "big")),
+            "y": _b64url(numbers.y.to_bytes(32, "big")),
+        }
+    return {**fields, "kid": key.kid, "alg": key.algorithm, "use": "sig"}
+
+
+def unverified_header(token: str) -> dict:
+    """
+    Cabecera del token sin verificar la firma, para elegir la clave por kid.
+
+    Raises:
+        TokenError: Si el token no tiene formato JWS compacto
+    """
+    try:
+        segment = token.split(".", 1)[0]
+        header = json.loads(
+            base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise TokenError("Malformed token")
+    if not isinstance(header, dict):
+        raise TokenError("Malformed token")
+    return header
+
+
+class TokenBackend:
+    """
+    Adaptador de una biblioteca JWT.
+
+    prepare_signing y prepare_verifying convierten cada clave, una sola vez,
+    al objeto que la biblioteca usa internamente; encode y decode reciben ya
+    ese objeto y no vuelven a parsear material de claves en cada llamada.
+    """
+
+    name: str
+    algorithms: frozenset[str]
+
+    def prepare_signing(self, key: SigningKey) -> Any:
+        return key.private
+
+    def prepare_verifying(self, key: SigningKey) -> Any:
+        return key.public
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        """
+        Verifica firma y caducidad.
+
+        Raises:
+            TokenError: Si el token no es válido
+        """
+        raise NotImplementedError
+
+
+class JoseBackend(TokenBackend):
+    """python-jose (con el backend de cryptography). No soporta EdDSA."""
+
+    name = "jose"
+    algorithms = HMAC_ALGORITHMS | {"ES256"}
+
+    def __init__(self):
+        from jose import JWTError, jwk, jwt
+
+        self._jwk, self._jwt, self._errors = jwk, jwt, (JWTError,)
+
+    def prepare_signing(self, key: SigningKey) -> Any:
+        return self._jwk.construct(key.private, key.algorithm)
+
+    def prepare_verifying(self, key: SigningKey) -> Any:
+        return self._jwk.construct(key.public, key.algorithm)
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._errors as exc:
+            raise TokenError(str(exc))
+
+
+class PyJWTBackend(TokenBackend):
+    """PyJWT, con claves de cryptography."""
+
+    name = "pyjwt"
+    algorithms = HMAC_ALGORITHMS | {"ES256", "EdDSA"}
+
+    def __init__(self):
+        import jwt
+
+        self._jwt = jwt
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._jwt.PyJWTError as exc:
+            raise TokenError(str(exc))
+
+
+class JoserfcBackend(TokenBackend):
+    """joserfc, con sus objetos de clave (OctKey, ECKey, OKPKey)."""
+
+    name = "joserfc"
+    algorithms = HMAC_ALGORITHMS | {"ES256", "EdDSA"}
+
+    def __init__(self):
+        from joserfc import jwt
+        from joserfc.errors import JoseError, SecurityWarning
+        from joserfc.jwk import ECKey, OctKey, OKPKey
+
+        # RFC 9864 desaconseja el nombre EdDSA, pero es el que entienden los
+        # demás backends y los clientes actuales
+        warnings.filterwarnings(
+            "ignore", message="EdDSA is deprecated", category=SecurityWarning
+        )
+        self._jwt, self._errors = jwt, (JoseError, ValueError)
+        self._claims = jwt.JWTClaimsRegistry()
+        self._key_types = {
+            **dict.fromkeys(HMAC_ALGORITHMS, OctKey),
+            "ES256": ECKey,
+            "EdDSA": OKPKey,
+        }
+
+    def prepare_signing(self, key: SigningKey) -> Any:
+        return self._key_types[key.algorithm].import_key(key.private)
+
+    def prepare_verifying(self, key: SigningKey) -> Any:
+        return self._key_types[key.algorithm].import_key(key.public)
+
+    def encode(self, claims: dict, key: Any, algorithm: str, headers: dict) -> str:
+        return self._jwt.encode(
+            {"alg": algorithm, **headers}, claims, key, algorithms=[algorithm]
+        )
+
+    def decode(self, token: str, key: Any, algorithm: str) -> dict:
+        try:
+            claims = self._jwt.decode(token, key, algorithms=[algorithm]).claims
+            self._claims.validate(claims)
+        except self._errors as exc:
+            raise TokenError(str(exc))
+        return claims
+
+
+BACKENDS: dict[str, type[TokenBackend]] = {
+    "jose": JoseBackend,
+    "pyjwt": PyJWTBackend,
+    "joserfc": JoserfcBackend,
+}
+
+
+def build_backend(name: TokenBackendName) -> TokenBackend:
+    """
+    Instancia un backend; las bibliotecas se importan bajo demanda.
+
+    Raises:
+        ValueError: Si el backend no existe
+        ImportError: Si su biblioteca no está instalada
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported JWT backend: {name}")
+    return BACKENDS[name]()
+
+
+class TokenService:
+    """
+    Emite y verifica tokens de acceso con un backend intercambiable.
+
+    Las claves se preparan al crear el servicio. Se firma con la clave
+    activa y se verifica con la que indica el kid de la cabecera, lo que
+    permite rotar: la clave nueva pasa a ser la activa y la anterior se
+    mantiene (aunque sea solo pública) mientras haya tokens suyos vigentes.
+    El algoritmo lo fija la clave, nunca la cabecera del token.
+
+    Attributes:
+        backend: Biblioteca JWT usada
+        active_kid: kid de la clave que firma
+    """
+
+    def __init__(
+        self, backend: TokenBackend, keys: list[SigningKey], active_kid: Optional[str]
+    ):
+        self.backend = backend
+        self.active_kid = active_kid
+        self.keys = {key.kid: key for key in keys}
+        for key in keys:
+            if key.algorithm not in backend.algorithms:
+                raise ValueError(
+                    f"JWT backend {backend.name} does not support {key.algorithm}"
+                )
+        active = self.keys.get(active_kid)
+        if active is None or active.private is None:
+            raise ValueError(f"No private JWT key for kid {active_kid!r}")
+        self._signing_key = backend.prepare_signing(active)
+        self._headers = {"kid": active_kid} if active_kid is not None else {}
+        self._verifiers = {
+            kid: (key.algorithm, backend.prepare_verifying(key))
+            for kid, key in self.keys.items()
+        }
+
+    def encode(self, claims: dict) -> str:
+        """Firma los claims con la clave activa; exp, iat y nbf admiten datetime."""
+        claims = {
+            name: int(value.timestamp())
+            if name in TIME_CLAIMS and isinstance(value, datetime)
+            else value
+            for name, value in claims.items()
+        }
+        algorithm = self.keys[self.active_kid].algorithm
+        return self.backend.encode(claims, self._signing_key, algorithm, self._headers)
+
+    def decode(self, token: str) -> dict:
+        """
+        Verifica el token y devuelve sus claims.
+
+        Raises:
+            TokenError: Si el token es inválido, ha caducado o su kid o
+                algoritmo no corresponden a ninguna clave configurada
+        """
+        header = unverified_header(token)
+        verifier = self._verifiers.get(header.get("kid"))
+        if verifier is None:
+            raise TokenError("Unknown signing key")
+        algorithm, key = verifier
+        if header.get("alg") != algorithm:
+            raise TokenError("Unexpected token algorithm")
+        return self.backend.decode(token, key, algorithm)
+
+    def jwks(self) -> dict:
+        """Claves públicas de verificación (vacío si solo hay un secreto HMAC)."""
+        return {
+            "keys": [public_jwk(key) for key in self.keys.values() if not key.symmetric]
+        }
+
+
+def build_token_service() -> TokenService:
+    """
+    Crea el servicio con la configuración de JWT_*.
+
+    Sin JWT_KEYS se firma con SECRET_KEY y ALGORITHM (HS256, HS384 o HS512,
+    sin kid) con cualquier backend. Con JWT_KEYS (kid -> ruta a un PEM
+    Ed25519 o EC P-256) firma la clave JWT_ACTIVE_KID.
+    """
+    backend = build_backend(settings.JWT_BACKEND)
+    if not settings.JWT_KEYS:
+        secret = SigningKey(
+            None, settings.ALGORITHM, settings.SECRET_KEY, settings.SECRET_KEY
+        )
+        return TokenService(backend, [secret], None)
+    keys = []
+    for kid, path in settings.JWT_KEYS.items():
+        with open(path, "rb") as file:
+            keys.append(load_pem_key(kid, file.read()))
+    return TokenService(backend, keys, settings.JWT_ACTIVE_KID)
+
+
+_token_service: Optional[TokenService] = None
+
+
+def get_token_service() -> TokenService:
+    """Servicio de tokens del proceso; las claves se leen en la primera llamada."""
+    global _token_service
+    if _token_service is None:
+        _token_service = build_token_service()
+    return _token_service
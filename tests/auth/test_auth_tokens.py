@@ -0,0 +1,187 @@
+import base64
+import json
+import time
+from dataclasses import replace
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+
+from app.core.config import settings
+from app.utils import tokens
+from app.utils.token_benchmark import generate_key, run_benchmark
+from app.utils.tokens import (
+    BACKENDS,
+    TokenError,
+    TokenService,
+    build_backend,
+    build_token_service,
+    load_pem_key,
+    unverified_header,
+)
+
+
+def backend_or_skip(name: str):
+    try:
+        return build_backend(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+
+
+def service_for(name: str, algorithm: str) -> TokenService:
+    backend = backend_or_skip(name)
+    if algorithm not in backend.algorithms:
+        pytest.skip(f"{name} does not support {algorithm}")
+    if algorithm.startswith("HS"):
+        return TokenService(backend, [generate_key(None, algorithm)], None)
+    keys = [generate_key("new", algorithm), generate_key("old", algorithm)]
+    return TokenService(backend, keys, "new")
+
+
+def exp_in(seconds: int) -> int:
+    return int(time.time()) + seconds
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("algorithm", ["HS256", "HS384", "HS512", "ES256", "EdDSA"])
+class TestTokenService:
+    def test_round_trip(self, backend, algorithm):
+        service = service_for(backend, algorithm)
+        claims = {"sub": "user1", "exp": exp_in(60)}
+
+        token = service.encode(claims)
+
+        assert service.decode(token) == claims
+        assert unverified_header(token).get("kid") == service.active_kid
+
+    def test_rejects_expired_and_tampered(self, backend, algorithm):
+        service = service_for(backend, algorithm)
+        expired = service.encode({"sub": "user1", "exp": exp_in(-60)})
+        header, payload, signature = service.encode({"sub": "user1"}).split(".")
+        other = json.dumps({"sub": "admin"}).encode()
+        tampered = f"{header}.{base64.urlsafe_b64encode(other).decode().rstrip('=')}.{signature}"
+
+        for token in (expired, tampered, "not-a-token"):
+            with pytest.raises(TokenError):
+                service.decode(token)
+
+
+class TestKeyRotation:
+    def test_verifies_retired_key_by_kid(self):
+        backend = backend_or_skip("pyjwt")
+        new, old = generate_key("new", "EdDSA"), generate_key("old", "ES256")
+        retired = TokenService(backend, [old], "old")
+        service = TokenService(backend, [new, replace(old, private=None)], "new")
+
+        token = retired.encode({"sub": "user1"})
+
+        assert service.decode(token) == {"sub": "user1"}
+        assert unverified_header(service.encode({"sub": "u"}))["kid"] == "new"
+
+    def test_rejects_unknown_kid_and_algorithm_mismatch(self):
+        backend = build_backend("jose")
+        key = generate_key("a", "ES256")
+        service = TokenService(backend, [key], "a")
+        stranger = TokenService(backend, [generate_key("b", "ES256")], "b")
+        secret = generate_key("a", "HS256")
+        confused = TokenService(backend, [secret], "a")
+
+        with pytest.raises(TokenError, match="Unknown signing key"):
+            service.decode(stranger.encode({"sub": "user1"}))
+        with pytest.raises(TokenError, match="Unexpected token algorithm"):
+            service.decode(confused.encode({"sub": "user1"}))
+
+    def test_unsupported_algorithm_for_backend(self):
+        with pytest.raises(ValueError, match="does not support EdDSA"):
+            TokenService(build_backend("jose"), [generate_key("a", "EdDSA")], "a")
+
+    def test_active_key_must_be_private(self):
+        key = generate_key("a", "ES256")
+        public_only = replace(key, private=None)
+
+        with pytest.raises(ValueError, match="No private JWT key"):
+            TokenService(build_backend("jose"), [public_only], "a")
+
+
+def write_pem(path, key, private: bool) -> str:
+    if private:
+        pem = key.private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    else:
+        pem = key.public.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    path.write_bytes(pem)
+    return str(path)
+
+
+class TestBuildTokenService:
+    def test_defaults_to_secret_key(self):
+        service = build_token_service()
+
+        assert service.active_kid is None
+        assert service.keys[None].algorithm == settings.ALGORITHM
+        assert service.jwks() == {"keys": []}
+
+    def test_loads_pem_keys_and_publishes_jwks(self, tmp_path, monkeypatch):
+        active, retired = generate_key("k2", "ES256"), generate_key("k1", "EdDSA")
+        monkeypatch.setattr(settings, "JWT_BACKEND", "jose")
+        monkeypatch.setattr(
+            settings,
+            "JWT_KEYS",
+            {
+                "k2": write_pem(tmp_path / "k2.pem", active, private=True),
+                "k1": write_pem(tmp_path / "k1.pub", retired, private=False),
+            },
+        )
+        monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "k2")
+
+        with pytest.raises(ValueError, match="does not support EdDSA"):
+            build_token_service()
+        monkeypatch.setattr(settings, "JWT_BACKEND", "pyjwt")
+        backend_or_skip("pyjwt")
+        service = build_token_service()
+
+        jwks = service.jwks()["keys"]
+        assert [(key["kid"], key["kty"], key["alg"]) for key in jwks] == [
+            ("k2", "EC", "ES256"),
+            ("k1", "OKP", "EdDSA"),
+        ]
+        assert service.keys["k1"].private is None
+
+    def test_load_pem_rejects_unsupported_keys(self):
+        with pytest.raises(ValueError):
+            load_pem_key(
+                "a", b"-----BEGIN PUBLIC KEY-----\nAAAA\n-----END PUBLIC KEY-----\n"
+            )
+
+    @pytest.mark.parametrize("backend", list(BACKENDS))
+    def test_secret_key_with_any_hmac_algorithm(self, monkeypatch, backend):
+        backend_or_skip(backend)
+        monkeypatch.setattr(settings, "JWT_BACKEND", backend)
+        monkeypatch.setattr(settings, "ALGORITHM", "HS512")
+        service = build_token_service()
+
+        token = service.encode({"sub": "user1"})
+
+        assert unverified_header(token)["alg"] == "HS512"
+        assert service.decode(token) == {"sub": "user1"}
+
+    def test_service_is_built_once(self, monkeypatch):
+        monkeypatch.setattr(tokens, "_token_service", None)
+
+        assert tokens.get_token_service() is tokens.get_token_service()
+
+
+def test_benchmark_reports_fastest_correct_backend():
+    report = run_benchmark(["jose"], ["HS256", "EdDSA"], iterations=5)
+
+    hs256, eddsa = report["results"]
+    assert hs256["correct"] is True
+    assert hs256["failures"] == []
+    assert hs256["decode_us"] > 0
+    assert eddsa["skipped"] == "algorithm not supported"
+    assert report["fastest"] == {"HS256": "jose"}
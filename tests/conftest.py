@@ -1,30 +1,54 @@
 # conftest.py
 import asyncio
-from asyncio import SelectorEventLoop
+import os
 from contextlib import asynccontextmanager
 
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def anyio_backend():
+    # Un solo event loop para toda la sesión: permite fixtures async de sesión
     return "asyncio"
 
 
 # === Fuerza SelectorEventLoop en Windows ===
-@pytest.fixture(scope="function", autouse=True)
-def event_loop():
-    try:
-        from asyncio import WindowsSelectorEventLoopPolicy
-
-        asyncio.set_event_loop_policy(WindowsSelectorEventLoopPolicy())
-    except ImportError:
-        pass
-
-    loop = SelectorEventLoop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    loop.close()
+def pytest_configure(config):
+    policy = getattr(asyncio, "WindowsSelectorEventLoopPolicy", None)
+    if policy is not None:
+        asyncio.set_event_loop_policy(policy())
+
+
+# === Modo estricto: falla si un callback bloquea el event loop ===
+def pytest_addoption(parser):
+    parser.addoption(
+        "--strict-loop-blocking",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="Falla los tests que bloqueen el event loop más de MS milisegundos",
+    )
+
+
+@pytest.fixture(autouse=True)
+def strict_loop_blocking(request):
+    threshold_ms = request.config.getoption("--strict-loop-blocking")
+    if threshold_ms is None:
+        yield
+        return
+
+    from app.core.loop_monitor import track_blocking_callbacks
+
+    with track_blocking_callbacks(threshold_ms) as offenders:
+        yield
+    if offenders:
+        details = "\n".join(
+            f"  {o['duration_ms']} ms: {o['callback']}" for o in offenders
+        )
+        pytest.fail(
+            f"Event loop blocked for more than {threshold_ms} ms:\n{details}",
+            pytrace=False,
+        )
 
 
 # === Desactiva lifespan de FastAPI ===
@@ -33,36 +57,118 @@ async def null_lifespan(app):
     yield
 
 
-# === Cliente de prueba ===
-@pytest.fixture(scope="function")
-async def client():
-    from app.main import app
+# === Base de datos de pruebas ===
+_bound_db = None
 
-    # Desactiva el lifespan
-    app.router.lifespan_context = null_lifespan
 
-    # Inicializa Beanie aquí (todo en el mismo loop)
+def document_models() -> list:
+    from app.models.idempotency import IdempotencyRecord
+    from app.models.job import Job
+    from app.models.product import Product, ProductArchive, ProductTagCount
+    from app.models.user import User
+
+    return [User, Product, ProductArchive, ProductTagCount, IdempotencyRecord, Job]
+
+
+def worker_db_name() -> str:
+    """MONGO_DB_TEST con sufijo por worker de pytest-xdist (gw0, gw1...)."""
+    from app.core.config import settings
+
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    return f"{settings.MONGO_DB_TEST}_{worker}" if worker else settings.MONGO_DB_TEST
+
+
+async def bind_models(db, skip_indexes: bool = False) -> None:
+    """
+    Inicializa Beanie sobre db si los modelos apuntan a otra base de datos.
+
+    Beanie guarda la colección en cada modelo, así que solo hay que repetir
+    init_beanie al alternar entre MongoDB real y la base en memoria.
+    """
+    global _bound_db
+    if _bound_db is db:
+        return
+
     from beanie import init_beanie
-    from httpx import ASGITransport, AsyncClient
+
+    await init_beanie(
+        database=db, document_models=document_models(), skip_indexes=skip_indexes
+    )
+    if not skip_indexes:
+        # Los índices de las migraciones no los crea init_beanie
+        from app.db.migrations import migration_indexes
+
+        for model in document_models():
+            indexes = migration_indexes(model.Settings.name)
+            if indexes:
+                await model.get_pymongo_collection().create_indexes(indexes)
+    _bound_db = db
+
+
+async def clear_collections() -> None:
+    """Vacía las colecciones (mucho más barato que borrar la base de datos)."""
+    from app.services.product_stats import price_stats_cache
+
+    for model in document_models():
+        await model.get_pymongo_collection().delete_many({})
+    price_stats_cache.clear()
+
+
+@pytest.fixture(scope="session")
+async def mongo_db():
+    """
+    Base de datos MongoDB real, compartida por toda la sesión.
+
+    init_beanie (y la creación de índices) se ejecuta una sola vez; cada
+    worker de pytest-xdist usa su propia base de datos, que se borra al
+    terminar la sesión.
+    """
     from motor.motor_asyncio import AsyncIOMotorClient
 
     from app.core.config import settings
-    from app.models.product import Product
-    from app.models.user import User
 
     mongo_client = AsyncIOMotorClient(settings.MONGO_URI)
-    test_db = mongo_client[settings.MONGO_DB_TEST]
-    await init_beanie(database=test_db, document_models=[User, Product])
+    db = mongo_client[worker_db_name()]
+    await bind_models(db)
+    yield db
+    await mongo_client.drop_database(db.name)
+    mongo_client.close()
+
 
-    # Limpia colección
-    await User.find().delete_many()
-    await Product.find().delete_many()
+@pytest.fixture(scope="session")
+async def memory_mongo():
+    """Sustituto en memoria de Motor (requiere mongomock-motor)."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    yield mongomock_motor.AsyncMongoMockClient()[worker_db_name()]
+
+
+@pytest.fixture
+async def memory_db(memory_mongo):
+    """
+    Modelos de Beanie enlazados a la base en memoria, vacía en cada test.
+
+    Para tests unitarios que necesitan documentos de Beanie pero no un
+    servidor MongoDB (sin $text, transacciones ni agregaciones complejas).
+    """
+    await bind_models(memory_mongo)
+    await clear_collections()
+    yield memory_mongo
+
+
+# === Cliente de prueba ===
+@pytest.fixture
+async def client(mongo_db):
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+
+    # Desactiva el lifespan
+    app.router.lifespan_context = null_lifespan
+
+    await bind_models(mongo_db, skip_indexes=True)
+    await clear_collections()
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
         yield ac
-
-    # Limpieza
-    await mongo_client.drop_database(settings.MONGO_DB_TEST)
-    mongo_client.close()
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core import deadlines
+from app.core.config import settings
+from app.core.deadlines import RequestDeadlineMiddleware, track_cursor
+from app.core.exception_handlers import register_exception_handlers
+from app.db.resilience import CircuitBreaker, max_time_ms
+from app.dependencies.db import guard_database
+
+
+class FakeCursor:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def build_app(handler_state: dict, route_dependencies=()) -> FastAPI:
+    app = FastAPI()
+    register_exception_handlers(app)
+    app.add_middleware(RequestDeadlineMiddleware)
+
+    @app.get("/slow", dependencies=list(route_dependencies))
+    async def slow():
+        handler_state["cursor"] = track_cursor(FakeCursor())
+        handler_state["max_time_ms"] = max_time_ms("reads")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            handler_state["cancelled"] = True
+            raise
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    return app
+
+
+class TestParseTimeout:
+    def test_reads_header(self):
+        scope = {"headers": [(b"x-request-timeout", b"1.5")]}
+        assert deadlines.parse_timeout(scope) == 1.5
+
+    def test_caps_to_maximum(self, monkeypatch):
+        monkeypatch.setattr(settings, "REQUEST_TIMEOUT_MAX_SECONDS", 5)
+        scope = {"headers": [(b"x-request-timeout", b"600")]}
+        assert deadlines.parse_timeout(scope) == 5
+
+    @pytest.mark.parametrize("value", [b"abc", b"0", b"-1"])
+    def test_ignores_invalid_values(self, value):
+        assert (
+            deadlines.parse_timeout({"headers": [(b"x-request-timeout", value)]})
+            is None
+        )
+
+
+@pytest.mark.anyio
+class TestRequestDeadlineMiddleware:
+    async def test_header_deadline_cancels_handler(self):
+        state = {}
+        transport = ASGITransport(app=build_app(state))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/slow", headers={"X-Request-Timeout": "0.05"})
+
+        assert response.status_code == 504
+        assert response.json() == {"detail": "Request deadline exceeded"}
+        assert state["cancelled"] is True
+        assert state["cursor"].closed is True
+        assert 0 < state["max_time_ms"] <= 50
+
+    async def test_route_class_default_applies(self, monkeypatch):
+        monkeypatch.setattr(settings, "REQUEST_TIMEOUT_READS", 0.05)
+        monkeypatch.setattr(
+            "app.dependencies.db.circuit_breaker", CircuitBreaker(min_calls=100)
+        )
+        state = {}
+        app = build_app(state, [Depends(guard_database("reads"))])
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/slow")
+
+        assert response.status_code == 504
+        assert state["cursor"].closed is True
+
+    async def test_fast_request_is_untouched(self):
+        transport = ASGITransport(app=build_app({}))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/fast", headers={"X-Request-Timeout": "1"})
+
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+
+    async def test_client_disconnect_cancels_handler(self):
+        state = {}
+        app = build_app(state)
+        gone = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if "request_sent" not in state:
+                state["request_sent"] = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/slow",
+            "raw_path": b"/slow",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "server": ("test", 80),
+            "client": ("test", 1234),
+        }
+        request = asyncio.create_task(app(scope, receive, send))
+        await asyncio.sleep(0.01)
+        gone.set()
+        await asyncio.wait_for(request, 1)
+
+        assert state["cancelled"] is True
+        assert state["cursor"].closed is True
+        assert sent == []
@@ -0,0 +1,20 @@
+from app.core.hot_set import HotSet
+
+
+class TestHotSet:
+    def test_top_orders_by_frequency(self):
+        hot_set = HotSet()
+        for key in ["a", "b", "b", "c", "c", "c"]:
+            hot_set.record(key)
+
+        assert hot_set.top(2) == ["c", "b"]
+
+    def test_memory_is_bounded(self):
+        hot_set = HotSet(max_entries=10)
+        for _ in range(5):
+            hot_set.record("hot")
+        for index in range(100):
+            hot_set.record(f"cold{index}")
+
+        assert len(hot_set._counts) <= 10
+        assert hot_set.top(1) == ["hot"]
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import LoopLagMonitor, track_blocking_callbacks
+from app.core.metrics import metrics
+
+
+def block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.anyio
+class TestLoopLagMonitor:
+    async def test_captures_blocking_call_site(self):
+        metrics.reset()
+        monitor = LoopLagMonitor(interval_ms=10, threshold_ms=40)
+        monitor.start()
+        await asyncio.sleep(0.05)
+
+        block_loop(0.2)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        snapshot = monitor.snapshot()
+        (site,) = snapshot["blocking_sites"]
+        assert "in block_loop" in site["site"]
+        assert site["max_lag_ms"] >= 150
+        assert snapshot["lag_ms"]["count"] >= 2
+        assert metrics.snapshot()["counters"]["event_loop_blocked"] == 1
+        metrics.reset()
+
+    async def test_idle_loop_not_reported(self):
+        monitor = LoopLagMonitor(interval_ms=10, threshold_ms=50)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        assert monitor.snapshot()["blocking_sites"] == []
+
+
+class TestTrackBlockingCallbacks:
+    def test_reports_blocking_task(self):
+        async def slow_handler():
+            await asyncio.sleep(0)
+            block_loop(0.05)
+
+        async def fast_handler():
+            await asyncio.sleep(0)
+
+        with track_blocking_callbacks(20) as offenders:
+            asyncio.run(fast_handler())
+            asyncio.run(slow_handler())
+
+        (offender,) = offenders
+        assert "slow_handler" in offender["callback"]
+        assert offender["duration_ms"] >= 50
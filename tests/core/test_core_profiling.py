@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, category_breakdown, server_timing
+from app.utils.auth_utils import create_access_token
+
+pytest.importorskip("pyinstrument")
+
+
+class FakeSession:
+    def __init__(self, frame_records):
+        self.frame_records = frame_records
+
+
+def make_app(sample_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", ["admin"])
+    profiling.continuous_profile.reset()
+    yield create_access_token({"sub": "admin"})
+    profiling.continuous_profile.reset()
+
+
+class TestCategoryBreakdown:
+    def test_innermost_category_wins(self):
+        session = FakeSession(
+            [
+                (["main\x00/app/routes/products.py\x001"], 0.002),
+                (
+                    [
+                        "find\x00/site-packages/beanie/odm/queries.py\x0010",
+                        "validate\x00/site-packages/pydantic/main.py\x0020",
+                    ],
+                    0.003,
+                ),
+                (["decode\x00/site-packages/jose/jwt.py\x005"], 0.001),
+            ]
+        )
+        breakdown = category_breakdown(session)
+
+        assert breakdown["validation"] == 3.0
+        assert breakdown["jwt"] == 1.0
+        assert breakdown["other"] == 2.0
+        assert breakdown["database"] == 0.0
+        assert breakdown["total"] == 6.0
+
+    def test_server_timing_skips_empty(self):
+        assert server_timing({"database": 1.5, "jwt": 0.0}) == "database;dur=1.5"
+
+
+@pytest.mark.anyio
+class TestProfilingMiddleware:
+    async def test_admin_gets_speedscope_profile(self, admin_token):
+        transport = ASGITransport(app=make_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/items/1",
+                headers={
+                    "Authorization": f"Bearer {admin_token}",
+                    "X-Profile": "speedscope",
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.headers["x-profiled-status"] == "200"
+        assert "speedscope" in json.loads(response.content)["$schema"]
+        assert (
+            "GET /items/{item_id}" in profiling.continuous_profile.summary()["routes"]
+        )
+
+    async def test_non_admin_header_ignored(self, admin_token):
+        token = create_access_token({"sub": "someone"})
+        transport = ASGITransport(app=make_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/items/1",
+                headers={"Authorization": f"Bearer {token}", "X-Profile": "html"},
+            )
+
+        assert response.json() == {"item_id": 1}
+        assert profiling.continuous_profile.summary()["sessions"] == 0
+
+    async def test_sampled_request_keeps_response(self, admin_token):
+        transport = ASGITransport(app=make_app(sample_rate=1.0))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/items/2")
+
+        assert response.json() == {"item_id": 2}
+        assert profiling.continuous_profile.summary()["sessions"] == 1
+        assert profiling.continuous_profile.combined_session() is not None
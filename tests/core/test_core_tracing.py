@@ -0,0 +1,146 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core import tracing
+from app.core.tracing import (
+    TracingMiddleware,
+    configure_tracing,
+    mongo_tracing_listener,
+    shutdown_tracing,
+    trace_span,
+    traced,
+)
+
+pytest.importorskip("opentelemetry.sdk")
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (  # noqa: E402
+    InMemorySpanExporter,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    yield exporter
+    shutdown_tracing()
+
+
+def enable(exporter, **kwargs):
+    configure_tracing(exporter, processor=SimpleSpanProcessor(exporter), **kwargs)
+
+
+@traced("dependency.get_value")
+async def get_value(value: int = 1) -> int:
+    with trace_span("jwt.decode"):
+        return value
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int, value: int = Depends(get_value)):
+        return {"item_id": item_id, "value": value}
+
+    return app
+
+
+class TestTraced:
+    def test_disabled_calls_through(self):
+        @traced("noop")
+        def add(a, b):
+            return a + b
+
+        assert tracing.get_tracer() is None
+        assert add(1, 2) == 3
+
+    def test_sync_span(self, exporter):
+        enable(exporter)
+
+        @traced("argon2.verify")
+        def verify():
+            return True
+
+        assert verify() is True
+        assert [span.name for span in exporter.get_finished_spans()] == [
+            "argon2.verify"
+        ]
+
+
+@pytest.mark.anyio
+class TestTracingMiddleware:
+    async def test_spans_follow_w3c_parent(self, exporter):
+        enable(exporter)
+        transport = ASGITransport(app=make_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/items/1?value=5",
+                headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+            )
+
+        assert response.json() == {"item_id": 1, "value": 5}
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        server = spans["GET /items/{item_id}"]
+        dependency = spans["dependency.get_value"]
+
+        assert format(server.context.trace_id, "032x") == TRACE_ID
+        assert server.attributes["http.response.status_code"] == 200
+        assert dependency.parent.span_id == server.context.span_id
+        assert spans["jwt.decode"].parent.span_id == dependency.context.span_id
+
+    async def test_head_sampling_respects_parent_decision(self, exporter):
+        enable(exporter)
+        transport = ASGITransport(app=make_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get(
+                "/items/1",
+                headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"},
+            )
+
+        assert exporter.get_finished_spans() == ()
+
+
+class TestMongoTracingListener:
+    def test_command_span(self, exporter):
+        enable(exporter)
+        key = {"request_id": 7, "connection_id": ("localhost", 27017)}
+        mongo_tracing_listener.started(
+            SimpleNamespace(
+                command_name="find",
+                database_name="test_db",
+                command={"find": "products", "filter": {"user_created": "u1"}},
+                **key,
+            )
+        )
+        mongo_tracing_listener.succeeded(SimpleNamespace(**key))
+
+        (span,) = exporter.get_finished_spans()
+        assert span.name == "mongodb.find"
+        assert span.attributes["db.collection.name"] == "products"
+        assert span.attributes["db.query.text"] == '{"filter": {"user_created": "?"}}'
+
+
+class TestTailSampling:
+    def test_keeps_slow_and_failed_traces(self, exporter):
+        enable(exporter, sample_ratio=0.0, tail_latency_ms=20)
+        tracer = tracing.get_tracer()
+
+        with tracer.start_as_current_span("fast"):
+            with tracer.start_as_current_span("fast.child"):
+                pass
+        with tracer.start_as_current_span("slow"):
+            with tracer.start_as_current_span("slow.child"):
+                time.sleep(0.03)
+        with pytest.raises(ValueError):
+            with tracer.start_as_current_span("failed"):
+                raise ValueError("boom")
+
+        names = sorted(span.name for span in exporter.get_finished_spans())
+        assert names == ["failed", "slow", "slow.child"]
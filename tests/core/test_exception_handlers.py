@@ -6,25 +6,47 @@ from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
 
 from app.core.exception_handlers import (
+    admin_required_exception_handler,
     credentials_exception_handler,
     email_already_registered_exception_handler,
     exception_handler,
     field_required_exception_handler,
     field_too_short_exception_handler,
     http_exception_handler,
+    idempotency_key_in_progress_exception_handler,
+    idempotency_key_reused_exception_handler,
+    import_format_unsupported_exception_handler,
+    job_not_found_exception_handler,
+    job_type_unknown_exception_handler,
+    optional_dependency_missing_exception_handler,
     product_access_forbidden_exception_handler,
     product_id_invalid_exception_handler,
     product_not_found_exception_handler,
+    product_sort_unsupported_exception_handler,
+    request_deadline_exceeded_exception_handler,
+    service_not_ready_exception_handler,
+    service_overloaded_exception_handler,
     token_invalid_exception_handler,
 )
 from app.core.exceptions import (
+    AdminRequired,
     CredentialsException,
     EmailAlreadyRegistered,
     FieldRequired,
     FieldTooShort,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyReused,
+    ImportFormatUnsupported,
+    JobNotFound,
+    JobTypeUnknown,
+    OptionalDependencyMissing,
     ProductAccessForbidden,
     ProductIdInvalid,
     ProductNotFound,
+    ProductSortUnsupported,
+    RequestDeadlineExceeded,
+    ServiceNotReady,
+    ServiceOverloaded,
     TokenInvalid,
 )
 
@@ -113,6 +135,104 @@ class TestExceptionHandlers:
             "detail": "Access to this product is forbidden"
         }
 
+    async def test_product_sort_unsupported_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = ProductSortUnsupported()
+        response = await product_sort_unsupported_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert json.loads(response.body) == {
+            "detail": "Sorting cannot be combined with text search or archived products"
+        }
+
+    async def test_import_format_unsupported_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = ImportFormatUnsupported()
+        response = await import_format_unsupported_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        assert json.loads(response.body) == {
+            "detail": "Import body must be text/csv or application/x-ndjson"
+        }
+
+    async def test_job_not_found_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = JobNotFound()
+        response = await job_not_found_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert json.loads(response.body) == {"detail": "Job not found"}
+
+    async def test_job_type_unknown_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = JobTypeUnknown()
+        response = await job_type_unknown_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert json.loads(response.body) == {"detail": "Unknown job type"}
+
+    async def test_optional_dependency_missing_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = OptionalDependencyMissing()
+        response = await optional_dependency_missing_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+        assert json.loads(response.body) == {
+            "detail": "Optional dependency not installed"
+        }
+
+    async def test_admin_required_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = AdminRequired()
+        response = await admin_required_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert json.loads(response.body) == {"detail": "Admin privileges required"}
+
+    async def test_service_not_ready_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = ServiceNotReady()
+        response = await service_not_ready_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert json.loads(response.body) == {"detail": "Service not ready"}
+
+    async def test_service_overloaded_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = ServiceOverloaded()
+        response = await service_overloaded_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert json.loads(response.body) == {"detail": "Too many concurrent requests"}
+
+    async def test_request_deadline_exceeded_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = RequestDeadlineExceeded()
+        response = await request_deadline_exceeded_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert json.loads(response.body) == {"detail": "Request deadline exceeded"}
+
+    async def test_idempotency_key_reused_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = IdempotencyKeyReused()
+        response = await idempotency_key_reused_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert json.loads(response.body) == {
+            "detail": "Idempotency-Key already used with a different payload"
+        }
+
+    async def test_idempotency_key_in_progress_exception_handler(self):
+        request = MagicMock(spec=Request)
+        exc = IdempotencyKeyInProgress()
+        response = await idempotency_key_in_progress_exception_handler(request, exc)
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert json.loads(response.body) == {
+            "detail": "A request with this Idempotency-Key is in progress"
+        }
+
     async def test_http_exception_handler(self):
         request = MagicMock(spec=Request)
         exc = HTTPException(
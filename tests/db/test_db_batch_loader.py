@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.db import batch_loader
+from app.db.batch_loader import BatchLoader
+from app.models.product import Product
+
+
+async def insert_products(count: int) -> list[Product]:
+    products = [
+        Product(name=f"P{index}", price=1.0, user_created="user1")
+        for index in range(count)
+    ]
+    for product in products:
+        await product.insert()
+    return products
+
+
+def spy_find(monkeypatch) -> MagicMock:
+    collection = Product.get_pymongo_collection()
+    find = MagicMock(side_effect=collection.find)
+    monkeypatch.setattr(
+        Product,
+        "get_pymongo_collection",
+        classmethod(lambda cls: MagicMock(find=find)),
+    )
+    return find
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("memory_db")
+class TestBatchLoader:
+    async def test_merges_concurrent_loads(self, monkeypatch):
+        products = await insert_products(3)
+        find = spy_find(monkeypatch)
+        loader = BatchLoader(Product)
+        missing = PydanticObjectId()
+
+        results = await asyncio.gather(
+            loader.load(products[0].id),
+            loader.load(products[1].id),
+            loader.load(products[0].id),
+            loader.load(missing),
+        )
+
+        assert find.call_count == 1
+        assert find.call_args.args[0]["_id"]["$in"] == [
+            products[0].id,
+            products[1].id,
+            missing,
+        ]
+        assert [r.name if r else None for r in results] == ["P0", "P1", "P0", None]
+        assert results[0] is not results[2]
+
+    async def test_splits_at_max_batch(self, monkeypatch):
+        products = await insert_products(5)
+        find = spy_find(monkeypatch)
+        loader = BatchLoader(Product, max_batch=2)
+
+        results = await asyncio.gather(*(loader.load(p.id) for p in products))
+
+        assert find.call_count == 3
+        assert [r.id for r in results] == [p.id for p in products]
+
+    async def test_error_reaches_every_caller(self, monkeypatch):
+        error = RuntimeError("boom")
+        monkeypatch.setattr(
+            Product,
+            "get_pymongo_collection",
+            classmethod(lambda cls: MagicMock(find=MagicMock(side_effect=error))),
+        )
+        loader = BatchLoader(Product)
+
+        results = await asyncio.gather(
+            loader.load(PydanticObjectId()),
+            loader.load(PydanticObjectId()),
+            return_exceptions=True,
+        )
+
+        assert results == [error, error]
+
+    async def test_max_time_uses_nearest_deadline(self, monkeypatch):
+        products = await insert_products(2)
+        find = spy_find(monkeypatch)
+        limits = iter([5000, 200])
+        monkeypatch.setattr(batch_loader, "max_time_ms", lambda _: next(limits))
+        loader = BatchLoader(Product)
+
+        await asyncio.gather(*(loader.load(p.id) for p in products))
+
+        assert find.call_count == 1
+        assert 0 < find.call_args.kwargs["max_time_ms"] <= 200
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.db import health
+from app.db.health import ReadinessChecker
+from app.utils.tokens import get_token_service
+
+
+class FakeTopology:
+    topology_type_name = "ReplicaSetWithPrimary"
+    known_servers = [object(), object(), object()]
+
+    def __init__(self, writable: bool = True):
+        self.writable = writable
+
+    def has_writable_server(self) -> bool:
+        return self.writable
+
+
+class FakeAdmin:
+    def __init__(self, delay: float = 0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def command(self, name: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"ok": 1}
+
+
+class FakeClient:
+    def __init__(self, admin: FakeAdmin, writable: bool = True):
+        self.admin = admin
+        self.topology_description = FakeTopology(writable)
+
+
+@pytest.mark.anyio
+class TestReadinessChecker:
+    async def test_not_checked_yet(self):
+        assert ReadinessChecker().status()["ready"] is False
+
+    async def test_ready_served_from_memory(self):
+        admin = FakeAdmin()
+        checker = ReadinessChecker()
+        checker._client = FakeClient(admin)
+
+        await checker.check()
+        first = checker.status()
+        second = checker.status()
+
+        assert first["ready"] is True
+        assert second["known_servers"] == 3
+        assert "age_seconds" in second
+        assert admin.calls == 1
+
+    async def test_ping_timeout(self):
+        checker = ReadinessChecker(timeout_seconds=0.01)
+        checker._client = FakeClient(FakeAdmin(delay=1))
+
+        await checker.check()
+
+        status = checker.status()
+        assert status["ready"] is False
+        assert status["error"] == "Database ping timed out"
+
+    async def test_no_writable_server(self):
+        checker = ReadinessChecker()
+        checker._client = FakeClient(FakeAdmin(), writable=False)
+
+        await checker.check()
+
+        assert checker.status()["error"] == "No writable server available"
+
+    async def test_stale_result(self):
+        checker = ReadinessChecker(stale_after_seconds=0)
+        checker._client = FakeClient(FakeAdmin())
+
+        await checker.check()
+        await asyncio.sleep(0.01)
+
+        assert checker.status()["error"] == "Readiness check is stale"
+
+
+@pytest.mark.anyio
+class TestProbes:
+    async def test_livez_and_readyz(self, monkeypatch):
+        from app.main import app
+
+        checker = ReadinessChecker()
+        checker._client = FakeClient(FakeAdmin())
+        monkeypatch.setattr(health, "readiness", checker)
+        monkeypatch.setattr("app.main.readiness", checker)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/livez")).json() == {"status": "alive"}
+            not_ready = await client.get("/readyz")
+            await checker.check()
+            ready = await client.get("/readyz")
+
+        assert not_ready.status_code == 503
+        assert not_ready.json() == {"detail": "Readiness not checked yet"}
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+
+    async def test_metrics_require_admin(self, monkeypatch):
+        from app.main import app
+
+        monkeypatch.setattr(settings, "ADMIN_USER_IDS", ["admin"])
+        service = get_token_service()
+
+        def auth(user_id: str) -> dict:
+            token = service.encode({"sub": user_id})
+            return {"Authorization": f"Bearer {token}"}
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            anonymous = await client.get("/metrics")
+            user = await client.get("/metrics", headers=auth("user1"))
+            admin = await client.get("/metrics", headers=auth("admin"))
+
+        assert anonymous.status_code == 401
+        assert user.status_code == 403
+        assert admin.status_code == 200
@@ -0,0 +1,321 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.db import migrations
+from app.db.migrations import (
+    Migration,
+    MigrationRunner,
+    MigrationThrottle,
+    drop_outdated_indexes,
+)
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$exists" and (key in doc) != operand:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs: list[dict]):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self.docs, key=lambda d: d[key]))
+
+    def limit(self, count):
+        return FakeCursor(self.docs[:count])
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = docs or []
+        self.create_indexes = AsyncMock()
+        self.index_information = AsyncMock(return_value={"_id_": {"key": [("_id", 1)]}})
+        self.update_calls = 0
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([d for d in self.docs if matches(d, query or {})])
+
+    async def find_one(self, query):
+        return next((d for d in self.docs if matches(d, query)), None)
+
+    async def update_many(self, query, update):
+        self.update_calls += 1
+        modified = 0
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(update["$set"])
+                modified += 1
+        return MagicMock(modified_count=modified)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = await self.find_one(query)
+        if doc is None:
+            doc = dict(query)
+            self.docs.append(doc)
+        doc.update(update["$set"])
+
+    async def delete_one(self, query):
+        self.docs = [d for d in self.docs if not matches(d, query)]
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if matches(d, query))
+
+
+class FakeDatabase:
+    def __init__(self, collections: dict):
+        self.collections = collections
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registered = {}
+    monkeypatch.setattr(migrations, "_migrations", registered)
+    monkeypatch.setattr(migrations.importlib, "import_module", lambda name: None)
+    migrations.register_migration(
+        Migration(
+            version=1,
+            name="set_flag",
+            collection="products",
+            filter={"flag": {"$exists": False}},
+            update={"$set": {"flag": True}},
+            indexes=[MagicMock(document={"name": "flag_1", "key": {"flag": 1}})],
+        )
+    )
+    return registered
+
+
+def make_runner(db, batch_size=2) -> MigrationRunner:
+    runner = MigrationRunner(
+        db, batch_size=batch_size, throttle=MigrationThrottle(min_pause_ms=0)
+    )
+    runner._acquire_lock = AsyncMock(return_value=True)
+    return runner
+
+
+class TestMigrationThrottle:
+    def test_backs_off_when_slow_and_recovers(self):
+        throttle = MigrationThrottle(
+            target_latency_ms=100, min_pause_ms=10, max_pause_ms=50
+        )
+
+        assert throttle.next_pause(200) == 20
+        assert throttle.next_pause(200) == 40
+        assert throttle.next_pause(200) == 50
+        assert throttle.next_pause(10) == 25
+        assert throttle.next_pause(10) == 12.5
+        assert throttle.next_pause(10) == 10
+
+    @pytest.mark.anyio
+    async def test_waits_for_replication_lag(self):
+        probe = AsyncMock(side_effect=[30.0, 12.0, 2.0])
+        throttle = MigrationThrottle(
+            max_lag_seconds=10, min_pause_ms=0, lag_probe=probe, lag_poll_seconds=0
+        )
+
+        await throttle.wait(0)
+
+        assert probe.await_count == 3
+
+
+@pytest.mark.anyio
+class TestMigrationRunner:
+    async def test_applies_in_id_batches_and_records_checkpoint(self, registry):
+        products = FakeCollection([{"_id": i} for i in range(5)])
+        db = FakeDatabase({"products": products})
+        progress = []
+
+        async def on_progress(migration, processed, total):
+            progress.append((processed, total))
+
+        results = await make_runner(db).run(on_progress=on_progress)
+
+        assert results[0]["modified"] == 5
+        assert results[0]["indexes"] == ["flag_1"]
+        assert progress == [(2, 5), (4, 5), (5, 5)]
+        assert products.update_calls == 3
+        assert all(doc["flag"] for doc in products.docs)
+        products.create_indexes.assert_awaited_once()
+        state = await db["migrations"].find_one({"_id": 1})
+        assert state["status"] == "completed"
+        assert state["checkpoint"] == 4
+
+    async def test_drops_retired_indexes_after_creating_new_ones(self, registry):
+        registry[1].drop_indexes = ["flag_old"]
+        products = FakeCollection([{"_id": 1}])
+        products.drop_index = AsyncMock()
+        db = FakeDatabase({"products": products})
+
+        results = await make_runner(db).run()
+
+        assert results[0]["dropped_indexes"] == ["flag_old"]
+        products.drop_index.assert_awaited_once_with("flag_old")
+
+    async def test_resumes_from_checkpoint(self, registry):
+        products = FakeCollection([{"_id": i} for i in range(5)])
+        state = FakeCollection(
+            [{"_id": 1, "status": "running", "checkpoint": 2, "processed": 3}]
+        )
+        db = FakeDatabase({"products": products, "migrations": state})
+
+        results = await make_runner(db, batch_size=10).run()
+
+        assert results[0]["processed"] == 5
+        assert [doc.get("flag") for doc in products.docs] == [
+            None,
+            None,
+            None,
+            True,
+            True,
+        ]
+
+    async def test_dry_run_does_not_write(self, registry):
+        products = FakeCollection([{"_id": i} for i in range(3)])
+        db = FakeDatabase({"products": products})
+        runner = make_runner(db)
+
+        results = await runner.run(dry_run=True)
+
+        assert results[0]["processed"] == 3
+        assert results[0]["dry_run"] is True
+        assert products.update_calls == 0
+        products.create_indexes.assert_not_awaited()
+        assert db["migrations"].docs == []
+        runner._acquire_lock.assert_not_awaited()
+
+    async def test_skips_completed_and_reports_status(self, registry):
+        state = FakeCollection([{"_id": 1, "status": "completed", "processed": 5}])
+        db = FakeDatabase({"products": FakeCollection(), "migrations": state})
+        runner = make_runner(db)
+
+        assert await runner.run() == []
+        db["products"].create_indexes.assert_awaited_once_with(registry[1].indexes)
+        assert await runner.status() == [
+            {
+                "version": 1,
+                "name": "set_flag",
+                "collection": "products",
+                "status": "completed",
+                "processed": 5,
+            }
+        ]
+
+    async def test_completed_migration_keeps_existing_indexes(self, registry):
+        state = FakeCollection([{"_id": 1, "status": "completed"}])
+        products = FakeCollection()
+        products.index_information.return_value = {"_id_": {}, "flag_1": {}}
+        db = FakeDatabase({"products": products, "migrations": state})
+
+        await make_runner(db).run()
+
+        products.create_indexes.assert_not_awaited()
+
+    async def test_lock_held_by_other_process(self, registry):
+        db = FakeDatabase({"products": FakeCollection([{"_id": 1}])})
+        db["migrations"].find_one_and_update = AsyncMock(
+            side_effect=DuplicateKeyError("lock")
+        )
+        runner = MigrationRunner(db)
+
+        assert await runner.run() == []
+        assert db["products"].update_calls == 0
+
+    def test_duplicate_version_rejected(self, registry):
+        with pytest.raises(ValueError):
+            migrations.register_migration(
+                Migration(version=1, name="other", collection="users")
+            )
+
+
+def make_model(name: str, indexes: list) -> MagicMock:
+    model = MagicMock()
+    model.Settings.name = name
+    model.Settings.indexes = indexes
+    return model
+
+
+@pytest.mark.anyio
+class TestDropOutdatedIndexes:
+    @pytest.fixture(autouse=True)
+    def runner(self, monkeypatch):
+        monkeypatch.setattr(migrations, "build_runner", make_runner)
+
+    async def test_drops_only_retired_indexes(self, registry):
+        registry[1].drop_indexes = ["flag_old", "owner"]
+        products = FakeCollection()
+        products.index_information.return_value = {
+            "_id_": {"key": [("_id", 1)]},
+            "owner": {"key": [("user_created", 1)]},
+            "flag_1": {"key": [("flag", 1)]},
+            "flag_old": {"key": [("flag", -1)]},
+            "text_active": {"key": [("_fts", "text"), ("_ftsx", 1)]},
+            "ops_created": {"key": [("price", 1)]},
+        }
+        products.drop_index = AsyncMock()
+        declared = [IndexModel([("user_created", 1)], name="owner")]
+        model = make_model("products", declared)
+        model.Settings.retired_indexes = ["text_active", "missing"]
+        users = FakeCollection()
+        db = FakeDatabase({"products": products, "users": users})
+        user_model = MagicMock(spec=["Settings"])
+        user_model.Settings = type("Settings", (), {"name": "users"})
+
+        dropped = await drop_outdated_indexes(db, [model, user_model])
+
+        assert dropped == ["products.text_active", "products.flag_old"]
+        users.index_information.assert_not_awaited()
+
+    async def test_ignores_index_dropped_by_another_process(self, registry):
+        registry[1].drop_indexes = ["flag_old"]
+        products = FakeCollection()
+        products.index_information.return_value = {"flag_old": {"key": [("flag", -1)]}}
+        products.drop_index = AsyncMock(
+            side_effect=OperationFailure("index not found", code=27)
+        )
+        db = FakeDatabase({"products": products})
+
+        assert await drop_outdated_indexes(db, [make_model("products", [])]) == []
+
+    async def test_skips_when_lock_is_busy(self, registry, monkeypatch):
+        registry[1].drop_indexes = ["flag_old"]
+        products = FakeCollection()
+        db = FakeDatabase({"products": products})
+        busy = make_runner(db)
+        busy._acquire_lock = AsyncMock(return_value=False)
+        monkeypatch.setattr(migrations, "build_runner", lambda db: busy)
+
+        dropped = await drop_outdated_indexes(
+            db, [make_model("products", [])], wait_seconds=0
+        )
+
+        assert dropped == []
+        products.index_information.assert_not_awaited()
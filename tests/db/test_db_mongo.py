@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+from app.core.config import settings
+from app.db.mongo import CausalTokenStore, get_read_preference
+
+
+class TestGetReadPreference:
+    def test_primary(self):
+        assert get_read_preference("primary") == Primary()
+
+    def test_secondary_preferred_with_max_staleness(self):
+        preference = get_read_preference("secondary_preferred")
+        assert isinstance(preference, SecondaryPreferred)
+        assert preference.max_staleness == settings.MONGO_READ_MAX_STALENESS_SECONDS
+
+
+class TestCausalTokenStore:
+    def test_record_and_advance(self):
+        store = CausalTokenStore()
+        writer = MagicMock(cluster_time={"clusterTime": 1}, operation_time=2)
+        store.record("user1", writer)
+
+        reader = MagicMock()
+        store.advance("user1", reader)
+
+        reader.advance_cluster_time.assert_called_once_with({"clusterTime": 1})
+        reader.advance_operation_time.assert_called_once_with(2)
+
+    def test_advance_unknown_user(self):
+        store = CausalTokenStore()
+        reader = MagicMock()
+        store.advance("unknown", reader)
+        reader.advance_cluster_time.assert_not_called()
+        reader.advance_operation_time.assert_not_called()
+
+    def test_evicts_oldest_user(self):
+        store = CausalTokenStore(max_users=1)
+        store.record("user1", MagicMock(cluster_time={"t": 1}, operation_time=1))
+        store.record("user2", MagicMock(cluster_time={"t": 2}, operation_time=2))
+
+        reader = MagicMock()
+        store.advance("user1", reader)
+        reader.advance_cluster_time.assert_not_called()
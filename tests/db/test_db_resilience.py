@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pymongo.errors import AutoReconnect, ExecutionTimeout
+
+from app.core.exception_handlers import register_exception_handlers
+from app.core.exceptions import DatabaseConnectionError, ServiceOverloaded
+from app.db import resilience
+from app.db.resilience import Bulkhead, CircuitBreaker
+from app.dependencies.db import DatabaseGuard, guard_database
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate(self):
+        breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5)
+        for record in (
+            breaker.record_success,
+            breaker.record_failure,
+            breaker.record_success,
+        ):
+            record()
+        assert breaker.state == "closed"
+
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        with pytest.raises(DatabaseConnectionError):
+            breaker.before_call()
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker(window=2, min_calls=1, open_seconds=0)
+        breaker.record_failure()
+
+        breaker.before_call()
+        assert breaker.state == "half_open"
+        with pytest.raises(DatabaseConnectionError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_call()
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(window=2, min_calls=1, open_seconds=0)
+        breaker.record_failure()
+        breaker.before_call()
+
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+
+
+@pytest.mark.anyio
+class TestBulkhead:
+    async def test_rejects_when_full(self):
+        bulkhead = Bulkhead("analytics", limit=1, max_wait_ms=10)
+        await bulkhead.acquire()
+
+        with pytest.raises(ServiceOverloaded):
+            await bulkhead.acquire()
+
+        bulkhead.release()
+        await bulkhead.acquire()
+
+
+@pytest.mark.anyio
+class TestGuardDatabase:
+    async def test_failures_open_circuit(self, monkeypatch):
+        breaker = CircuitBreaker(window=2, min_calls=2, open_seconds=60)
+        monkeypatch.setattr(resilience, "circuit_breaker", breaker)
+        monkeypatch.setattr("app.dependencies.db.circuit_breaker", breaker)
+        calls = []
+
+        app = FastAPI()
+        register_exception_handlers(app)
+
+        @app.get("/", dependencies=[Depends(guard_database("reads"))])
+        async def read():
+            calls.append(1)
+            raise AutoReconnect("connection reset")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.get("/") for _ in range(3)]
+
+        assert [r.status_code for r in responses] == [503, 503, 503]
+        assert responses[0].json() == {"detail": "Database unavailable"}
+        assert responses[2].json() == {"detail": "Database unavailable (circuit open)"}
+        assert len(calls) == 2
+        assert breaker.state == "open"
+
+    async def test_query_timeout_does_not_count_as_failure(self, monkeypatch):
+        breaker = CircuitBreaker(window=2, min_calls=1, open_seconds=60)
+        monkeypatch.setattr("app.dependencies.db.circuit_breaker", breaker)
+
+        app = FastAPI()
+        register_exception_handlers(app)
+
+        @app.get("/", dependencies=[Depends(guard_database("reads"))])
+        async def read():
+            raise ExecutionTimeout("operation exceeded time limit")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.get("/") for _ in range(2)]
+
+        assert [r.status_code for r in responses] == [504, 504]
+        assert responses[0].json() == {"detail": "Database query timed out"}
+        assert breaker.state == "closed"
+
+    async def test_streaming_holds_bulkhead_until_body_ends(self, monkeypatch):
+        bulkhead = Bulkhead("analytics", limit=1, max_wait_ms=10)
+        monkeypatch.setitem(resilience.bulkheads, "analytics", bulkhead)
+        breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=60)
+        monkeypatch.setattr("app.dependencies.db.circuit_breaker", breaker)
+        seen = []
+
+        async def body():
+            seen.append(bulkhead._semaphore.locked())
+            yield b"partial"
+            raise AutoReconnect("connection reset")
+
+        app = FastAPI()
+        register_exception_handlers(app)
+
+        @app.get("/export")
+        async def export(guard: DatabaseGuard = Depends(guard_database("analytics"))):
+            return guard.stream(body(), media_type="text/plain")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with pytest.raises(AutoReconnect):
+                await client.get("/export")
+
+        assert seen == [True]
+        assert not bulkhead._semaphore.locked()
+        assert breaker.state == "open"
+
+    async def test_bulkhead_isolates_route_class(self, monkeypatch):
+        monkeypatch.setitem(
+            resilience.bulkheads, "analytics", Bulkhead("analytics", 1, 10)
+        )
+        monkeypatch.setattr(
+            "app.dependencies.db.circuit_breaker", CircuitBreaker(min_calls=100)
+        )
+        release = asyncio.Event()
+
+        app = FastAPI()
+        register_exception_handlers(app)
+
+        @app.get("/slow", dependencies=[Depends(guard_database("analytics"))])
+        async def slow():
+            await release.wait()
+            return {"ok": True}
+
+        @app.get("/fast", dependencies=[Depends(guard_database("reads"))])
+        async def fast():
+            return {"ok": True}
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.01)
+            rejected = await client.get("/slow")
+            other_class = await client.get("/fast")
+            release.set()
+            await first
+
+        assert rejected.status_code == 503
+        assert rejected.json() == {"detail": "Too many concurrent analytics requests"}
+        assert other_class.status_code == 200
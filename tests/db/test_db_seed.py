@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.db import seed
+from app.db.migrations import migration_indexes
+from app.db.seed import (
+    SeedOptions,
+    build_vocabulary,
+    generate_products,
+    price_sampler,
+    run_seed,
+)
+from app.schemas.product import ProductCreate
+
+USER_IDS = [f"{index:024x}" for index in range(50)]
+
+
+class TestGenerateProducts:
+    def test_batches_of_valid_products(self):
+        options = SeedOptions(batch_size=40, vocabulary_size=200)
+
+        batches = list(generate_products(100, USER_IDS, options, seed=1))
+
+        assert [len(batch) for batch in batches] == [40, 40, 20]
+        for doc in batches[0]:
+            ProductCreate.model_validate(doc)
+            assert doc["user_created"] in USER_IDS
+            assert doc["deleted_at"] is None
+
+    def test_deterministic_for_a_seed(self):
+        options = SeedOptions(batch_size=10, vocabulary_size=100)
+
+        first = next(generate_products(10, USER_IDS, options, seed=7))
+        second = next(generate_products(10, USER_IDS, options, seed=7))
+
+        strip = [{k: v for k, v in d.items() if k != "created_at"} for d in first]
+        assert strip == [
+            {k: v for k, v in d.items() if k != "created_at"} for d in second
+        ]
+
+    def test_owner_skew(self):
+        options = SeedOptions(batch_size=5000, owner_skew=1.2, vocabulary_size=100)
+
+        docs = next(generate_products(5000, USER_IDS, options, seed=3))
+        counts = Counter(doc["user_created"] for doc in docs)
+
+        assert counts[USER_IDS[0]] > 10 * counts[USER_IDS[-1]]
+
+    @pytest.mark.parametrize("distribution", ["lognormal", "uniform", "pareto"])
+    def test_prices_within_api_range(self, distribution):
+        draw = price_sampler(distribution, random.Random(0))
+
+        prices = [draw() for _ in range(2000)]
+
+        assert all(0 <= price <= 999999.99 for price in prices)
+        assert all(round(price, 2) == price for price in prices)
+
+    def test_vocabulary_words_are_unique(self):
+        words = build_vocabulary(300, random.Random(0))
+
+        assert len(words) == len(set(words)) == 300
+
+
+class TestRunSeed:
+    def test_hashes_password_once_and_splits_work(self, monkeypatch):
+        hash_password = MagicMock(return_value="hashed")
+        client = MagicMock()
+        monkeypatch.setattr(seed, "hash_password", hash_password)
+        monkeypatch.setattr(seed, "MongoClient", MagicMock(return_value=client))
+        monkeypatch.setattr(seed, "ProcessPoolExecutor", ThreadPoolExecutor)
+        options = SeedOptions(
+            users=30, products=101, workers=3, batch_size=20, vocabulary_size=50
+        )
+
+        result = run_seed(options, defer_indexes=True)
+
+        hash_password.assert_called_once_with(options.password)
+        assert result["users"] == 30
+        assert result["products"] == 101
+        collection = client.__getitem__.return_value.__getitem__.return_value
+        collection.drop_indexes.assert_called_once()
+        collection.create_indexes.assert_called_once()
+        created = {
+            index.document["name"]
+            for index in collection.create_indexes.call_args.args[0]
+        }
+        assert {
+            index.document["name"] for index in migration_indexes("products")
+        } <= created
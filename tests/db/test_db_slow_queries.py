@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.slow_queries import (
+    SlowQueryListener,
+    command_shape,
+    redact,
+    summarize_explain,
+)
+
+
+def started(command_name: str, command: dict, request_id: int = 1):
+    return SimpleNamespace(
+        command_name=command_name,
+        command=command,
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+    )
+
+
+def succeeded(command_name: str, duration_ms: float, request_id: int = 1):
+    return SimpleNamespace(
+        command_name=command_name,
+        database_name="test_db",
+        duration_micros=int(duration_ms * 1000),
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+    )
+
+
+class FakeDatabase:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def command(self, command: dict) -> dict:
+        self.calls.append(command)
+        return {
+            "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}},
+            "executionStats": {"totalDocsExamined": 1000, "nReturned": 3},
+        }
+
+
+class TestRedaction:
+    def test_values_replaced(self):
+        shape = redact({"user_created": "u1", "price": {"$gte": 10, "$in": [1, 2]}})
+        assert shape == {"user_created": "?", "price": {"$gte": "?", "$in": ["?"]}}
+
+    def test_command_shape(self):
+        command = {
+            "find": "products",
+            "filter": {"user_created": "u1"},
+            "sort": {"created_at": -1},
+            "lsid": {"id": "x"},
+        }
+        assert command_shape("find", command) == {
+            "filter": {"user_created": "?"},
+            "sort": {"created_at": -1},
+        }
+
+    def test_update_shape(self):
+        command = {"update": "products", "updates": [{"q": {"_id": 1}, "u": {}}]}
+        assert command_shape("update", command) == {"filter": {"_id": "?"}}
+
+
+class TestSummarizeExplain:
+    def test_index_scan(self):
+        explain = {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "FETCH",
+                    "inputStage": {"stage": "IXSCAN", "indexName": "user_created_1"},
+                },
+                "rejectedPlans": [{"stage": "COLLSCAN"}],
+            },
+            "executionStats": {
+                "totalDocsExamined": 3,
+                "totalKeysExamined": 3,
+                "nReturned": 3,
+                "executionTimeMillis": 1,
+            },
+        }
+        summary = summarize_explain(explain)
+
+        assert summary["plan_stages"] == ["FETCH", "IXSCAN"]
+        assert summary["indexes"] == ["user_created_1"]
+        assert summary["collection_scan"] is False
+        assert summary["docs_examined"] == 3
+
+
+@pytest.mark.anyio
+class TestSlowQueryListener:
+    async def test_fast_commands_ignored(self):
+        listener = SlowQueryListener(threshold_ms=100)
+        listener.started(started("find", {"find": "products", "filter": {}}))
+        listener.succeeded(succeeded("find", 5))
+
+        assert listener.snapshot()["recent"] == []
+
+    async def test_slow_command_recorded_and_explained_once(self):
+        import asyncio
+
+        calls: list = []
+        listener = SlowQueryListener(threshold_ms=100, explain_interval=0)
+        listener.attach({"test_db": FakeDatabase(calls)}, asyncio.get_running_loop())
+        command = {
+            "find": "products",
+            "filter": {"price": {"$gte": 10}},
+            "lsid": {"id": "x"},
+        }
+
+        for request_id in (1, 2):
+            listener.started(started("find", command, request_id))
+            listener.succeeded(succeeded("find", 250, request_id))
+            await asyncio.sleep(0.01)
+
+        snapshot = listener.snapshot()
+        shape = snapshot["shapes"][0]
+        assert len(snapshot["recent"]) == 2
+        assert shape["count"] == 2
+        assert shape["shape"] == {"filter": {"price": {"$gte": "?"}}}
+        assert shape["explain"]["collection_scan"] is True
+        assert len(calls) == 1
+        assert "lsid" not in calls[0]["explain"]
+        assert calls[0]["verbosity"] == "executionStats"
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.core.exceptions import DatabaseConnectionError, ServiceOverloaded
+from app.db.write_coalescer import WriteCoalescer
+
+
+def make_model(insert_many: AsyncMock):
+    session = MagicMock(cluster_time={"clusterTime": 1}, operation_time=2)
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    client = MagicMock()
+    client.start_session = AsyncMock(return_value=session)
+    collection = MagicMock()
+    collection.database.client = client
+    return SimpleNamespace(
+        insert_many=insert_many, get_pymongo_collection=lambda: collection
+    )
+
+
+def make_document():
+    return SimpleNamespace(id=None)
+
+
+@pytest.mark.anyio
+class TestWriteCoalescer:
+    async def test_batches_concurrent_inserts(self):
+        insert_many = AsyncMock()
+        coalescer = WriteCoalescer(make_model(insert_many), max_delay_ms=5)
+
+        documents = [make_document() for _ in range(10)]
+        results = await asyncio.gather(*(coalescer.insert(d) for d in documents))
+
+        assert results == documents
+        assert all(d.id is not None for d in documents)
+        insert_many.assert_awaited_once()
+        assert len(insert_many.call_args.args[0]) == 10
+        assert insert_many.call_args.kwargs["ordered"] is False
+
+    async def test_flushes_when_batch_is_full(self):
+        insert_many = AsyncMock()
+        coalescer = WriteCoalescer(
+            make_model(insert_many), max_batch=3, max_delay_ms=1000
+        )
+
+        await asyncio.wait_for(
+            asyncio.gather(*(coalescer.insert(make_document()) for _ in range(3))),
+            timeout=1,
+        )
+        insert_many.assert_awaited_once()
+
+    async def test_per_document_errors(self):
+        error = BulkWriteError(
+            {"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate"}]}
+        )
+        coalescer = WriteCoalescer(make_model(AsyncMock(side_effect=error)))
+
+        results = await asyncio.gather(
+            *(coalescer.insert(make_document()) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[1], DuplicateKeyError)
+        assert not isinstance(results[0], Exception)
+        assert not isinstance(results[2], Exception)
+
+    async def test_advances_caller_session(self):
+        coalescer = WriteCoalescer(make_model(AsyncMock()))
+        caller_session = MagicMock()
+
+        await coalescer.insert(make_document(), session=caller_session)
+
+        caller_session.advance_cluster_time.assert_called_once_with({"clusterTime": 1})
+        caller_session.advance_operation_time.assert_called_once_with(2)
+
+    async def test_queue_full(self):
+        coalescer = WriteCoalescer(
+            make_model(AsyncMock()), max_queue=1, max_delay_ms=1000
+        )
+        first = asyncio.create_task(coalescer.insert(make_document()))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServiceOverloaded):
+            await coalescer.insert(make_document())
+
+        await coalescer.close()
+        await first
+
+    async def test_close_flushes_pending(self):
+        insert_many = AsyncMock()
+        coalescer = WriteCoalescer(make_model(insert_many), max_delay_ms=1000)
+        pending = asyncio.create_task(coalescer.insert(make_document()))
+        await asyncio.sleep(0)
+
+        await coalescer.close()
+
+        await pending
+        insert_many.assert_awaited_once()
+        with pytest.raises(DatabaseConnectionError):
+            await coalescer.insert(make_document())
@@ -0,0 +1,153 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.models.job import Job
+from tests.products.test_products_routes import create_user_and_get_token
+
+
+@pytest.mark.anyio
+class TestCreateJob:
+    async def test_successfully(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "job_create@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.post(
+            "/api/v1/jobs/",
+            json={"type": "recompute_product_stats", "params": {"bins": 5}},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        data = response.json()
+        assert data["status"] == "queued"
+        assert data["progress"] == 0.0
+
+    async def test_unknown_type(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "job_unknown@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.post(
+            "/api/v1/jobs/", json={"type": "does_not_exist"}, headers=headers
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post(
+            "/api/v1/jobs/", json={"type": "recompute_product_stats"}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+class TestGetJob:
+    async def test_successfully(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "job_get@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        create_response = await client.post(
+            "/api/v1/jobs/", json={"type": "recompute_product_stats"}, headers=headers
+        )
+        job_id = create_response.json()["id"]
+        response = await client.get(f"/api/v1/jobs/{job_id}", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == job_id
+
+    async def test_other_user(self, client: AsyncClient):
+        token1 = await create_user_and_get_token(
+            client, "job_owner@example.com", "password123"
+        )
+        create_response = await client.post(
+            "/api/v1/jobs/",
+            json={"type": "recompute_product_stats"},
+            headers={"Authorization": f"Bearer {token1}"},
+        )
+        job_id = create_response.json()["id"]
+        token2 = await create_user_and_get_token(
+            client, "job_other@example.com", "password123"
+        )
+        response = await client.get(
+            f"/api/v1/jobs/{job_id}", headers={"Authorization": f"Bearer {token2}"}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+class TestAdminOnlyJobs:
+    async def test_rejected_for_non_admin(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "job_archive@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.post(
+            "/api/v1/jobs/", json={"type": "archive_products"}, headers=headers
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert await Job.find_all().count() == 0
+
+
+async def create_finished_export(client: AsyncClient, headers: dict, export_dir):
+    response = await client.post(
+        "/api/v1/jobs/", json={"type": "export_products"}, headers=headers
+    )
+    job = await Job.get(response.json()["id"])
+    path = export_dir / f"products-{job.id}.parquet"
+    path.write_bytes(b"PAR1")
+    job.status = "completed"
+    job.result = {"path": str(path), "rows": 0, "bytes": 4}
+    await job.save()
+    return job
+
+
+@pytest.mark.anyio
+class TestDownloadJobOutput:
+    async def test_successfully(self, client: AsyncClient, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+        token = await create_user_and_get_token(
+            client, "job_download@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        job = await create_finished_export(client, headers, tmp_path)
+
+        response = await client.get(f"/api/v1/jobs/{job.id}/download", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"PAR1"
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+
+    async def test_other_user(self, client: AsyncClient, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+        token1 = await create_user_and_get_token(
+            client, "job_download_owner@example.com", "password123"
+        )
+        job = await create_finished_export(
+            client, {"Authorization": f"Bearer {token1}"}, tmp_path
+        )
+        token2 = await create_user_and_get_token(
+            client, "job_download_other@example.com", "password123"
+        )
+
+        response = await client.get(
+            f"/api/v1/jobs/{job.id}/download",
+            headers={"Authorization": f"Bearer {token2}"},
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_not_finished(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "job_download_queued@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        create_response = await client.post(
+            "/api/v1/jobs/", json={"type": "export_products"}, headers=headers
+        )
+        job_id = create_response.json()["id"]
+
+        response = await client.get(f"/api/v1/jobs/{job_id}/download", headers=headers)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
@@ -1,21 +1,24 @@
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock
 
 import pytest
 from beanie import PydanticObjectId
 
+from app.core.config import settings
 from app.core.exceptions import ProductAccessForbidden, ProductNotFound
-from app.dependencies.products import get_valid_product
-from app.models.product import Product
+from app.dependencies.products import get_valid_product, product_loader
+from app.models.product import Product, ProductArchive
 
 
 @pytest.mark.anyio
+@pytest.mark.usefixtures("memory_db")
 class TestGetValidProduct:
     async def test_successfully(self, monkeypatch):
         mock_product = Product(
             id=PydanticObjectId(), name="Test", price=10.0, user_created="user1"
         )
         mock_get = AsyncMock(return_value=mock_product)
-        monkeypatch.setattr(Product, "get", mock_get)
+        monkeypatch.setattr(product_loader, "load", mock_get)
 
         result = await get_valid_product(mock_product.id, user_id="user1")
 
@@ -24,7 +27,7 @@ class TestGetValidProduct:
 
     async def test_not_found(self, monkeypatch):
         mock_get = AsyncMock(return_value=None)
-        monkeypatch.setattr(Product, "get", mock_get)
+        monkeypatch.setattr(product_loader, "load", mock_get)
         product_id = PydanticObjectId()
 
         with pytest.raises(ProductNotFound):
@@ -37,9 +40,61 @@ class TestGetValidProduct:
             id=PydanticObjectId(), name="Test", price=10.0, user_created="user2"
         )
         mock_get = AsyncMock(return_value=mock_product)
-        monkeypatch.setattr(Product, "get", mock_get)
+        monkeypatch.setattr(product_loader, "load", mock_get)
 
         with pytest.raises(ProductAccessForbidden):
             await get_valid_product(mock_product.id, user_id="user1")
 
         mock_get.assert_called_once_with(mock_product.id)
+
+    async def test_soft_deleted(self, monkeypatch):
+        mock_product = Product.model_construct(
+            id=PydanticObjectId(),
+            name="Test",
+            price=10.0,
+            user_created="user1",
+            deleted_at=datetime.now(timezone.utc),
+        )
+        monkeypatch.setattr(
+            product_loader, "load", AsyncMock(return_value=mock_product)
+        )
+
+        with pytest.raises(ProductNotFound):
+            await get_valid_product(mock_product.id, user_id="user1")
+
+    async def test_loader_disabled(self, monkeypatch):
+        mock_product = Product(
+            id=PydanticObjectId(), name="Test", price=10.0, user_created="user1"
+        )
+        mock_get = AsyncMock(return_value=mock_product)
+        monkeypatch.setattr(settings, "PRODUCT_LOADER_ENABLED", False)
+        monkeypatch.setattr(Product, "get", mock_get)
+
+        assert await get_valid_product(mock_product.id, user_id="user1") is mock_product
+        mock_get.assert_called_once_with(
+            mock_product.id, max_time_ms=settings.MONGO_MAX_TIME_MS_READS
+        )
+
+    async def test_restores_own_archived_product(self, monkeypatch):
+        product_id = PydanticObjectId()
+        await ProductArchive.get_pymongo_collection().insert_one(
+            {"_id": product_id, "name": "Old", "price": 1.0, "user_created": "user1"}
+        )
+        monkeypatch.setattr(settings, "PRODUCT_ARCHIVE_AFTER_DAYS", 30)
+
+        product = await get_valid_product(product_id, user_id="user1")
+
+        assert product.id == product_id
+        assert await Product.get_pymongo_collection().count_documents({}) == 1
+
+    async def test_does_not_restore_other_users_product(self, monkeypatch):
+        product_id = PydanticObjectId()
+        await ProductArchive.get_pymongo_collection().insert_one(
+            {"_id": product_id, "name": "Old", "price": 1.0, "user_created": "user2"}
+        )
+        monkeypatch.setattr(settings, "PRODUCT_ARCHIVE_AFTER_DAYS", 30)
+
+        with pytest.raises(ProductAccessForbidden):
+            await get_valid_product(product_id, user_id="user1")
+
+        assert await Product.get_pymongo_collection().count_documents({}) == 0
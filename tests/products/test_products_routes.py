@@ -1,7 +1,13 @@
+import json
+
 import pytest
 from fastapi import status
 from httpx import AsyncClient
 
+from app.core.config import settings
+from app.models.product import ProductArchive
+from app.services.product_archive import archive_stale_products
+
 
 async def create_user_and_get_token(
     client: AsyncClient, email: str, password: str
@@ -33,6 +39,39 @@ class TestCreateProduct:
         assert "id" in data
         assert data["name"] == "Test Product"
 
+    async def test_idempotency_key_replays_response(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "create_idempotent@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "abc-123"}
+        product_data = {"name": "Idempotent Product", "price": 9.99}
+        first = await client.post(
+            "/api/v1/products/", json=product_data, headers=headers
+        )
+        second = await client.post(
+            "/api/v1/products/", json=product_data, headers=headers
+        )
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.json()["id"] == first.json()["id"]
+        assert second.headers["Idempotent-Replayed"] == "true"
+
+        response = await client.get("/api/v1/products/", headers=headers)
+        assert len(response.json()) == 1
+
+    async def test_idempotency_key_reused(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "create_key_reused@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "abc-456"}
+        await client.post(
+            "/api/v1/products/", json={"name": "A", "price": 1.0}, headers=headers
+        )
+        response = await client.post(
+            "/api/v1/products/", json={"name": "B", "price": 2.0}, headers=headers
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     async def test_unauthenticated(self, client: AsyncClient):
         product_data = {"name": "Unauth Product", "price": 9.99}
         response = await client.post("/api/v1/products/", json=product_data)
@@ -57,6 +96,36 @@ class TestCreateProduct:
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+@pytest.mark.anyio
+class TestImportProducts:
+    async def test_csv_import(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "import_csv@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+        body = "name,description,price\nLamp,Desk lamp,10\nBroken,,-1\n"
+        response = await client.post(
+            "/api/v1/products/import", content=body, headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["row"] == 2
+        assert lines[-1]["summary"]["inserted"] == 1
+
+        response = await client.get("/api/v1/products/", headers=headers)
+        assert [p["name"] for p in response.json()] == ["Lamp"]
+
+    async def test_unsupported_format(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "import_format@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/plain"}
+        response = await client.post(
+            "/api/v1/products/import", content="x", headers=headers
+        )
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
 @pytest.mark.anyio
 class TestReadProduct:
     async def test_get_all_for_user(self, client: AsyncClient):
@@ -114,6 +183,198 @@ class TestReadProduct:
         response = await client.get(f"/api/v1/products/{product_id}", headers=headers2)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    async def test_include_archived(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "archived_list@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.post(
+            "/api/v1/products/", json={"name": "Cold", "price": 1.0}, headers=headers
+        )
+        assert await archive_stale_products(0, pause_ms=0) == 1
+        await client.post(
+            "/api/v1/products/", json={"name": "Hot", "price": 2.0}, headers=headers
+        )
+
+        response = await client.get("/api/v1/products/", headers=headers)
+        assert [p["name"] for p in response.json()] == ["Hot"]
+        response = await client.get(
+            "/api/v1/products/", params={"include_archived": True}, headers=headers
+        )
+        assert sorted(p["name"] for p in response.json()) == ["Cold", "Hot"]
+
+    async def test_get_archived_restores_own_product(
+        self, client: AsyncClient, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "PRODUCT_ARCHIVE_AFTER_DAYS", 30)
+        token = await create_user_and_get_token(
+            client, "archived_owner@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.post(
+            "/api/v1/products/", json={"name": "Cold", "price": 1.0}, headers=headers
+        )
+        product_id = response.json()["id"]
+        await archive_stale_products(0, pause_ms=0)
+        other_token = await create_user_and_get_token(
+            client, "archived_other@example.com", "password123"
+        )
+
+        response = await client.get(
+            f"/api/v1/products/{product_id}",
+            headers={"Authorization": f"Bearer {other_token}"},
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert await ProductArchive.find_all().count() == 1
+
+        response = await client.get(f"/api/v1/products/{product_id}", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["updated_at"] is not None
+        assert await ProductArchive.find_all().count() == 0
+        assert await archive_stale_products(30, pause_ms=0) == 0
+
+    async def test_lookup_by_ids(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "lookup_ids@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        ids = []
+        for name in ("First", "Second", "Third"):
+            response = await client.post(
+                "/api/v1/products/", json={"name": name, "price": 1.0}, headers=headers
+            )
+            ids.append(response.json()["id"])
+        other_token = await create_user_and_get_token(
+            client, "lookup_ids_other@example.com", "password123"
+        )
+        response = await client.post(
+            "/api/v1/products/",
+            json={"name": "Other", "price": 1.0},
+            headers={"Authorization": f"Bearer {other_token}"},
+        )
+        foreign_id = response.json()["id"]
+
+        response = await client.post(
+            "/api/v1/products/lookup",
+            json={"ids": [ids[2], foreign_id, ids[0], "60d5ec49e7a4a62c3d4d7e9a"]},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["name"] for p in response.json()] == ["Third", "First"]
+
+        response = await client.get(
+            "/api/v1/products/", params={"ids": ids[:2]}, headers=headers
+        )
+        assert sorted(p["name"] for p in response.json()) == ["First", "Second"]
+
+    async def test_lookup_too_many_ids(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "lookup_many@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        ids = ["60d5ec49e7a4a62c3d4d7e9a"] * 101
+        response = await client.post(
+            "/api/v1/products/lookup", json={"ids": ids}, headers=headers
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = await client.get(
+            "/api/v1/products/", params={"ids": ids}, headers=headers
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_sorted_top_k(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "sorted_top_k@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, price in (("B", 30.0), ("C", 10.0), ("A", 20.0)):
+            await client.post(
+                "/api/v1/products/",
+                json={"name": name, "price": price},
+                headers=headers,
+            )
+
+        response = await client.get(
+            "/api/v1/products/", params={"sort": "-price", "limit": 2}, headers=headers
+        )
+        assert [p["price"] for p in response.json()] == [30.0, 20.0]
+        response = await client.get(
+            "/api/v1/products/", params={"sort": "name"}, headers=headers
+        )
+        assert [p["name"] for p in response.json()] == ["A", "B", "C"]
+        response = await client.get(
+            "/api/v1/products/", params={"sort": "-created_at"}, headers=headers
+        )
+        assert [p["name"] for p in response.json()] == ["A", "C", "B"]
+
+    async def test_sorts_are_index_backed(self, client: AsyncClient):
+        from app.services.product_sort import explain_sorts
+
+        report = await explain_sorts("507f1f77bcf86cd799439012")
+
+        for sort, plan in report.items():
+            assert plan.get("error") is None, sort
+            assert plan["blocking_sort"] is False, sort
+
+    async def test_sort_with_text_search(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "sort_text@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.get(
+            "/api/v1/products/", params={"sort": "price", "query": "x"}, headers=headers
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = await client.get(
+            "/api/v1/products/", params={"sort": "weight"}, headers=headers
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_filter_by_tags_and_facet(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "tags_filter@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        created = {}
+        for name, tags in (
+            ("Lamp", ["Home", "lighting"]),
+            ("Desk", ["home", "office"]),
+            ("Pen", ["office"]),
+        ):
+            response = await client.post(
+                "/api/v1/products/",
+                json={"name": name, "price": 1.0, "tags": tags},
+                headers=headers,
+            )
+            created[name] = response.json()
+        assert created["Lamp"]["tags"] == ["home", "lighting"]
+
+        response = await client.get(
+            "/api/v1/products/", params={"tags": ["home", "office"]}, headers=headers
+        )
+        assert [p["name"] for p in response.json()] == ["Desk"]
+        response = await client.get(
+            "/api/v1/products/",
+            params={"tags": ["lighting", "office"], "tags_match": "any"},
+            headers=headers,
+        )
+        assert sorted(p["name"] for p in response.json()) == ["Desk", "Lamp", "Pen"]
+
+        await client.put(
+            f"/api/v1/products/{created['Pen']['id']}",
+            json={"tags": ["stationery"]},
+            headers=headers,
+        )
+        await client.delete(
+            f"/api/v1/products/{created['Lamp']['id']}", headers=headers
+        )
+        response = await client.get("/api/v1/products/tags", headers=headers)
+        assert response.json() == [
+            {"tag": "home", "count": 1},
+            {"tag": "office", "count": 1},
+            {"tag": "stationery", "count": 1},
+        ]
+
     async def test_get_products_by_price_range(self, client: AsyncClient):
         token = await create_user_and_get_token(
             client, "price_range_user@example.com", "password123"
@@ -256,6 +517,32 @@ class TestReadProduct:
         assert user_counts[user1_id] == 3
         assert user_counts[user2_id] == 2
 
+    async def test_price_stats(self, client: AsyncClient):
+        token = await create_user_and_get_token(
+            client, "stats@example.com", "password123"
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        for price in (10.0, 20.0):
+            await client.post(
+                "/api/v1/products/",
+                json={"name": "Stat", "description": "Desc", "price": price},
+                headers=headers,
+            )
+
+        response = await client.get("/api/v1/products/stats?bins=2", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["count"] == 2
+        assert response.json()["histogram"]["counts"] == [1, 1]
+
+        await client.post(
+            "/api/v1/products/",
+            json={"name": "Stat", "description": "Desc", "price": 30.0},
+            headers=headers,
+        )
+        response = await client.get("/api/v1/products/stats?bins=2", headers=headers)
+        assert response.json()["count"] == 3
+        assert response.json()["mean"] == 20.0
+
 
 @pytest.mark.anyio
 class TestUpdateProduct:
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from app.models.idempotency import IdempotencyRecord
+from app.services.idempotency import IdempotencyService, fingerprint_payload
+
+
+def make_service(claim_result=None) -> IdempotencyService:
+    service = IdempotencyService()
+    service._claim = AsyncMock(return_value=claim_result)
+    service._complete = AsyncMock()
+    service._release = AsyncMock()
+    return service
+
+
+@pytest.mark.anyio
+class TestIdempotencyService:
+    async def test_without_key_always_executes(self):
+        service = make_service()
+        operation = AsyncMock(return_value={"id": 1})
+
+        await service.execute("user1", "create", None, {}, operation)
+        await service.execute("user1", "create", None, {}, operation)
+
+        assert operation.await_count == 2
+        service._claim.assert_not_awaited()
+
+    async def test_retry_is_served_from_cache(self):
+        service = make_service()
+        operation = AsyncMock(return_value={"id": 1})
+
+        first = await service.execute("user1", "create", "k1", {"a": 1}, operation)
+        second = await service.execute("user1", "create", "k1", {"a": 1}, operation)
+
+        assert first == ({"id": 1}, False)
+        assert second == ({"id": 1}, True)
+        operation.assert_awaited_once()
+        service._complete.assert_awaited_once()
+
+    async def test_concurrent_duplicates_wait_for_first(self):
+        service = make_service()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def operation():
+            started.set()
+            await release.wait()
+            return {"id": 1}
+
+        first = asyncio.create_task(
+            service.execute("user1", "create", "k1", {"a": 1}, operation)
+        )
+        await started.wait()
+        second = asyncio.create_task(
+            service.execute("user1", "create", "k1", {"a": 1}, operation)
+        )
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await first == ({"id": 1}, False)
+        assert await second == ({"id": 1}, True)
+
+    async def test_replays_completed_record_from_database(self):
+        record = MagicMock(
+            fingerprint=fingerprint_payload({"a": 1}), response={"id": 7}
+        )
+        service = make_service(claim_result=record)
+        operation = AsyncMock()
+
+        result = await service.execute("user1", "create", "k1", {"a": 1}, operation)
+
+        assert result == ({"id": 7}, True)
+        operation.assert_not_awaited()
+
+    async def test_key_reused_with_different_payload(self):
+        service = make_service()
+        operation = AsyncMock(return_value={"id": 1})
+        await service.execute("user1", "create", "k1", {"a": 1}, operation)
+
+        with pytest.raises(IdempotencyKeyReused):
+            await service.execute("user1", "create", "k1", {"a": 2}, operation)
+
+    async def test_failure_releases_key(self):
+        service = make_service()
+        operation = AsyncMock(side_effect=[ValueError("boom"), {"id": 1}])
+
+        with pytest.raises(ValueError):
+            await service.execute("user1", "create", "k1", {"a": 1}, operation)
+        service._release.assert_awaited_once()
+
+        result = await service.execute("user1", "create", "k1", {"a": 1}, operation)
+        assert result == ({"id": 1}, False)
+
+    async def test_keys_are_scoped_per_user(self):
+        service = make_service()
+        operation = AsyncMock(return_value={"id": 1})
+
+        await service.execute("user1", "create", "k1", {"a": 1}, operation)
+        await service.execute("user2", "create", "k1", {"a": 1}, operation)
+
+        assert operation.await_count == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("memory_db")
+class TestIdempotencyClaim:
+    async def test_takes_over_an_expired_claim(self):
+        service = IdempotencyService(wait_seconds=0, lease_seconds=60)
+        await IdempotencyRecord(
+            key="k1",
+            fingerprint="old",
+            claim="dead",
+            lease_until=datetime.now(timezone.utc) - timedelta(seconds=1),
+        ).insert()
+
+        assert await service._claim("k1", "new", "mine") is None
+
+        record = await IdempotencyRecord.find_one(IdempotencyRecord.key == "k1")
+        assert (record.claim, record.fingerprint) == ("mine", "new")
+
+    async def test_live_claim_is_in_progress(self):
+        service = IdempotencyService(wait_seconds=0.1, lease_seconds=60)
+        assert await service._claim("k1", "fp", "first") is None
+
+        with pytest.raises(IdempotencyKeyInProgress):
+            await service._claim("k1", "fp", "second")
+
+    async def test_late_completion_does_not_touch_new_claim(self):
+        service = IdempotencyService(wait_seconds=0, lease_seconds=60)
+        await IdempotencyRecord(
+            key="k1",
+            fingerprint="fp",
+            claim="dead",
+            lease_until=datetime.now(timezone.utc) - timedelta(seconds=1),
+        ).insert()
+        await service._claim("k1", "fp", "mine")
+
+        await service._complete("k1", "dead", {"id": 1})
+        await service._release("k1", "dead")
+
+        record = await IdempotencyRecord.find_one(IdempotencyRecord.key == "k1")
+        assert (record.claim, record.status) == ("mine", "in_progress")
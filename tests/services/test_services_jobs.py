@@ -0,0 +1,136 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.core.exceptions import AdminRequired
+from app.services import jobs as jobs_service
+from app.services.jobs import (
+    JobWorkerPool,
+    get_job_handler,
+    is_admin_only,
+    job_handler,
+)
+
+
+def make_job(job_type: str, attempts: int = 1):
+    return MagicMock(id=PydanticObjectId(), type=job_type, params={}, attempts=attempts)
+
+
+def make_pool(**kwargs) -> JobWorkerPool:
+    pool = JobWorkerPool(heartbeat_seconds=60, **kwargs)
+    pool._finish = AsyncMock()
+    pool._release = AsyncMock()
+    return pool
+
+
+@pytest.fixture
+def registered_handlers(monkeypatch):
+    monkeypatch.setattr(jobs_service, "_handlers", {})
+    monkeypatch.setattr(jobs_service, "_admin_only", set())
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("registered_handlers")
+class TestJobWorkerPool:
+    async def test_register_handler(self):
+        @job_handler("noop")
+        async def noop(ctx):
+            return None
+
+        assert get_job_handler("noop") is noop
+        assert get_job_handler("missing") is None
+        assert is_admin_only("noop") is False
+
+    async def test_register_admin_only_handler(self):
+        @job_handler("maintenance", admin_only=True)
+        async def maintenance(ctx):
+            return None
+
+        assert is_admin_only("maintenance") is True
+
+    async def test_run_completes_job(self):
+        @job_handler("sum")
+        async def add(ctx):
+            return {"total": 3}
+
+        pool = make_pool()
+        job = make_job("sum")
+        await pool.run(job, "worker-1")
+
+        pool._finish.assert_awaited_once_with(
+            job, "worker-1", status="completed", progress=1.0, result={"total": 3}
+        )
+
+    async def test_run_requeues_failed_job(self):
+        @job_handler("boom")
+        async def boom(ctx):
+            raise RuntimeError("boom")
+
+        pool = make_pool(max_attempts=3)
+        job = make_job("boom", attempts=1)
+        await pool.run(job, "worker-1")
+
+        pool._finish.assert_awaited_once_with(
+            job, "worker-1", status="queued", error="boom"
+        )
+
+    async def test_run_fails_after_max_attempts(self):
+        @job_handler("boom")
+        async def boom(ctx):
+            raise ValueError("boom")
+
+        pool = make_pool(max_attempts=3)
+        job = make_job("boom", attempts=3)
+        await pool.run(job, "worker-1")
+
+        assert pool._finish.call_args.kwargs["status"] == "failed"
+
+    @pytest.mark.parametrize("error", [AdminRequired(), ValueError("bad param")])
+    async def test_permanent_errors_are_not_retried(self, error):
+        @job_handler("forbidden")
+        async def forbidden(ctx):
+            raise error
+
+        pool = make_pool(max_attempts=3)
+        job = make_job("forbidden", attempts=1)
+        await pool.run(job, "worker-1")
+
+        assert pool._finish.call_args.kwargs["status"] == "failed"
+
+    async def test_unknown_job_type(self):
+        pool = make_pool()
+        job = make_job("missing")
+        await pool.run(job, "worker-1")
+
+        assert pool._finish.call_args.kwargs["status"] == "failed"
+
+    async def test_shutdown_releases_running_job(self):
+        started = asyncio.Event()
+
+        @job_handler("slow")
+        async def slow(ctx):
+            started.set()
+            await asyncio.sleep(60)
+
+        pool = make_pool()
+        job = make_job("slow")
+        task = asyncio.create_task(pool.run(job, "worker-1"))
+        await started.wait()
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        pool._release.assert_awaited_once_with(job, "worker-1")
+
+    async def test_worker_survives_a_crashed_run(self):
+        pool = make_pool(poll_interval=0)
+        first, second = make_job("boom"), make_job("boom")
+        pool.claim = AsyncMock(side_effect=[first, second, asyncio.CancelledError()])
+        pool.run = AsyncMock(side_effect=[RuntimeError("finish failed"), None])
+
+        with pytest.raises(asyncio.CancelledError):
+            await pool._worker_loop("worker-1")
+
+        assert [call.args[0] for call in pool.run.await_args_list] == [first, second]
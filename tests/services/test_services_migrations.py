@@ -0,0 +1,35 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import migrations as migrations_service
+from app.services.migrations import run_startup_migrations
+
+
+def make_runner(statuses: list[list[str]]) -> MagicMock:
+    runner = MagicMock()
+    runner.run = AsyncMock(return_value=[])
+    runner.status = AsyncMock(
+        side_effect=[[{"status": status} for status in batch] for batch in statuses]
+    )
+    return runner
+
+
+@pytest.mark.anyio
+class TestRunStartupMigrations:
+    async def test_waits_for_another_process(self, monkeypatch):
+        runner = make_runner([["completed", "pending"], ["completed", "completed"]])
+        monkeypatch.setattr(migrations_service, "build_runner", lambda db: runner)
+
+        await run_startup_migrations(MagicMock(), poll_seconds=0)
+
+        assert runner.run.await_count == 2
+
+    async def test_failure_does_not_stop_startup(self, monkeypatch):
+        runner = make_runner([])
+        runner.run.side_effect = RuntimeError("boom")
+        monkeypatch.setattr(migrations_service, "build_runner", lambda db: runner)
+
+        await run_startup_migrations(MagicMock(), poll_seconds=0)
+
+        runner.status.assert_not_awaited()
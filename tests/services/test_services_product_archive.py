@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.exceptions import AdminRequired, ProductAccessForbidden
+from app.models.product import Product, ProductArchive
+from app.services.product_archive import (
+    archive_products_job,
+    archive_stale_products,
+    restore_archived_product,
+    stale_products_filter,
+)
+
+
+def make_hot_collection(batches: list[list[dict]]):
+    collection = MagicMock()
+    cursor = MagicMock()
+    cursor.limit.return_value.to_list = AsyncMock(side_effect=batches)
+    collection.find.return_value = cursor
+    collection.delete_many = AsyncMock(
+        side_effect=[MagicMock(deleted_count=len(b)) for b in batches if b]
+    )
+    return collection
+
+
+class TestStaleProductsFilter:
+    def test_skips_recently_restored_products(self):
+        before = datetime.now(timezone.utc)
+
+        stale_filter = stale_products_filter(30)
+
+        cutoff = stale_filter["restored_at"]["$not"]["$gte"]
+        assert before - timedelta(days=30) <= cutoff < before
+
+
+@pytest.mark.anyio
+class TestArchiveStaleProducts:
+    async def test_moves_batches_to_archive(self, monkeypatch):
+        batches = [[{"_id": 1}, {"_id": 2}], [{"_id": 3}], []]
+        hot = make_hot_collection(batches)
+        cold = MagicMock(insert_many=AsyncMock())
+        monkeypatch.setattr(Product, "get_pymongo_collection", lambda: hot)
+        monkeypatch.setattr(ProductArchive, "get_pymongo_collection", lambda: cold)
+
+        archived = await archive_stale_products(30, batch_size=2, pause_ms=0)
+
+        assert archived == 3
+        assert cold.insert_many.await_count == 2
+        archived_docs = cold.insert_many.call_args_list[0].args[0]
+        assert all("archived_at" in doc for doc in archived_docs)
+        delete_filter = hot.delete_many.call_args_list[0].args[0]
+        assert delete_filter["_id"] == {"$in": [1, 2]}
+        assert delete_filter["deleted_at"] == {"$type": "null"}
+        assert "$or" in delete_filter
+
+    async def test_keeps_products_updated_during_the_batch(self, monkeypatch):
+        hot = make_hot_collection([[{"_id": 1}, {"_id": 2}], []])
+        hot.delete_many = AsyncMock(return_value=MagicMock(deleted_count=1))
+        hot.distinct = AsyncMock(return_value=[2])
+        cold = MagicMock(insert_many=AsyncMock(), delete_many=AsyncMock())
+        monkeypatch.setattr(Product, "get_pymongo_collection", lambda: hot)
+        monkeypatch.setattr(ProductArchive, "get_pymongo_collection", lambda: cold)
+
+        archived = await archive_stale_products(30, batch_size=2, pause_ms=0)
+
+        assert archived == 1
+        hot.distinct.assert_awaited_once_with("_id", {"_id": {"$in": [1, 2]}})
+        cold.delete_many.assert_awaited_once_with({"_id": {"$in": [2]}})
+
+    async def test_only_active_products(self, monkeypatch):
+        hot = make_hot_collection([[]])
+        monkeypatch.setattr(Product, "get_pymongo_collection", lambda: hot)
+        monkeypatch.setattr(
+            ProductArchive, "get_pymongo_collection", lambda: MagicMock()
+        )
+
+        await archive_stale_products(30, pause_ms=0)
+
+        stale_filter = hot.find.call_args.args[0]
+        assert stale_filter["deleted_at"] == {"$type": "null"}
+
+
+@pytest.mark.anyio
+class TestArchiveProductsJob:
+    async def test_requires_admin(self):
+        ctx = MagicMock(params={})
+        ctx.job.user_id = "user1"
+
+        with pytest.raises(AdminRequired):
+            await archive_products_job(ctx)
+
+    async def test_reports_fraction_of_stale_products(self, monkeypatch):
+        hot = make_hot_collection([[{"_id": 1}, {"_id": 2}], [{"_id": 3}], []])
+        hot.count_documents = AsyncMock(return_value=4)
+        cold = MagicMock(insert_many=AsyncMock())
+        monkeypatch.setattr(Product, "get_pymongo_collection", lambda: hot)
+        monkeypatch.setattr(ProductArchive, "get_pymongo_collection", lambda: cold)
+        monkeypatch.setattr(settings, "ADMIN_USER_IDS", ["admin"])
+        monkeypatch.setattr(settings, "PRODUCT_ARCHIVE_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "PRODUCT_ARCHIVE_BATCH_PAUSE_MS", 0)
+        ctx = MagicMock(params={"older_than_days": 30}, report_progress=AsyncMock())
+        ctx.job.user_id = "admin"
+
+        assert await archive_products_job(ctx) == {"archived": 3}
+
+        progress = [call.args[0] for call in ctx.report_progress.await_args_list]
+        assert progress == [0.5, 0.75]
+
+
+@pytest.mark.anyio
+class TestRestoreArchivedProduct:
+    async def test_not_archived(self, monkeypatch):
+        cold = MagicMock(find_one=AsyncMock(return_value=None))
+        monkeypatch.setattr(ProductArchive, "get_pymongo_collection", lambda: cold)
+
+        assert await restore_archived_product(PydanticObjectId(), "user1") is None
+
+    @pytest.mark.usefixtures("memory_db")
+    async def test_moves_back_to_hot_collection(self):
+        product_id = PydanticObjectId()
+        await ProductArchive.get_pymongo_collection().insert_one(
+            {
+                "_id": product_id,
+                "name": "Old",
+                "price": 1.0,
+                "user_created": "user1",
+                "created_at": datetime(2020, 1, 1, tzinfo=timezone.utc),
+                "deleted_at": None,
+                "archived_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            }
+        )
+
+        restored = await restore_archived_product(product_id, "user1")
+
+        assert restored.id == product_id
+        assert restored.updated_at is None
+        assert restored.restored_at is not None
+        doc = await Product.get_pymongo_collection().find_one({"_id": product_id})
+        assert "archived_at" not in doc
+        assert "updated_at" not in doc
+        assert doc["restored_at"] is not None
+        assert await ProductArchive.get_pymongo_collection().count_documents({}) == 0
+
+    @pytest.mark.usefixtures("memory_db")
+    async def test_other_users_product_stays_archived(self):
+        product_id = PydanticObjectId()
+        await ProductArchive.get_pymongo_collection().insert_one(
+            {"_id": product_id, "name": "Old", "price": 1.0, "user_created": "user2"}
+        )
+
+        with pytest.raises(ProductAccessForbidden):
+            await restore_archived_product(product_id, "user1")
+
+        assert await Product.get_pymongo_collection().count_documents({}) == 0
+        assert await ProductArchive.get_pymongo_collection().count_documents({}) == 1
@@ -0,0 +1,214 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId, Timestamp
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.services.product_events import (
+    FileEventSink,
+    MemoryEventSink,
+    ProductEventPublisher,
+    build_sink,
+    to_event,
+)
+
+CLUSTER_TIME = Timestamp(datetime(2024, 1, 1, tzinfo=timezone.utc), 1)
+
+
+def change(token: str, operation: str = "insert", **extra) -> dict:
+    product_id = ObjectId()
+    doc = {
+        "_id": product_id,
+        "name": "Lamp",
+        "price": 10.0,
+        "user_created": "user1",
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+    return {
+        "_id": {"_data": token},
+        "operationType": operation,
+        "documentKey": {"_id": product_id},
+        "clusterTime": CLUSTER_TIME,
+        "fullDocument": None if operation == "delete" else doc,
+        **extra,
+    }
+
+
+class FakeChangeStream:
+    def __init__(self, changes: list):
+        self.changes = list(changes)
+        self.resume_token = None
+        self.alive = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if not self.changes:
+            self.alive = False
+            return None
+        item = self.changes.pop(0)
+        if item is not None:
+            self.resume_token = item["_id"]
+        return item
+
+
+class FakeState:
+    def __init__(self, doc=None):
+        self.doc = doc
+
+    async def find_one(self, query):
+        return self.doc
+
+    async def find_one_and_update(self, query, update, upsert=False):
+        if self.doc and self.doc.get("owner") not in (None, update["$set"]["owner"]):
+            raise DuplicateKeyError("held")
+        self.doc = {**(self.doc or {"_id": "products"}), **update["$set"]}
+
+    async def update_one(self, query, update):
+        if self.doc is None or self.doc.get("owner") != query["owner"]:
+            return MagicMock(matched_count=0)
+        self.doc.update(update["$set"])
+        return MagicMock(matched_count=1)
+
+
+def make_publisher(
+    changes: list, state: FakeState, sink=None, batch_size=2, archived=()
+):
+    stream = FakeChangeStream(changes)
+    products = MagicMock()
+    products.watch = MagicMock(return_value=stream)
+    archive = MagicMock(distinct=AsyncMock(return_value=list(archived)))
+    collections = {"event_checkpoints": state, "products_archive": archive}
+    db = MagicMock()
+    db.__getitem__.side_effect = lambda name: collections.get(name, products)
+    publisher = ProductEventPublisher(
+        db, sink or MemoryEventSink(), batch_size=batch_size, max_wait_ms=60000
+    )
+    state.doc = {**(state.doc or {"_id": "products"}), "owner": publisher.owner}
+    return publisher, products
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("memory_db")
+class TestToEvent:
+    async def test_insert(self):
+        event = to_event(change("t1"))
+
+        assert event["id"] == "t1"
+        assert event["type"] == "product.created"
+        assert event["user_id"] == "user1"
+        assert event["product"]["name"] == "Lamp"
+        assert event["occurred_at"].startswith("2024-01-01")
+
+    async def test_soft_delete_and_update(self):
+        soft_delete = change(
+            "t2",
+            "update",
+            updateDescription={"updatedFields": {"deleted_at": CLUSTER_TIME}},
+        )
+        update = change(
+            "t3", "update", updateDescription={"updatedFields": {"d": "x", "price": 1}}
+        )
+
+        assert to_event(soft_delete)["type"] == "product.deleted"
+        assert to_event(update)["type"] == "product.updated"
+        assert to_event(update)["changed_fields"] == ["description", "price"]
+        assert to_event(change("t4", "delete"))["type"] == "product.removed"
+
+    async def test_restore_from_archive(self):
+        restore = change("t5")
+        restore["fullDocument"]["restored_at"] = datetime(2024, 2, 1)
+
+        assert to_event(restore)["type"] == "product.restored"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("memory_db")
+class TestProductEventPublisher:
+    async def test_publishes_batches_and_checkpoints(self):
+        state = FakeState()
+        sink = MemoryEventSink()
+        publisher, products = make_publisher(
+            [change("t1"), change("t2"), change("t3"), None], state, sink
+        )
+
+        await publisher.consume()
+
+        assert [e["id"] for e in sink.events] == ["t1", "t2", "t3"]
+        assert sink.batches == 2
+        assert state.doc["resume_token"] == {"_data": "t3"}
+        assert products.watch.call_args.kwargs["resume_after"] is None
+
+    async def test_resumes_without_replaying_published_events(self):
+        state = FakeState({"_id": "products", "resume_token": {"_data": "t1"}})
+        sink = MemoryEventSink()
+        sink.events = [{"id": "t1"}, {"id": "t2"}, {"id": "t3"}]
+        publisher, products = make_publisher(
+            [change("t2"), change("t3"), change("t4"), None], state, sink
+        )
+
+        await publisher.consume()
+
+        assert products.watch.call_args.kwargs["resume_after"] == {"_data": "t1"}
+        assert [e["id"] for e in sink.events] == ["t1", "t2", "t3", "t4"]
+        assert state.doc["resume_token"] == {"_data": "t4"}
+
+    async def test_archived_products_get_their_own_event(self):
+        archived, purged = change("t1", "delete"), change("t2", "delete")
+        sink = MemoryEventSink()
+        publisher, _ = make_publisher(
+            [archived, purged, None],
+            FakeState(),
+            sink,
+            archived=[archived["documentKey"]["_id"]],
+        )
+
+        await publisher.consume()
+
+        assert [e["type"] for e in sink.events] == [
+            "product.archived",
+            "product.removed",
+        ]
+
+    async def test_lease_held_by_another_process(self):
+        state = FakeState({"_id": "products", "owner": "other"})
+        publisher = ProductEventPublisher(
+            MagicMock(__getitem__=MagicMock(return_value=state)), MemoryEventSink()
+        )
+
+        assert await publisher._acquire_lease() is False
+
+    async def test_history_lost_publishes_reset(self):
+        state = FakeState()
+        sink = MemoryEventSink()
+        publisher, _ = make_publisher([], state, sink)
+        state.doc["resume_token"] = {"_data": "old"}
+
+        await publisher._reset(OperationFailure("history lost", code=286))
+
+        assert sink.events[0]["type"] == "stream.reset"
+        assert state.doc["resume_token"] is None
+
+
+@pytest.mark.anyio
+class TestSinks:
+    async def test_file_sink_appends_ndjson(self, tmp_path):
+        sink = build_sink(f"file:{tmp_path / 'events.ndjson'}")
+        assert isinstance(sink, FileEventSink)
+        assert await sink.last_event_id() is None
+
+        await sink.publish([{"id": "a"}, {"id": "b"}])
+        await sink.publish([{"id": "c"}])
+
+        assert await sink.last_event_id() == "c"
+        assert (tmp_path / "events.ndjson").read_text().count("\n") == 3
+
+    def test_unknown_sink(self):
+        assert isinstance(build_sink("memory:"), MemoryEventSink)
+        with pytest.raises(ValueError):
+            build_sink("kafka://broker")
@@ -0,0 +1,137 @@
+import sys
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.core.config import settings
+from app.core.exceptions import OptionalDependencyMissing
+from app.models import product as product_model
+from app.models.job import Job
+from app.services import product_export
+from app.services.product_export import (
+    build_export_filter,
+    export_output,
+    require_pyarrow,
+)
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def make_docs(count: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"P{i}",
+            "description": None,
+            "price": float(i),
+            "user_created": "user1",
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    docs = make_docs(5)
+
+    async def fake_batches(query, batch_size):
+        for i in range(0, len(docs), batch_size):
+            yield docs[i : i + batch_size]
+
+    monkeypatch.setattr(product_export, "iter_document_batches", fake_batches)
+    return docs
+
+
+class TestBuildExportFilter:
+    def test_only_active_products(self):
+        assert build_export_filter() == {"deleted_at": {"$type": "null"}}
+
+    def test_user_and_dates(self):
+        start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+        query = build_export_filter("user1", start, end)
+        assert query["user_created"] == "user1"
+        assert query["created_at"] == {"$gte": start, "$lt": end}
+
+    def test_layout_migrating_combines_both_layouts(self, monkeypatch):
+        monkeypatch.setattr(product_model, "LAYOUT_MIGRATING", True)
+        start = datetime(2024, 1, 1)
+
+        query = build_export_filter("user1", start)
+
+        assert query["$and"] == [
+            {
+                "$or": [
+                    {"user_created": {"$in": ["user1"]}},
+                    {"u": {"$in": ["user1"]}},
+                ]
+            },
+            {"$or": [{"created_at": {"$gte": start}}, {"c": {"$gte": start}}]},
+        ]
+
+
+class TestExportOutput:
+    def make_job(self, path, status="completed", type="export_products"):
+        return Job(type=type, user_id="user1", status=status, result={"path": path})
+
+    def test_finished_export(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+        path = tmp_path / "products-1.arrow"
+        path.write_bytes(b"data")
+
+        assert export_output(self.make_job(str(path))) == (
+            str(path),
+            "application/vnd.apache.arrow.stream",
+        )
+
+    def test_not_finished(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+        path = tmp_path / "products-1.parquet"
+        path.write_bytes(b"data")
+
+        assert export_output(self.make_job(str(path), status="running")) is None
+        assert export_output(self.make_job(str(path), type="other")) is None
+
+    def test_missing_or_outside_export_dir(self, monkeypatch, tmp_path):
+        export_dir = tmp_path / "exports"
+        export_dir.mkdir()
+        monkeypatch.setattr(settings, "EXPORT_DIR", str(export_dir))
+        outside = tmp_path / "secret.parquet"
+        outside.write_bytes(b"data")
+
+        assert export_output(self.make_job(str(outside))) is None
+        assert export_output(self.make_job(str(export_dir / "gone.parquet"))) is None
+
+
+class TestRequirePyarrow:
+    def test_missing_dependency(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        with pytest.raises(OptionalDependencyMissing):
+            require_pyarrow()
+
+
+@pytest.mark.anyio
+class TestStreamExport:
+    async def test_parquet_round_trip(self, batches):
+        chunks = [
+            chunk
+            async for chunk in product_export.stream_export({}, "parquet", "zstd", 2)
+        ]
+        table = pq.read_table(pa.BufferReader(b"".join(chunks)))
+
+        assert table.num_rows == 5
+        assert table.column("price").to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert table.column("id").to_pylist()[0] == str(batches[0]["_id"])
+        assert pq.ParquetFile(pa.BufferReader(b"".join(chunks))).num_row_groups == 3
+
+    async def test_arrow_stream(self, batches):
+        chunks = [
+            chunk async for chunk in product_export.stream_export({}, "arrow", "lz4", 5)
+        ]
+        table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+
+        assert table.num_rows == 5
+        assert table.schema.field("created_at").type == pa.timestamp("ms", tz="UTC")
@@ -0,0 +1,188 @@
+import gzip
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.models.product import Product
+from app.services.product_import import (
+    import_products,
+    iter_lines,
+    iter_rows,
+    iter_text,
+)
+
+
+async def stream_of(data: bytes, chunk_size: int = 7):
+    for i in range(0, len(data), chunk_size):
+        yield data[i : i + chunk_size]
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def parse_report(lines: list[str]) -> tuple[list[dict], dict]:
+    records = [json.loads(line) for line in lines]
+    return records[:-1], records[-1]["summary"]
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = MagicMock(insert_many=AsyncMock())
+    monkeypatch.setattr(Product, "get_pymongo_collection", lambda: collection)
+    return collection
+
+
+@pytest.mark.anyio
+class TestParsing:
+    async def test_gzip_body(self):
+        data = gzip.compress("ñandú\nsegunda".encode())
+        lines = await collect(iter_lines(iter_text(stream_of(data), compressed=True)))
+        assert lines == ["ñandú", "segunda"]
+
+    async def test_multibyte_split_across_chunks(self):
+        data = "precio€\n".encode()
+        lines = await collect(iter_lines(iter_text(stream_of(data, chunk_size=1))))
+        assert lines == ["precio€"]
+
+    async def test_csv_with_quoted_newline(self):
+        body = 'name,description,price\n"Lamp","Two\nlines",10\nChair,,5\n'
+        rows = await collect(
+            iter_rows(iter_lines(iter_text(stream_of(body.encode()))), "csv")
+        )
+        assert rows == [
+            (1, {"name": "Lamp", "description": "Two\nlines", "price": "10"}, None),
+            (2, {"name": "Chair", "description": None, "price": "5"}, None),
+        ]
+
+    async def test_ndjson_invalid_line(self):
+        body = b'{"name": "A", "price": 1}\nnot json\n'
+        rows = await collect(
+            iter_rows(iter_lines(iter_text(stream_of(body))), "ndjson")
+        )
+        assert rows[0] == (1, {"name": "A", "price": 1}, None)
+        assert rows[1][0] == 2 and rows[1][2].startswith("Invalid JSON")
+
+    async def test_long_line_is_skipped(self):
+        body = b"short\n" + b"x" * 50 + b"\nnext\n"
+        lines = await collect(iter_lines(iter_text(stream_of(body)), max_length=20))
+        assert lines == ["short", None, "next"]
+
+    async def test_long_line_in_one_chunk(self):
+        body = b"x" * 30 + b"\nnext"
+        lines = await collect(
+            iter_lines(iter_text(stream_of(body, chunk_size=100)), max_length=20)
+        )
+        assert lines == [None, "next"]
+
+    async def test_long_trailing_line(self):
+        lines = await collect(
+            iter_lines(iter_text(stream_of(b"ok\n" + b"x" * 30)), max_length=20)
+        )
+        assert lines == ["ok", None]
+
+    async def test_ndjson_long_line_is_a_row_error(self):
+        body = b'{"name": "A", "price": 1}\n' + b" " * 40 + b'\n{"name": "B"}\n'
+        rows = await collect(
+            iter_rows(
+                iter_lines(iter_text(stream_of(body)), max_length=30),
+                "ndjson",
+                max_length=30,
+            )
+        )
+        assert rows[1] == (2, None, "Line too long")
+        assert rows[2] == (3, {"name": "B"}, None)
+
+    async def test_csv_long_quoted_record_aborts(self):
+        body = ('name,price\n"' + "x\n" * 20 + '",1\n').encode()
+        with pytest.raises(ValueError, match="too long"):
+            await collect(
+                iter_rows(
+                    iter_lines(iter_text(stream_of(body)), max_length=20),
+                    "csv",
+                    max_length=20,
+                )
+            )
+
+
+@pytest.mark.anyio
+class TestImportProducts:
+    async def test_inserts_in_batches(self, collection):
+        body = "".join(
+            json.dumps({"name": f"P{i}", "price": i}) + "\n" for i in range(5)
+        )
+        lines = await collect(
+            import_products(stream_of(body.encode()), "user1", "ndjson", batch_size=2)
+        )
+
+        errors, summary = parse_report(lines)
+        assert errors == []
+        assert summary == {
+            "received": 5,
+            "inserted": 5,
+            "already_imported": 0,
+            "failed": 0,
+        }
+        assert collection.insert_many.await_count == 3
+        doc = collection.insert_many.call_args_list[0].args[0][0]
+        assert doc["user_created"] == "user1"
+        assert doc["deleted_at"] is None
+
+    async def test_reports_invalid_rows(self, collection):
+        body = b'{"name": "Ok", "price": 1}\n{"name": "", "price": -1}\n'
+        lines = await collect(import_products(stream_of(body), "user1", "ndjson"))
+
+        errors, summary = parse_report(lines)
+        assert [e["row"] for e in errors] == [2]
+        assert summary["inserted"] == 1
+        assert summary["failed"] == 1
+
+    async def test_idempotency_key_gives_stable_ids(self, collection):
+        body = b'{"name": "A", "price": 1}\n'
+        await collect(import_products(stream_of(body), "user1", "ndjson", None, "k1"))
+        await collect(import_products(stream_of(body), "user1", "ndjson", None, "k1"))
+
+        first = collection.insert_many.call_args_list[0].args[0][0]["_id"]
+        second = collection.insert_many.call_args_list[1].args[0][0]["_id"]
+        assert first == second
+
+    async def test_retry_counts_already_imported(self, collection):
+        collection.insert_many.side_effect = BulkWriteError(
+            {"nInserted": 0, "writeErrors": [{"index": 0, "code": 11000}]}
+        )
+        body = b'{"name": "A", "price": 1}\n'
+        lines = await collect(
+            import_products(stream_of(body), "user1", "ndjson", idempotency_key="k1")
+        )
+
+        _, summary = parse_report(lines)
+        assert summary["already_imported"] == 1
+        assert summary["failed"] == 0
+
+    async def test_counts_tags_of_inserted_rows(self, collection, monkeypatch):
+        apply_tag_deltas = AsyncMock()
+        monkeypatch.setattr(
+            "app.services.product_import.apply_tag_deltas", apply_tag_deltas
+        )
+        collection.insert_many.side_effect = BulkWriteError(
+            {"nInserted": 1, "writeErrors": [{"index": 1, "code": 11000}]}
+        )
+        body = (
+            b'{"name": "A", "price": 1, "tags": ["Lamps", "home"]}\n'
+            b'{"name": "B", "price": 1, "tags": ["lamps"]}\n'
+        )
+
+        await collect(import_products(stream_of(body), "user1", "ndjson"))
+
+        apply_tag_deltas.assert_awaited_once_with("user1", {"lamps": 1, "home": 1})
+
+    async def test_corrupt_gzip(self, collection):
+        lines = await collect(
+            import_products(stream_of(b"not gzip"), "user1", "csv", compressed=True)
+        )
+
+        errors, summary = parse_report(lines)
+        assert errors[0]["error"].startswith("Invalid body")
+        assert summary["failed"] == 1
@@ -0,0 +1,218 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import Decimal128, ObjectId
+
+from app.core.exceptions import AdminRequired
+from app.models import product as product_model
+from app.models.product import (
+    layout_indexes,
+    owner_filter,
+    owner_ref,
+    stored,
+    stored_expr,
+    stored_filter,
+    text_index,
+    to_stored,
+)
+from app.services.product_layout import (
+    compact_product_layout_job,
+    layout_filter,
+    layout_pipeline,
+    migrate_product_layout,
+    storage_stats,
+)
+
+
+class AsyncCursor:
+    def __init__(self, docs: list[dict]):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class TestStoredNames:
+    def test_standard_layout_is_unchanged(self):
+        assert stored("user_created") == "user_created"
+        assert owner_ref("user1") == "user1"
+        fields = {"description": "x", "price": 1.5, "user_created": "user1"}
+        assert to_stored(fields) == fields
+
+    def test_compact_layout(self, monkeypatch):
+        monkeypatch.setattr(product_model, "COMPACT_STORAGE", True)
+        owner = str(ObjectId())
+
+        doc = to_stored(
+            {"description": "x", "price": 0.1, "user_created": owner, "name": "A"}
+        )
+
+        assert doc == {
+            "d": "x",
+            "price": Decimal128("0.1"),
+            "u": ObjectId(owner),
+            "name": "A",
+        }
+
+
+class TestLayoutMigrating:
+    @pytest.fixture(autouse=True)
+    def migrating(self, monkeypatch):
+        monkeypatch.setattr(product_model, "LAYOUT_MIGRATING", True)
+
+    def test_owner_filter_matches_both_layouts(self):
+        owner = str(ObjectId())
+        owners = {"$in": [owner, ObjectId(owner)]}
+
+        assert owner_filter(owner) == {"$or": [{"user_created": owners}, {"u": owners}]}
+
+    def test_owner_filter_keeps_non_object_id_owners(self):
+        assert owner_filter("user1") == {
+            "$or": [{"user_created": {"$in": ["user1"]}}, {"u": {"$in": ["user1"]}}]
+        }
+
+    def test_fields_without_short_name_are_unchanged(self):
+        assert stored_filter("name", "A") == {"name": "A"}
+        assert stored_expr("name") == "$name"
+
+    def test_expr_prefers_configured_layout(self, monkeypatch):
+        assert stored_expr("created_at") == {"$ifNull": ["$created_at", "$c"]}
+        monkeypatch.setattr(product_model, "COMPACT_STORAGE", True)
+        assert stored_expr("created_at") == {"$ifNull": ["$c", "$created_at"]}
+
+    def test_indexes_of_both_layouts(self):
+        indexes = layout_indexes([("user_created", 1), ("price", 1)], "owner_price")
+
+        assert [
+            (index.document["name"], index.document["key"]) for index in indexes
+        ] == [
+            ("owner_price", {"user_created": 1, "price": 1}),
+            ("owner_price_compact", {"u": 1, "price": 1}),
+        ]
+
+    def test_single_text_index_covers_both_descriptions(self):
+        index = text_index("text_active").document
+
+        assert index["name"] == "text_active_migrating"
+        assert list(index["key"]) == ["name", "description", "d"]
+
+
+class TestLayoutPipeline:
+    def test_to_compact(self):
+        set_stage, unset_stage = layout_pipeline(compact=True)
+
+        assert set_stage["$set"]["d"] == {"$ifNull": ["$description", "$d"]}
+        assert set_stage["$set"]["u"]["$convert"]["input"] == {
+            "$ifNull": ["$user_created", "$u"]
+        }
+        assert set_stage["$set"]["u"]["$convert"]["to"] == "objectId"
+        assert set_stage["$set"]["price"] == {"$toDecimal": "$price"}
+        assert sorted(unset_stage["$unset"]) == [
+            "created_at",
+            "description",
+            "updated_at",
+            "user_created",
+        ]
+        assert layout_filter(compact=True) == {
+            "$or": [
+                {"description": {"$exists": True}},
+                {"user_created": {"$exists": True}},
+                {"created_at": {"$exists": True}},
+                {"updated_at": {"$exists": True}},
+                {"price": {"$not": {"$type": "decimal"}}},
+            ]
+        }
+
+    def test_to_standard(self):
+        set_stage, unset_stage = layout_pipeline(compact=False)
+
+        assert set_stage["$set"]["description"] == {"$ifNull": ["$d", "$description"]}
+        assert set_stage["$set"]["user_created"] == {
+            "$toString": {"$ifNull": ["$u", "$user_created"]}
+        }
+        assert set_stage["$set"]["price"] == {"$toDouble": "$price"}
+        assert sorted(unset_stage["$unset"]) == ["c", "d", "m", "u"]
+        assert {"price": {"$type": "decimal"}} in layout_filter(compact=False)["$or"]
+
+
+@pytest.mark.anyio
+class TestMigrateProductLayout:
+    async def test_migrates_in_batches(self):
+        collection = MagicMock()
+        batches = [[{"_id": 1}, {"_id": 2}], [{"_id": 3}], []]
+        collection.find.return_value.limit.side_effect = [
+            AsyncCursor(batch) for batch in batches
+        ]
+        collection.update_many = AsyncMock(
+            side_effect=[MagicMock(modified_count=2), MagicMock(modified_count=1)]
+        )
+        progress = []
+
+        async def on_batch(count):
+            progress.append(count)
+
+        migrated = await migrate_product_layout(
+            collection, batch_size=2, pause_ms=0, on_batch=on_batch
+        )
+
+        assert migrated == 3
+        assert progress == [2, 3]
+        first_filter = collection.update_many.call_args_list[0].args[0]
+        assert first_filter["_id"] == {"$in": [1, 2]}
+        assert first_filter["$or"] == layout_filter(compact=True)["$or"]
+
+    async def test_storage_stats_sums_shards(self):
+        collection = MagicMock()
+        collection.aggregate.return_value = AsyncCursor(
+            [
+                {
+                    "storageStats": {
+                        "count": 2,
+                        "size": 200,
+                        "storageSize": 100,
+                        "totalIndexSize": 50,
+                        "indexSizes": {"_id_": 30, "user_created_active": 20},
+                    }
+                },
+                {
+                    "storageStats": {
+                        "count": 2,
+                        "size": 100,
+                        "storageSize": 80,
+                        "totalIndexSize": 40,
+                        "indexSizes": {"_id_": 25, "user_created_active": 15},
+                    }
+                },
+            ]
+        )
+
+        stats = await storage_stats(collection)
+
+        assert stats == {
+            "count": 4,
+            "size": 300,
+            "storage_size": 180,
+            "total_index_size": 90,
+            "avg_obj_size": 75,
+            "index_sizes": {"_id_": 55, "user_created_active": 35},
+        }
+
+    async def test_job_requires_admin(self):
+        ctx = MagicMock(params={})
+        ctx.job.user_id = "user1"
+
+        with pytest.raises(AdminRequired):
+            await compact_product_layout_job(ctx)
+
+    async def test_job_requires_layout_migrating(self, monkeypatch):
+        monkeypatch.setattr("app.services.product_layout.is_admin", lambda _: True)
+        ctx = MagicMock(params={})
+
+        with pytest.raises(ValueError, match="PRODUCT_LAYOUT_MIGRATING"):
+            await compact_product_layout_job(ctx)
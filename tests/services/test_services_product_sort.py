@@ -0,0 +1,68 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from app.models.product import Product
+from app.services.product_sort import SORT_KEYS, explain_sorts, sort_options
+
+
+def explain_with(*stages: str) -> dict:
+    plan: dict = {}
+    node = plan
+    for stage in stages:
+        node["inputStage"] = {"stage": stage}
+        node = node["inputStage"]
+    return {"queryPlanner": {"winningPlan": plan["inputStage"]}}
+
+
+class TestSortOptions:
+    def test_every_key_has_an_index(self):
+        assert sort_options("price") == (
+            [("price", ASCENDING)],
+            "user_created_price_active",
+        )
+        assert sort_options("-created_at") == (
+            [("created_at", DESCENDING)],
+            "user_created_created_at_active",
+        )
+        assert sort_options("-name")[1] == "user_created_name_active"
+
+
+@pytest.mark.anyio
+class TestExplainSorts:
+    async def test_flags_blocking_sort(self, monkeypatch):
+        plans = {
+            "user_created_price_active": explain_with("LIMIT", "FETCH", "IXSCAN"),
+            "user_created_created_at_active": explain_with("LIMIT", "FETCH", "IXSCAN"),
+            "user_created_name_active": explain_with("SORT", "FETCH", "IXSCAN"),
+        }
+        collection = MagicMock()
+        collection.find.side_effect = lambda query, hint, **kwargs: MagicMock(
+            explain=AsyncMock(return_value=plans[hint])
+        )
+        monkeypatch.setattr(
+            Product, "get_pymongo_collection", classmethod(lambda cls: collection)
+        )
+
+        report = await explain_sorts("user1")
+
+        assert set(report) == set(SORT_KEYS)
+        assert report["-price"]["blocking_sort"] is False
+        assert report["created_at"]["blocking_sort"] is False
+        assert report["name"]["blocking_sort"] is True
+        assert collection.find.call_args.kwargs["limit"] == 20
+
+    async def test_reports_missing_index(self, monkeypatch):
+        collection = MagicMock()
+        collection.find.return_value.explain = AsyncMock(
+            side_effect=OperationFailure("hint provided does not correspond")
+        )
+        monkeypatch.setattr(
+            Product, "get_pymongo_collection", classmethod(lambda cls: collection)
+        )
+
+        report = await explain_sorts("user1")
+
+        assert "hint provided" in report["price"]["error"]
@@ -0,0 +1,95 @@
+import sys
+
+import pytest
+
+from app.core.exceptions import OptionalDependencyMissing
+from app.services import product_stats
+from app.services.product_stats import (
+    PriceStatsCache,
+    compute_price_stats,
+    require_numpy,
+)
+
+np = pytest.importorskip("numpy")
+
+
+class TestComputePriceStats:
+    def test_stats(self):
+        stats = compute_price_stats(np.array([10.0, 20.0, 30.0, 40.0]), bins=2)
+
+        assert stats["count"] == 4
+        assert stats["total"] == 100.0
+        assert stats["mean"] == 25.0
+        assert stats["stddev"] == pytest.approx(11.1803, rel=1e-4)
+        assert stats["min"] == 10.0
+        assert stats["max"] == 40.0
+        assert stats["percentiles"]["p50"] == 25.0
+        assert stats["histogram"] == {"edges": [10.0, 25.0, 40.0], "counts": [2, 2]}
+
+    def test_empty(self):
+        stats = compute_price_stats(np.empty(0), bins=5)
+
+        assert stats["count"] == 0
+        assert stats["mean"] is None
+        assert stats["percentiles"] == {"p50": None, "p90": None, "p99": None}
+
+
+class TestRequireNumpy:
+    def test_missing_dependency(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        with pytest.raises(OptionalDependencyMissing):
+            require_numpy()
+
+
+class TestPriceStatsCache:
+    def test_invalidate_user(self):
+        cache = PriceStatsCache()
+        cache.set("user1", 10, {"count": 1})
+        cache.set("user1", 20, {"count": 1})
+        cache.set("user2", 10, {"count": 2})
+
+        cache.invalidate("user1")
+
+        assert cache.get("user1", 10) is None
+        assert cache.get("user1", 20) is None
+        assert cache.get("user2", 10) == {"count": 2}
+
+    def test_evicts_whole_users(self):
+        cache = PriceStatsCache(max_entries=2)
+        cache.set("user1", 10, {"count": 1})
+        cache.set("user1", 20, {"count": 1})
+        cache.set("user2", 10, {"count": 2})
+        cache.set("user3", 10, {"count": 3})
+
+        assert cache.get("user1", 10) is None
+        assert cache.get("user1", 20) is None
+        assert cache.get("user3", 10) == {"count": 3}
+
+    def test_expired(self):
+        cache = PriceStatsCache(ttl_seconds=-1)
+        cache.set("user1", 10, {"count": 1})
+        assert cache.get("user1", 10) is None
+
+
+@pytest.mark.anyio
+class TestGetPriceStats:
+    async def test_cached_until_invalidated(self, monkeypatch):
+        loads = []
+
+        async def fake_load(user_id, batch_size, session):
+            loads.append((user_id, session))
+            return np.array([1.0, 2.0, 3.0])
+
+        monkeypatch.setattr(product_stats, "load_prices", fake_load)
+        product_stats.price_stats_cache.clear()
+
+        session = object()
+        first = await product_stats.get_price_stats("user1", 10, session)
+        second = await product_stats.get_price_stats("user1", 10, session)
+        product_stats.price_stats_cache.invalidate("user1")
+        await product_stats.get_price_stats("user1", 10)
+
+        assert first == second
+        assert first["count"] == 3
+        assert loads == [("user1", session), ("user1", None)]
+        product_stats.price_stats_cache.clear()
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.exceptions import AdminRequired
+from app.models.product import ProductTagCount
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.product_tags import (
+    apply_tag_deltas,
+    get_tag_counts,
+    rebuild_pipeline,
+    rebuild_tag_counts_job,
+    tag_deltas,
+)
+
+
+class TestTags:
+    def test_schema_normalizes_tags(self):
+        product = ProductCreate(name="A", price=1, tags=[" Gaming", "gaming", "PC"])
+        assert product.tags == ["gaming", "pc"]
+        assert ProductCreate(name="A", price=1, tags="a, B").tags == ["a", "b"]
+        assert ProductCreate(name="A", price=1).tags == []
+        assert ProductUpdate().tags is None
+
+    def test_deltas(self):
+        assert tag_deltas(["a", "b"], ["b", "c", "c"]) == {"a": -1, "c": 1}
+        assert tag_deltas([], []) == {}
+
+    def test_rebuild_pipeline_merges_on_user_and_tag(self):
+        started = datetime.now(timezone.utc)
+
+        pipeline = rebuild_pipeline(started)
+
+        assert pipeline[2]["$unionWith"]["coll"] == "products_archive"
+        assert pipeline[-2]["$project"]["updated_at"] == started
+        assert pipeline[-1]["$merge"]["on"] == ["user_id", "tag"]
+        when_matched = pipeline[-1]["$merge"]["whenMatched"][0]["$replaceWith"]
+        assert when_matched["$cond"][0] == {"$lt": ["$updated_at", started]}
+        assert when_matched["$cond"][2] == "$$ROOT"
+
+
+def mock_counters(monkeypatch) -> MagicMock:
+    collection = MagicMock(bulk_write=AsyncMock(), delete_many=AsyncMock())
+    monkeypatch.setattr(
+        ProductTagCount, "get_pymongo_collection", classmethod(lambda cls: collection)
+    )
+    return collection
+
+
+@pytest.mark.anyio
+class TestTagCounts:
+    async def test_increments_and_cleans_up(self, monkeypatch):
+        collection = mock_counters(monkeypatch)
+
+        await apply_tag_deltas("user1", tag_deltas(["b"], ["a"]))
+
+        operations = collection.bulk_write.call_args.args[0]
+        assert [(op._filter, op._doc["$inc"]) for op in operations] == [
+            ({"user_id": "user1", "tag": "a"}, {"product_count": 1}),
+            ({"user_id": "user1", "tag": "b"}, {"product_count": -1}),
+        ]
+        assert all(op._upsert for op in operations)
+        collection.delete_many.assert_awaited_once()
+        assert collection.delete_many.call_args.args[0]["tag"] == {"$in": ["b"]}
+
+    async def test_no_changes_no_writes(self, monkeypatch):
+        collection = mock_counters(monkeypatch)
+
+        await apply_tag_deltas("user1", tag_deltas(["a"], ["a"]))
+
+        collection.bulk_write.assert_not_awaited()
+
+    async def test_facet_sorted_by_count(self, monkeypatch):
+        find = MagicMock()
+        find.return_value.to_list = AsyncMock(return_value=[{"tag": "a", "count": 2}])
+        collection = MagicMock(find=find)
+        monkeypatch.setattr(
+            "app.services.product_tags.get_collection", lambda model, policy: collection
+        )
+
+        assert await get_tag_counts("user1", limit=5) == [{"tag": "a", "count": 2}]
+        query, projection = find.call_args.args
+        assert query == {"user_id": "user1", "product_count": {"$gt": 0}}
+        assert projection["count"] == "$product_count"
+        assert find.call_args.kwargs["sort"] == [("product_count", -1), ("tag", 1)]
+        assert find.call_args.kwargs["limit"] == 5
+
+    async def test_errors_do_not_fail_the_write(self, monkeypatch):
+        collection = mock_counters(monkeypatch)
+        collection.bulk_write.side_effect = RuntimeError("down")
+
+        await apply_tag_deltas("user1", {"a": 1})
+
+        collection.bulk_write.assert_awaited_once()
+
+    async def test_rebuild_requires_admin(self):
+        ctx = MagicMock(params={})
+        ctx.job.user_id = "user1"
+
+        with pytest.raises(AdminRequired):
+            await rebuild_tag_counts_job(ctx)
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import OptionalDependencyMissing
+from app.core.hot_set import hot_users
+from app.db.migrations import migration_indexes
+from app.models.product import Product
+from app.services import warmup
+from app.services.warmup import (
+    load_hot_set,
+    save_hot_set,
+    touch_indexes,
+    warm_auth,
+    warm_up,
+    warm_user,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_hot_users():
+    hot_users.clear()
+    yield
+    hot_users.clear()
+
+
+@pytest.mark.anyio
+class TestHotSetPersistence:
+    async def test_round_trip(self, memory_db):
+        await memory_db[warmup.STATE_COLLECTION].delete_many({})
+        for user_id in ["u1", "u2", "u2"]:
+            hot_users.record(user_id)
+
+        assert await save_hot_set(memory_db, 10) == 2
+        assert await load_hot_set(memory_db) == ["u2", "u1"]
+
+    async def test_idle_process_keeps_saved_set(self, memory_db):
+        await memory_db[warmup.STATE_COLLECTION].delete_many({})
+        hot_users.record("u1")
+        await save_hot_set(memory_db, 10)
+        hot_users.clear()
+
+        assert await save_hot_set(memory_db, 10) == 0
+        assert await load_hot_set(memory_db) == ["u1"]
+
+
+def test_warm_auth():
+    warm_auth()
+
+
+@pytest.mark.anyio
+class TestWarmUser:
+    async def test_reads_each_sort_index_and_facets(self, monkeypatch):
+        collection = MagicMock()
+        collection.find.return_value.to_list = AsyncMock(return_value=[])
+        monkeypatch.setattr(warmup, "get_collection", lambda *args: collection)
+        monkeypatch.setattr(warmup, "get_tag_counts", AsyncMock(return_value=[]))
+        monkeypatch.setattr(warmup, "get_price_stats", AsyncMock(return_value={}))
+
+        queries = await warm_user("u1", 50)
+
+        hints = [call.kwargs["hint"] for call in collection.find.call_args_list]
+        assert hints == [
+            "user_created_created_at_active",
+            "user_created_price_active",
+            "user_created_name_active",
+        ]
+        assert all(
+            call.kwargs["limit"] == 50 for call in collection.find.call_args_list
+        )
+        assert queries == 5
+
+    async def test_without_numpy(self, monkeypatch):
+        collection = MagicMock()
+        collection.find.return_value.to_list = AsyncMock(return_value=[])
+        monkeypatch.setattr(warmup, "get_collection", lambda *args: collection)
+        monkeypatch.setattr(warmup, "get_tag_counts", AsyncMock(return_value=[]))
+        monkeypatch.setattr(
+            warmup,
+            "get_price_stats",
+            AsyncMock(side_effect=OptionalDependencyMissing("numpy")),
+        )
+
+        assert await warm_user("u1", 50) == 4
+
+
+def product_indexes() -> list:
+    return [*Product.Settings.indexes, *migration_indexes("products")]
+
+
+@pytest.mark.anyio
+class TestTouchIndexes:
+    async def test_scans_compound_indexes_only(self):
+        db = MagicMock()
+        db.__getitem__.return_value.aggregate.return_value.to_list = AsyncMock(
+            return_value=[{"entries": 3}]
+        )
+
+        touched = await touch_indexes(db, "products", product_indexes())
+
+        assert touched == [
+            "user_created_created_at_active",
+            "user_created_price_active",
+            "user_created_name_active",
+            "user_created_tags_active",
+        ]
+        call = db.__getitem__.return_value.aggregate.call_args_list[0]
+        assert call.kwargs["hint"] == "user_created_created_at_active"
+        assert call.args[0][-1] == {"$count": "entries"}
+        assert "maxTimeMS" not in call.kwargs
+
+    async def test_limits_scans_to_the_remaining_budget(self):
+        db = MagicMock()
+        db.__getitem__.return_value.aggregate.return_value.to_list = AsyncMock()
+
+        touched = await touch_indexes(
+            db, "products", product_indexes(), time.monotonic() + 10
+        )
+        expired = await touch_indexes(
+            db, "products", product_indexes(), time.monotonic() - 1
+        )
+
+        call = db.__getitem__.return_value.aggregate.call_args_list[0]
+        assert 0 < call.kwargs["maxTimeMS"] <= 10_000
+        assert len(touched) == 4
+        assert expired == []
+
+
+@pytest.mark.anyio
+class TestWarmUp:
+    async def test_warms_saved_and_configured_users(self, monkeypatch):
+        monkeypatch.setattr(settings, "WARMUP_USER_IDS", ["u0", "u1"])
+        monkeypatch.setattr(settings, "WARMUP_HOT_USERS", 3)
+        monkeypatch.setattr(settings, "WARMUP_TOUCH_INDEXES", False)
+        monkeypatch.setattr(
+            warmup, "load_hot_set", AsyncMock(return_value=["u1", "u2", "u3"])
+        )
+        warm_user = AsyncMock(return_value=5)
+        monkeypatch.setattr(warmup, "warm_user", warm_user)
+
+        report = await warm_up(MagicMock(), timeout=5)
+
+        assert [call.args[0] for call in warm_user.call_args_list] == ["u0", "u1", "u2"]
+        assert report["auth"] is True
+        assert report["users"] == 3
+        assert report["queries"] == 15
+        assert report["timed_out"] is False
+
+    async def test_is_bounded_in_time(self, monkeypatch):
+        async def slow_user(user_id, limit):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(settings, "WARMUP_USER_IDS", ["u1"])
+        monkeypatch.setattr(warmup, "load_hot_set", AsyncMock(return_value=[]))
+        monkeypatch.setattr(warmup, "warm_user", slow_user)
+
+        report = await warm_up(MagicMock(), timeout=0.05)
+
+        assert report["timed_out"] is True
+        assert report["auth"] is True
+        assert report["users"] == 0
+        assert report["seconds"] < 1
+
+    async def test_user_errors_do_not_stop_warm_up(self, monkeypatch):
+        monkeypatch.setattr(settings, "WARMUP_USER_IDS", ["u1", "u2"])
+        monkeypatch.setattr(settings, "WARMUP_TOUCH_INDEXES", False)
+        monkeypatch.setattr(warmup, "load_hot_set", AsyncMock(return_value=[]))
+        monkeypatch.setattr(
+            warmup, "warm_user", AsyncMock(side_effect=[RuntimeError(), 4])
+        )
+
+        report = await warm_up(MagicMock(), timeout=5)
+
+        assert report["errors"] == 1
+        assert report["users"] == 1